@@ -0,0 +1,113 @@
+"""
+Scaling benchmark for listing deduplication
+"""
+
+import sys
+import json
+import time
+import logging
+import resource
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.deduplication import VehicleDeduplicator
+from utils.synthetic_data import SyntheticListingGenerator
+
+def pair_count(n: int) -> int:
+    """Number of unordered pairs among n items"""
+    return n * (n - 1) // 2
+
+def score_clusters(clusters: List[List[int]], entity_ids: List[int]) -> Dict[str, float]:
+    """Pairwise precision and recall of predicted clusters against the true vehicles"""
+    true_pairs = sum(pair_count(n) for n in Counter(entity_ids).values())
+    predicted_pairs = sum(pair_count(len(cluster)) for cluster in clusters)
+    correct_pairs = sum(
+        pair_count(n)
+        for cluster in clusters
+        for n in Counter(entity_ids[index] for index in cluster).values()
+    )
+
+    return {
+        'true_pairs': true_pairs,
+        'predicted_pairs': predicted_pairs,
+        'precision': correct_pairs / predicted_pairs if predicted_pairs else 1.0,
+        'recall': correct_pairs / true_pairs if true_pairs else 1.0
+    }
+
+def run_benchmark(n_rows: int, duplicate_rate: float, n_jobs: int, trace_memory: bool = True) -> Dict[str, Any]:
+    """Run deduplication at the given size and collect timings and quality
+
+    Timings come from an untraced pass; with trace_memory a second pass under
+    tracemalloc, which slows allocation-heavy code several-fold, measures peak memory.
+    """
+    generator = SyntheticListingGenerator(seed=n_rows)
+    listings, entity_ids = generator.generate(n_rows, duplicate_rate=duplicate_rate)
+
+    deduplicator = VehicleDeduplicator(n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    clusters = deduplicator.cluster_listings(listings)
+    cluster_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    unique_listings = deduplicator.merge_clusters(listings, clusters)
+    merge_time = time.perf_counter() - start
+
+    peak_bytes = None
+    if trace_memory:
+        tracemalloc.start()
+        deduplicator.merge_clusters(listings, deduplicator.cluster_listings(listings))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = {
+        'rows': n_rows,
+        'unique_rows': len(unique_listings),
+        'clusters': len(clusters),
+        'cluster_seconds': round(cluster_time, 3),
+        'merge_seconds': round(merge_time, 3),
+        'total_seconds': round(cluster_time + merge_time, 3),
+        'rows_per_second': round(n_rows / (cluster_time + merge_time), 1),
+        'peak_memory_mb': round(peak_bytes / 1024 ** 2, 1) if peak_bytes is not None else None,
+        'worker_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+    result.update(score_clusters(clusters, entity_ids))
+    return result
+
+def main():
+    """Run the deduplication benchmark across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Deduplication scaling benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help='Dataset sizes to benchmark')
+    parser.add_argument('--duplicate-rate', type=float, default=0.2, help='Share of duplicate rows')
+    parser.add_argument('--n-jobs', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help='Skip the tracemalloc pass that measures peak memory')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.duplicate_rate, args.n_jobs,
+                               trace_memory=not args.no_trace_memory)
+        results.append(result)
+        peak = f" | peak {result['peak_memory_mb']} MB" if result['peak_memory_mb'] is not None else ''
+        print(f"{result['rows']:>9} rows | {result['total_seconds']:>9.2f}s "
+              f"({result['rows_per_second']:>10.0f} rows/s){peak} | "
+              f"precision {result['precision']:.3f} | recall {result['recall']:.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Repeated-fit benchmark: per-fit quantization (sklearn API) vs. cached QuantileDMatrix
+"""
+
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_absolute_error
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from models.dmatrix_cache import QuantileDMatrixCache, train_booster, predict_best
+from utils.synthetic_data import SyntheticListingGenerator
+
+def run_benchmark(n_rows: int, n_trials: int, n_estimators: int) -> Dict[str, Any]:
+    """Fit n_trials models on each of 5 folds both ways and report time per fit"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    model = VehiclePriceModel()
+    X, y = model.prepare_data(df)
+    folds = list(KFold(n_splits=5).split(np.arange(X.shape[0])))
+    estimator = model._xgb_estimator(**dict(model.xgb_params, n_estimators=n_estimators, early_stopping_rounds=None,
+                                            tree_method='hist'))
+
+    start = time.perf_counter()
+    sklearn_mae = []
+    for _ in range(n_trials):
+        for train_rows, val_rows in folds:
+            estimator.fit(X[train_rows], y[train_rows], verbose=False)
+            sklearn_mae.append(mean_absolute_error(y[val_rows], estimator.predict(X[val_rows])))
+    sklearn_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrices = QuantileDMatrixCache.for_estimator(estimator, X, y)
+    cached_mae = []
+    for _ in range(n_trials):
+        for train_rows, val_rows in folds:
+            dval = matrices.eval_matrix(val_rows)
+            booster = train_booster(estimator, matrices.train_matrix(train_rows))
+            cached_mae.append(mean_absolute_error(y[val_rows], predict_best(booster, dval)))
+    cached_seconds = time.perf_counter() - start
+
+    n_fits = n_trials * len(folds)
+    return {
+        'rows': n_rows,
+        'fits': n_fits,
+        'sklearn_seconds_per_fit': round(sklearn_seconds / n_fits, 3),
+        'cached_seconds_per_fit': round(cached_seconds / n_fits, 3),
+        'speedup': round(sklearn_seconds / cached_seconds, 2),
+        'sklearn_mae': round(float(np.mean(sklearn_mae)), 2),
+        'cached_mae': round(float(np.mean(cached_mae)), 2),
+        'matrix_builds': matrices.stats['builds'],
+        'matrix_hits': matrices.stats['hits']
+    }
+
+def main():
+    """Compare repeated-fit cost across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Quantized matrix reuse benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000], help='Dataset sizes to benchmark')
+    parser.add_argument('--trials', type=int, default=4, help='Parameter settings fitted on every fold')
+    parser.add_argument('--n-estimators', type=int, default=50, help='Trees per fit')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.trials, args.n_estimators)
+        results.append(result)
+        print(f"{result['rows']:>7} rows | {result['fits']:>3} fits | sklearn {result['sklearn_seconds_per_fit']:>7.3f}s/fit | "
+              f"cached {result['cached_seconds_per_fit']:>7.3f}s/fit | {result['speedup']:.2f}x | "
+              f"MAE {result['sklearn_mae']:.2f} vs {result['cached_mae']:.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
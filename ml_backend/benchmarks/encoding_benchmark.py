@@ -0,0 +1,86 @@
+"""
+One-hot vs. native XGBoost categorical encoding benchmark
+"""
+
+import sys
+import json
+import time
+import pickle
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from utils.synthetic_data import SyntheticListingGenerator
+
+def run_benchmark(n_rows: int, encoding: str, n_estimators: int, n_predictions: int = 200) -> Dict[str, Any]:
+    """Train once with the given encoding and measure train time, model size and predict latency"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    model = VehiclePriceModel(categorical_encoding=encoding)
+    model.xgb_params['n_estimators'] = n_estimators
+    model.xgb_params['early_stopping_rounds'] = None
+
+    X, y = model.prepare_data(df)
+
+    start = time.perf_counter()
+    metrics = model.train(X, y, optimize_params=False)
+    train_time = time.perf_counter() - start
+
+    # Single-listing latency through predict(), as /api/predict would see it
+    sample = listings[:n_predictions]
+    start = time.perf_counter()
+    for listing in sample:
+        model.predict(listing)
+    single_latency = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    model.model.predict(X)
+    batch_time = time.perf_counter() - start
+
+    return {
+        'rows': n_rows,
+        'encoding': encoding,
+        'features': X.shape[1],
+        'train_seconds': round(train_time, 3),
+        'model_size_kb': round(len(pickle.dumps(model.model)) / 1024, 1),
+        'predict_latency_ms': round(single_latency * 1000, 3),
+        'batch_predict_rows_per_second': round(X.shape[0] / batch_time, 1),
+        'mae': round(float(metrics['mae']), 2),
+        'r2': round(float(metrics['r2']), 4)
+    }
+
+def main():
+    """Compare one-hot and native categorical encoding across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Categorical encoding benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='Dataset sizes to benchmark')
+    parser.add_argument('--n-estimators', type=int, default=300, help='Boosting rounds per fit')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        for encoding in ('onehot', 'native'):
+            result = run_benchmark(n_rows, encoding, args.n_estimators)
+            results.append(result)
+            print(f"{result['rows']:>8} rows | {result['encoding']:>6} | {result['features']:>4} cols | "
+                  f"train {result['train_seconds']:>8.2f}s | model {result['model_size_kb']:>9.1f} KB | "
+                  f"predict {result['predict_latency_ms']:>7.3f} ms | MAE {result['mae']:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Training memory benchmark: in-memory frame and matrix vs. external-memory streaming
+"""
+
+import sys
+import json
+import time
+import logging
+import resource
+import tempfile
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from utils.data_storage import DataStorage
+from utils.synthetic_data import SyntheticListingGenerator
+
+def build_database(db_path: str, n_rows: int) -> None:
+    """Store n_rows synthetic listings scraped now, so all fall in the training window"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    now = datetime.now()
+    for listing in listings:
+        listing['scraped_at'] = now.timestamp()
+        listing['year'] = min(listing['year'], now.year)
+    DataStorage(db_path).store_cleaned_listings(listings)
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process; VmHWM where available, as ru_maxrss survives exec on Linux"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _train(db_path: str, mode: str, chunk_size: int, queue: multiprocessing.Queue) -> None:
+    """Train in a fresh process and report wall time, peak RSS and test MAE"""
+    logging.basicConfig(level=logging.WARNING)
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+
+    model = VehiclePriceModel(str(Path(db_path).parent / 'model.pkl'))
+    if mode == 'external':
+        metrics = model.train_external_memory(db_path, chunk_size=chunk_size, fit_sample_rows=chunk_size)
+    else:
+        X, y = model.prepare_data(model.load_training_data(db_path))
+        metrics = model.train(X, y, optimize_params=False)
+
+    queue.put({
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_mb': round(peak_rss_mb(), 1),
+        'peak_over_imports_mb': round(peak_rss_mb() - baseline_mb, 1),
+        'mae': round(float(metrics['mae']), 2)
+    })
+
+def run_benchmark(n_rows: int, chunk_size: int) -> Dict[str, Any]:
+    """Peak memory and time of both training paths on one database"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / 'listings.db')
+        build_database(db_path, n_rows)
+
+        result = {'rows': n_rows, 'chunk_size': chunk_size}
+        context = multiprocessing.get_context('spawn')
+        for mode in ['in_memory', 'external']:
+            queue = context.Queue()
+            process = context.Process(target=_train, args=(db_path, mode, chunk_size, queue))
+            process.start()
+            result[mode] = queue.get()
+            process.join()
+        return result
+
+def main():
+    """Compare training memory across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='External-memory training benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50000, 200000], help='Dataset sizes to benchmark')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per streamed chunk')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.chunk_size)
+        results.append(result)
+        for mode in ['in_memory', 'external']:
+            entry = result[mode]
+            print(f"{result['rows']:>7} rows | {mode:>9} | {entry['seconds']:>7.1f}s | peak {entry['peak_mb']:>7.1f} MB "
+                  f"(+{entry['peak_over_imports_mb']:.1f} MB over imports) | MAE {entry['mae']:.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
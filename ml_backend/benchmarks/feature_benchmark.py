@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for vehicle feature engineering
+"""
+
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.feature_engineering import VehicleFeatureEngineer
+from utils.synthetic_data import SyntheticListingGenerator
+
+def create_base_features_scalar(engineer: VehicleFeatureEngineer, df: pd.DataFrame) -> pd.DataFrame:
+    """Reference base features built row by row with the scalar scoring methods"""
+    feature_df = df.copy()
+
+    current_year = pd.Timestamp.now().year
+    feature_df['age'] = current_year - feature_df['year']
+    feature_df['mileage_per_year'] = feature_df['mileage'] / (feature_df['age'] + 1)
+    feature_df['log_mileage'] = np.log1p(feature_df['mileage'].fillna(0))
+    feature_df['log_price'] = np.log1p(feature_df['price'].fillna(0))
+
+    feature_df['brand_tier'] = feature_df['make'].apply(engineer._categorize_brand)
+    feature_df['body_type_category'] = feature_df['body_type'].apply(engineer._categorize_body_type)
+    feature_df['fuel_efficiency_score'] = feature_df['fuel_type'].apply(engineer._fuel_efficiency_score)
+    feature_df['transmission_score'] = feature_df['transmission'].apply(engineer._transmission_score)
+    feature_df['drivetrain_score'] = feature_df['drivetrain'].apply(engineer._drivetrain_score)
+    feature_df['feature_count'] = feature_df['features'].apply(engineer._count_features)
+    feature_df['exterior_color_score'] = feature_df['exterior_color'].apply(engineer._color_popularity_score)
+    feature_df['location_tier'] = feature_df['location'].apply(engineer._categorize_location)
+    feature_df['dealer_type'] = feature_df['dealer_name'].apply(engineer._categorize_dealer)
+    feature_df['seasonal_factor'] = engineer._get_seasonal_factor(feature_df)
+
+    return feature_df
+
+def run_benchmark(n_rows: int, repeats: int = 3) -> Dict[str, Any]:
+    """Time scalar and vectorized base features at one size and check they agree"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows)
+    df = pd.DataFrame(listings)
+    engineer = VehicleFeatureEngineer()
+
+    timings = {}
+    for name, build in [('scalar', lambda: create_base_features_scalar(engineer, df)),
+                        ('vectorized', lambda: engineer._create_base_features(df))]:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = build()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = (best, result)
+
+    scalar_seconds, scalar_df = timings['scalar']
+    vectorized_seconds, vectorized_df = timings['vectorized']
+
+    return {
+        'rows': n_rows,
+        'scalar_seconds': round(scalar_seconds, 3),
+        'vectorized_seconds': round(vectorized_seconds, 3),
+        'scalar_rows_per_second': round(n_rows / scalar_seconds, 1),
+        'vectorized_rows_per_second': round(n_rows / vectorized_seconds, 1),
+        'speedup': round(scalar_seconds / vectorized_seconds, 2),
+        'identical': bool(scalar_df.equals(vectorized_df[scalar_df.columns]))
+    }
+
+def main():
+    """Run the feature engineering benchmark across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Feature engineering throughput benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000],
+                        help='Dataset sizes to benchmark')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions per size (best is kept)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.repeats)
+        results.append(result)
+        print(f"{result['rows']:>9} rows | scalar {result['scalar_rows_per_second']:>11.0f} rows/s | "
+              f"vectorized {result['vectorized_rows_per_second']:>11.0f} rows/s | "
+              f"{result['speedup']:>5.1f}x | identical {result['identical']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
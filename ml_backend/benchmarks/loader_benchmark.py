@@ -0,0 +1,99 @@
+"""
+Training data load benchmark: SELECT * in one query vs. column-projected chunked loading
+"""
+
+import sys
+import time
+import json
+import sqlite3
+import logging
+import tempfile
+import multiprocessing
+from pathlib import Path
+from typing import Dict, Any
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from models.schema import compact_frame, frame_memory_bytes, memory_stage
+from external_memory_benchmark import build_database, peak_rss_mb
+
+FULL_QUERY = """
+    SELECT * FROM vehicle_listings
+    WHERE price IS NOT NULL AND price > 1000 AND price < 200000
+    AND scraped_at > datetime('now', '-30 days')
+"""
+
+def _load(db_path: str, mode: str, chunk_size: int, queue: multiprocessing.Queue) -> None:
+    """Load the training window in a fresh process and report time, peak RSS and frame size"""
+    logging.basicConfig(level=logging.WARNING)
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+
+    if mode == 'select_all':
+        # The previous load path: every column in one query, compacted and measured afterwards
+        with sqlite3.connect(db_path) as conn:
+            df = pd.read_sql_query(FULL_QUERY, conn)
+        loaded_bytes = frame_memory_bytes(df)
+        df = compact_frame(df)
+        memory_stage(loaded_bytes, frame_memory_bytes(df))
+    else:
+        model = VehiclePriceModel(load_chunk_size=chunk_size)
+        df = model.load_training_data(db_path)
+
+    queue.put({
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_over_imports_mb': round(peak_rss_mb() - baseline_mb, 1),
+        'frame_mb': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1),
+        'rows': len(df),
+        'columns': len(df.columns)
+    })
+
+def run_benchmark(n_rows: int, chunk_size: int) -> Dict[str, Any]:
+    """Load time and peak memory of both load paths on one database"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / 'listings.db')
+        build_database(db_path, n_rows)
+
+        result = {'rows': n_rows, 'chunk_size': chunk_size}
+        context = multiprocessing.get_context('spawn')
+        for mode in ['select_all', 'projected']:
+            queue = context.Queue()
+            process = context.Process(target=_load, args=(db_path, mode, chunk_size, queue))
+            process.start()
+            result[mode] = queue.get()
+            process.join()
+        result['speedup'] = round(result['select_all']['seconds'] / max(result['projected']['seconds'], 1e-6), 2)
+        return result
+
+def main():
+    """Compare training data loads across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Training data loader benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50000, 200000], help='Dataset sizes to benchmark')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per loaded chunk')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.chunk_size)
+        results.append(result)
+        for mode in ['select_all', 'projected']:
+            entry = result[mode]
+            print(f"{result['rows']:>7} rows | {mode:>10} | {entry['seconds']:>6.2f}s | peak +{entry['peak_over_imports_mb']:>6.1f} MB "
+                  f"| frame {entry['frame_mb']:>6.1f} MB ({entry['columns']} columns)")
+        print(f"{result['rows']:>7} rows | load speedup {result['speedup']:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
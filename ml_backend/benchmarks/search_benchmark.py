@@ -0,0 +1,73 @@
+"""
+Hyperparameter search benchmark: successive halving vs. grid search
+"""
+
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from utils.synthetic_data import SyntheticListingGenerator
+
+def run_benchmark(n_rows: int, strategy: str, budget_seconds: float = None) -> Dict[str, Any]:
+    """Train with one search strategy ('none' keeps the default parameters) and report test MAE and search cost"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    model = VehiclePriceModel(search_strategy='halving' if strategy == 'none' else strategy,
+                              search_budget_seconds=budget_seconds)
+    X, y = model.prepare_data(df)
+
+    start = time.perf_counter()
+    metrics = model.train(X, y, optimize_params=strategy != 'none')
+    elapsed = time.perf_counter() - start
+
+    report = model.search_report if strategy != 'none' else {}
+    return {
+        'rows': n_rows,
+        'strategy': strategy,
+        'train_seconds': round(elapsed, 2),
+        'search_seconds': report.get('seconds', 0.0),
+        'trials': report.get('trials', 0),
+        'trials_per_second': report.get('trials_per_second', 0.0),
+        'test_mae': round(float(metrics['mae']), 2),
+        'best_params': report.get('best_params')
+    }
+
+def main():
+    """Compare search strategies across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Hyperparameter search benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000], help='Dataset sizes to benchmark')
+    parser.add_argument('--strategies', nargs='+', default=['none', 'halving', 'grid'],
+                        choices=['none', 'halving', 'grid'], help="Search strategies ('none' = default parameters)")
+    parser.add_argument('--budget-seconds', type=float, help='Time budget for the halving search')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        for strategy in args.strategies:
+            result = run_benchmark(n_rows, strategy, args.budget_seconds)
+            results.append(result)
+            print(f"{result['rows']:>7} rows | {result['strategy']:>7} | train {result['train_seconds']:>8.1f}s | "
+                  f"{result['trials']:>5} trials ({result['trials_per_second']:.2f}/s) | test MAE {result['test_mae']:>8.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
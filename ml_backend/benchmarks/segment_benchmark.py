@@ -0,0 +1,86 @@
+"""
+Segmented ensemble benchmark: one global model vs. per-segment sub-models with a router
+"""
+
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from utils.synthetic_data import SyntheticListingGenerator
+
+def scoring_seconds(model: Any, X: Any, n_rows: int) -> float:
+    """Wall time of n_rows single-row predictions"""
+    start = time.perf_counter()
+    for i in range(n_rows):
+        model.predict(X[i:i + 1])
+    return time.perf_counter() - start
+
+def run_benchmark(n_rows: int, segment_by: str, total_cores: int) -> Dict[str, Any]:
+    """Train time, test MAE and single-row scoring time of the global and segmented models"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    result = {'rows': n_rows, 'segment_by': segment_by}
+    for mode, segmented in [('global', None), ('segmented', {'segment_by': segment_by})]:
+        model = VehiclePriceModel(segmented=segmented, thread_budget={'total_cores': total_cores})
+        X, y = model.prepare_data(df)
+        start = time.perf_counter()
+        metrics = model.train(X, y, optimize_params=False)
+        result[mode] = {'train_seconds': round(time.perf_counter() - start, 2), 'mae': round(float(metrics['mae']), 2)}
+
+    # Per-model size and scoring speed: every sub-model against the global model it replaces
+    sample = X[:min(500, X.shape[0])]
+    result['global']['trees'] = model.model.get_booster().num_boosted_rounds()
+    result['global']['score_ms_per_row'] = round(scoring_seconds(model.model, sample, sample.shape[0]) * 1000 / sample.shape[0], 3)
+    result['segments'] = {
+        segment: {
+            'trees': sub_model.get_booster().num_boosted_rounds(),
+            'fit_seconds': model.segments.report[segment]['fit_seconds'],
+            'score_ms_per_row': round(scoring_seconds(sub_model, sample, sample.shape[0]) * 1000 / sample.shape[0], 3)
+        }
+        for segment, sub_model in model.segments.models.items()
+    }
+    return result
+
+def main():
+    """Compare global and segmented training across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Segmented ensemble benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000], help='Dataset sizes to benchmark')
+    parser.add_argument('--segment-by', type=str, default='brand_tier', choices=['brand_tier', 'body_type_category'])
+    parser.add_argument('--cores', type=int, help='Total cores of the thread budget (default: all)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.segment_by, args.cores)
+        results.append(result)
+        for mode in ['global', 'segmented']:
+            entry = result[mode]
+            print(f"{result['rows']:>7} rows | {mode:>9} | train {entry['train_seconds']:>6.1f}s | MAE {entry['mae']:.2f}")
+        print(f"{'':>7}      | global model: {result['global']['trees']} trees, {result['global']['score_ms_per_row']:.3f} ms/row")
+        for segment, entry in result['segments'].items():
+            print(f"{'':>7}      | {segment}: {entry['trees']} trees, fit {entry['fit_seconds']:.1f}s, "
+                  f"{entry['score_ms_per_row']:.3f} ms/row")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Parallel fit memory benchmark: pickled per-task matrix copies vs. one shared-memory matrix
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from models.segmented_model import _fit_segment
+from models.shared_matrix import SharedTrainingData, attach_training_data
+from utils.synthetic_data import SyntheticListingGenerator
+
+_worker_arrays = None
+_worker_blocks = None
+
+def _init_worker(spec: Dict[str, Any]) -> None:
+    global _worker_arrays, _worker_blocks
+    _worker_arrays, _worker_blocks = attach_training_data(spec)
+
+def _fit_pickled(task: Tuple[Any, Any, np.ndarray, Any, np.ndarray]) -> float:
+    """Fold fit on matrices pickled into the task, as a joblib fan-out does"""
+    estimator, X_train, y_train, X_val, y_val = task
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    return time.perf_counter() - start
+
+def _fit_shared(task: Tuple[Any, np.ndarray, np.ndarray]) -> float:
+    """Fold fit on rows of the shared matrix"""
+    estimator, train_rows, val_rows = task
+    X, y = _worker_arrays['X'], _worker_arrays['y']
+    return _fit_segment('fold', estimator, train_rows, val_rows, X, y, X, y)[2]
+
+class MemoryMonitor:
+    """Peak system-wide memory in use above the level when started, sampled from /proc/meminfo"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _available_mb() -> float:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def _run(self) -> None:
+        baseline = self._available_mb()
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, baseline - self._available_mb())
+            time.sleep(self.interval)
+
+    def __enter__(self) -> 'MemoryMonitor':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+def run_benchmark(n_rows: int, workers: int, n_estimators: int) -> Dict[str, Any]:
+    """Peak memory and wall time of concurrent fold fits with pickled and shared matrices"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    # Dense TF-IDF columns, where per-worker copies cost the most
+    model = VehiclePriceModel(sparse_features=False)
+    X, y = model.prepare_data(df)
+    params = dict(model.xgb_params, n_estimators=n_estimators, n_jobs=1, tree_method='hist')
+    folds = list(KFold(n_splits=workers, shuffle=True, random_state=42).split(np.arange(X.shape[0])))
+    context = multiprocessing.get_context('spawn')
+
+    result = {'rows': n_rows, 'matrix_mb': round(X.nbytes / 1024 ** 2, 1), 'workers': workers}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        list(executor.map(abs, range(workers)))  # Start workers and import modules outside the measurement
+        with MemoryMonitor() as monitor:
+            start = time.perf_counter()
+            list(executor.map(_fit_pickled, [(model._xgb_estimator(**params), X[train], y[train], X[val], y[val])
+                                             for train, val in folds]))
+            seconds = time.perf_counter() - start
+    result['pickled'] = {'seconds': round(seconds, 2), 'peak_mb': round(monitor.peak_mb, 1)}
+
+    with SharedTrainingData({'X': X, 'y': y}) as shared, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                initargs=(shared.spec,)) as executor:
+        list(executor.map(abs, range(workers)))
+        with MemoryMonitor() as monitor:
+            start = time.perf_counter()
+            list(executor.map(_fit_shared, [(model._xgb_estimator(**params), train, val) for train, val in folds]))
+            seconds = time.perf_counter() - start
+    result['shared'] = {'seconds': round(seconds, 2), 'peak_mb': round(monitor.peak_mb, 1)}
+    return result
+
+def main():
+    """Compare pickled and shared-memory parallel fits across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Shared-memory training matrix benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50000, 200000], help='Dataset sizes to benchmark')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent fold fits')
+    parser.add_argument('--n-estimators', type=int, default=50, help='Trees per fold fit')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.workers, args.n_estimators)
+        results.append(result)
+        for mode in ['pickled', 'shared']:
+            entry = result[mode]
+            print(f"{result['rows']:>7} rows ({result['matrix_mb']:.0f} MB matrix) | {result['workers']} workers | "
+                  f"{mode:>7} | {entry['seconds']:>6.1f}s | peak +{entry['peak_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
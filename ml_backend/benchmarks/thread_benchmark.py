@@ -0,0 +1,110 @@
+"""
+Thread budget benchmark: nested n_jobs=-1 oversubscription vs. budgeted core splits
+"""
+
+import sys
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from models.dmatrix_cache import QuantileDMatrixCache
+from models.thread_budget import ThreadBudget, available_cores
+from utils.synthetic_data import SyntheticListingGenerator
+
+def cv_seconds(model: VehiclePriceModel, X: Any, y: np.ndarray, budget: ThreadBudget, n_estimators: int) -> float:
+    """Wall time of one 5-fold cross-validation under a thread budget"""
+    model.thread_budget = budget
+    estimator = model._xgb_estimator(**dict(model.xgb_params, n_estimators=n_estimators, early_stopping_rounds=None))
+    matrices = QuantileDMatrixCache.for_estimator(estimator, X, y)
+    folds = list(KFold(n_splits=5).split(np.arange(X.shape[0])))
+    for train_rows, val_rows in folds:  # Quantize outside the timed section
+        matrices.train_matrix(train_rows), matrices.eval_matrix(val_rows)
+
+    start = time.perf_counter()
+    model._fold_maes(estimator, matrices, folds)
+    return time.perf_counter() - start
+
+def serving_seconds(model: VehiclePriceModel, X: Any, threads: int, concurrent_requests: int,
+                    requests_per_client: int) -> float:
+    """Wall time for concurrent clients each predicting single rows with `threads` XGBoost threads"""
+    model.model.set_params(n_jobs=threads)
+    rows = [X[i:i + 1] for i in range(requests_per_client)]
+
+    def client(_):
+        for row in rows:
+            model.model.predict(row)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrent_requests) as executor:
+        list(executor.map(client, range(concurrent_requests)))
+    return time.perf_counter() - start
+
+def run_benchmark(n_rows: int, worker_counts: List[int], n_estimators: int) -> Dict[str, Any]:
+    """Cross-validation and serving times for nested and budgeted settings"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+    df['features'] = df['features'].apply(json.dumps)
+
+    model = VehiclePriceModel()
+    X, y = model.prepare_data(df)
+    cores = available_cores()
+
+    # Every fold in its own worker and every fit on all cores, as nested n_jobs=-1 does
+    nested = cv_seconds(model, X, y, ThreadBudget(total_cores=cores * cores, search_workers=cores), n_estimators)
+    budgeted = {workers: cv_seconds(model, X, y, ThreadBudget(search_workers=workers), n_estimators)
+                for workers in worker_counts if workers <= cores}
+
+    model.train(X, y, optimize_params=False)
+    serving = {threads: serving_seconds(model, X, threads, concurrent_requests=cores, requests_per_client=200)
+               for threads in sorted({1, cores})}
+
+    best_workers = min(budgeted, key=budgeted.get)
+    return {
+        'rows': n_rows,
+        'cores': cores,
+        'cv_nested_seconds': round(nested, 2),
+        'cv_budgeted_seconds': {workers: round(seconds, 2) for workers, seconds in budgeted.items()},
+        'cv_best_search_workers': best_workers,
+        'cv_speedup': round(nested / budgeted[best_workers], 2),
+        'serving_seconds_by_threads': {threads: round(seconds, 3) for threads, seconds in serving.items()}
+    }
+
+def main():
+    """Compare nested and budgeted parallelism across dataset sizes"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Thread budget benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20000, 100000], help='Dataset sizes to benchmark')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 5], help='Search worker counts to try')
+    parser.add_argument('--n-estimators', type=int, default=100, help='Trees per fold fit')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.workers, args.n_estimators)
+        results.append(result)
+        budgeted = ', '.join(f"{workers}w {seconds:.1f}s" for workers, seconds in result['cv_budgeted_seconds'].items())
+        serving = ', '.join(f"{threads}t {seconds:.2f}s" for threads, seconds in result['serving_seconds_by_threads'].items())
+        print(f"{result['rows']:>7} rows | {result['cores']} cores | CV nested {result['cv_nested_seconds']:.1f}s vs "
+              f"budgeted {budgeted} ({result['cv_speedup']:.2f}x) | serving {serving}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Single-process vs. chunked multi-process feature transform benchmark
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.feature_engineering import VehicleFeatureEngineer
+from utils.synthetic_data import SyntheticListingGenerator
+
+def run_benchmark(n_rows: int, jobs: List[int], sparse_output: bool, chunk_size: int) -> List[Dict[str, Any]]:
+    """Fit once, then time transform() against the chunked transformer at each worker count"""
+    listings, _ = SyntheticListingGenerator(seed=n_rows).generate(n_rows, duplicate_rate=0)
+    df = pd.DataFrame(listings)
+
+    engineer = VehicleFeatureEngineer(sparse_output=sparse_output)
+    engineer.fit_transform(df)
+    engineer.logger.setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    expected = engineer.transform(df)
+    baseline = time.perf_counter() - start
+
+    results = []
+    for n_jobs in jobs:
+        transformer = engineer.chunked_transformer(n_jobs=n_jobs, chunk_size=chunk_size)
+        transformer.parallel_min_rows = 0
+
+        start = time.perf_counter()
+        X = transformer.transform(df)
+        elapsed = time.perf_counter() - start
+
+        difference = abs(X - expected)
+        results.append({
+            'rows': n_rows,
+            'output': 'sparse' if sparse_output else 'dense',
+            'n_jobs': n_jobs,
+            'single_process_seconds': round(baseline, 3),
+            'chunked_seconds': round(elapsed, 3),
+            'speedup': round(baseline / elapsed, 2),
+            'identical': bool((difference.max() if sparse.issparse(difference) else np.max(difference)) == 0)
+        })
+    return results
+
+def main():
+    """Compare chunked transform throughput across worker counts"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Chunked feature transform benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 500000], help='Dataset sizes to benchmark')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help='Worker process counts to compare')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per block')
+    parser.add_argument('--dense', action='store_true', help='Benchmark dense (shared-memory) output')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this path')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_rows in args.sizes:
+        for result in run_benchmark(n_rows, sorted(set(args.jobs)), not args.dense, args.chunk_size):
+            results.append(result)
+            print(f"{result['rows']:>8} rows | {result['output']:>6} | {result['n_jobs']:>2} jobs | "
+                  f"single {result['single_process_seconds']:>7.2f}s | chunked {result['chunked_seconds']:>7.2f}s | "
+                  f"{result['speedup']:>5.2f}x | identical {result['identical']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
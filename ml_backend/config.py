@@ -31,7 +31,33 @@ MODEL_CONFIG = {
     'hyperparameter_tuning': True,
     'cross_validation_folds': 5,
     'test_size': 0.2,
-    'random_state': 42
+    'random_state': 42,
+    'categorical_encoding': 'onehot',  # 'onehot' or 'native' (XGBoost categorical splits on integer codes)
+    'text_vectorizer': 'tfidf',  # 'tfidf' or 'hashing' (stateless HashingVectorizer with IDF weights)
+    'feature_dtype': 'float32',  # Feature matrix dtype handed to XGBoost
+    'compact_dtypes': True,  # Category strings and downcast integers in loaded training frames
+    'training_window_days': 30,  # Scrape-time window of training loads
+    'training_sample_ratio': 1.0,  # Stable id-based share of the window to load
+    'load_chunk_size': 50000,  # Rows per chunk read from SQLite; only training columns are selected
+    'feature_jobs': 1,  # Processes for transforming large frames with a fitted engineer
+    'search_strategy': 'halving',  # 'halving' (budgeted successive halving) or 'grid' (exhaustive 5-fold grid search)
+    'search_budget_seconds': 900,  # Hyperparameter search stops starting trials after this
+    'tuning_policy': {  # Growth/drift thresholds for reusing, locally refining or redoing the last search
+        'reuse_growth': 0.1,
+        'search_growth': 0.5,
+        'reuse_drift': 0.05,
+        'search_drift': 0.2,
+        'max_age_days': 30
+    },
+    'external_memory': False,  # Stream training rows from SQLite into disk-cached XGBoost pages
+    'external_memory_chunk_size': 50000,  # Rows per streamed chunk; bounds training memory
+    'segmented_model': None,  # e.g. {'segment_by': 'brand_tier', 'min_segment_samples': 500}; sub-models routed per segment
+    'thread_budget': {  # Cores split between search workers, XGBoost threads and transform processes
+        'total_cores': None,  # None uses every core this process may run on
+        'search_workers': 1,  # Concurrent CV folds; each gets total_cores // search_workers threads
+        'prediction_threads': 1,  # XGBoost threads of loaded (served) models
+        'transform_workers': None
+    }
 }
 
 # XGBoost parameters
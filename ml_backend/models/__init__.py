@@ -4,5 +4,18 @@ Vehicle pricing models module
 
 from .price_model import VehiclePriceModel
 from .feature_engineering import VehicleFeatureEngineer
+from .row_transformer import RowFeatureTransformer
+from .feature_store import FeatureStore
+from .parallel_transform import ChunkedFeatureTransformer
+from .geo_index import GeoIndex
+from .tuning_store import TuningStore, TuningPolicy
+from .thread_budget import ThreadBudget
+from .training_loader import TrainingDataLoader
+from .stage_profiler import StageProfiler
+from .segmented_model import SegmentedEnsemble
+from .shared_matrix import SharedTrainingData
 
-__all__ = ['VehiclePriceModel', 'VehicleFeatureEngineer']
\ No newline at end of file
+__all__ = ['VehiclePriceModel', 'VehicleFeatureEngineer', 'RowFeatureTransformer', 'FeatureStore',
+           'ChunkedFeatureTransformer', 'GeoIndex', 'TuningStore', 'TuningPolicy',
+           'ThreadBudget', 'TrainingDataLoader', 'StageProfiler',
+           'SegmentedEnsemble', 'SharedTrainingData']
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Quantized XGBoost training matrices reused across repeated fits on the same data
+"""
+
+import hashlib
+import logging
+import numpy as np
+import xgboost as xgb
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from .external_memory import FeatureChunkIterator
+
+class QuantileDMatrixCache:
+    """QuantileDMatrix per row subset of one feature matrix, built once and shared by every fit
+
+    Histogram cut points are sketched once over all rows of the matrix; each row subset
+    (search rung, CV fold) is then binned against those cuts instead of re-sketched, and
+    trials on the same subset reuse the same quantized matrix. Evaluation rows become
+    plain DMatrix objects, which XGBoost accepts as eval sets for any training matrix.
+    """
+
+    def __init__(self, X: Any, y: np.ndarray, max_bin: int = 256, enable_categorical: bool = False,
+                 feature_types: Optional[list] = None, max_entries: int = 16):
+        self.X = X
+        self.y = np.asarray(y)
+        self.max_bin = max_bin
+        self.enable_categorical = enable_categorical
+        self.feature_types = feature_types
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._reference = None
+        self._entries = OrderedDict()
+        self.stats = {'hits': 0, 'builds': 0}
+
+    @classmethod
+    def for_estimator(cls, estimator: Any, X: Any, y: np.ndarray, **kwargs) -> 'QuantileDMatrixCache':
+        """Cache whose matrices match an (unfitted) XGBRegressor's binning and categorical setup"""
+        return cls(X, y, max_bin=estimator.max_bin or 256, enable_categorical=estimator.enable_categorical,
+                   feature_types=estimator.feature_types, **kwargs)
+
+    def _matrix_kwargs(self) -> dict:
+        """Categorical options shared by every matrix built from X"""
+        return {'enable_categorical': self.enable_categorical, 'feature_types': self.feature_types}
+
+    @staticmethod
+    def _rows_key(rows: Optional[np.ndarray]) -> str:
+        """Cache key of a row subset: a digest of its indices, or 'all'"""
+        if rows is None:
+            return 'all'
+        return hashlib.sha1(np.ascontiguousarray(rows, dtype=np.int64).tobytes()).hexdigest()
+
+    def reference(self) -> xgb.QuantileDMatrix:
+        """Quantized matrix over all rows; its cut points are shared by every subset"""
+        if self._reference is None:
+            self._reference = xgb.QuantileDMatrix(self.X, self.y, max_bin=self.max_bin, **self._matrix_kwargs())
+            self.stats['builds'] += 1
+        return self._reference
+
+    def train_matrix(self, rows: Optional[np.ndarray] = None) -> xgb.QuantileDMatrix:
+        """Quantized training matrix for a row subset (all rows when None)"""
+        if rows is None:
+            return self.reference()
+
+        key = ('train', self._rows_key(rows))
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._entries[key]
+
+        matrix = xgb.QuantileDMatrix(self.X[rows], self.y[rows], ref=self.reference(),
+                                     max_bin=self.max_bin, **self._matrix_kwargs())
+        self._store(key, matrix)
+        return matrix
+
+    def eval_matrix(self, rows: np.ndarray) -> xgb.DMatrix:
+        """Unquantized matrix for evaluation and prediction on a row subset"""
+        key = ('eval', self._rows_key(rows))
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._entries[key]
+
+        matrix = xgb.DMatrix(self.X[rows], self.y[rows], **self._matrix_kwargs())
+        self._store(key, matrix)
+        return matrix
+
+    def _store(self, key: Tuple[str, str], matrix: xgb.DMatrix) -> None:
+        """Cache a built matrix, evicting the least recently used beyond max_entries"""
+        self._entries[key] = matrix
+        self.stats['builds'] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+def quantized_rows(X: Any, y: np.ndarray, rows: np.ndarray, ref: Optional[xgb.QuantileDMatrix] = None,
+                   max_bin: int = 256, enable_categorical: bool = False, feature_types: Optional[list] = None,
+                   batch_rows: int = 20000, nthread: Optional[int] = None) -> xgb.QuantileDMatrix:
+    """QuantileDMatrix over a row subset of X, fed batch by batch so the subset is never copied whole
+
+    With X in shared memory, a worker then holds one batch of float rows plus the
+    quantized matrix (about a byte per value) instead of a float copy of every
+    selected row.
+    """
+    rows = np.asarray(rows)
+
+    def batches():
+        for start in range(0, len(rows), batch_rows):
+            batch = rows[start:start + batch_rows]
+            yield X[batch], y[batch]
+
+    return xgb.QuantileDMatrix(FeatureChunkIterator(batches, feature_types=feature_types), max_bin=max_bin, ref=ref,
+                               enable_categorical=enable_categorical, nthread=nthread)
+
+def train_booster(estimator: Any, dtrain: xgb.DMatrix, deval: Optional[xgb.DMatrix] = None) -> xgb.Booster:
+    """Train the booster an unfitted XGBRegressor describes on prebuilt matrices
+
+    Uses the estimator's n_estimators, and its early_stopping_rounds when an eval
+    matrix is given. tree_method is always 'hist', which quantized matrices require.
+    """
+    params = dict(estimator.get_xgb_params(), tree_method='hist')
+    evals = [(deval, 'validation')] if deval is not None else []
+    return xgb.train(params, dtrain, num_boost_round=estimator.n_estimators, evals=evals,
+                     early_stopping_rounds=estimator.early_stopping_rounds if evals else None,
+                     verbose_eval=False)
+
+def predict_best(booster: xgb.Booster, data: xgb.DMatrix) -> np.ndarray:
+    """Predictions using trees up to the early-stopping optimum (all trees without early stopping)"""
+    best_iteration = getattr(booster, 'best_iteration', None)
+    if best_iteration is None:
+        return booster.predict(data)
+    return booster.predict(data, iteration_range=(0, best_iteration + 1))
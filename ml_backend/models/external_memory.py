@@ -0,0 +1,60 @@
+"""
+Out-of-core XGBoost training matrices fed chunk by chunk from a data iterator
+"""
+
+import logging
+import xgboost as xgb
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+class FeatureChunkIterator(xgb.DataIter):
+    """Feeds (X, y) feature chunks to an external-memory DMatrix
+
+    chunk_source returns a fresh iterable of chunks on every call; XGBoost passes over
+    the data more than once while sketching and writing quantized pages, so each reset
+    starts a new pass. Only one chunk is held in memory at a time and the quantized
+    pages are cached on disk under cache_prefix. Without a cache_prefix the iterator
+    feeds an in-memory QuantileDMatrix instead.
+    """
+
+    def __init__(self, chunk_source: Callable[[], Iterable[Tuple[Any, np.ndarray]]], cache_prefix: Optional[str] = None,
+                 feature_types: Optional[list] = None):
+        self.chunk_source = chunk_source
+        self.feature_types = feature_types
+        self.rows = 0
+        self.chunks = 0
+        self._iterator: Optional[Iterator[Tuple[Any, np.ndarray]]] = None
+        if cache_prefix is not None:
+            Path(cache_prefix).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> bool:
+        """Pass the next non-empty chunk to XGBoost; False once the source is exhausted"""
+        if self._iterator is None:
+            self._iterator = iter(self.chunk_source())
+            self.rows = self.chunks = 0
+
+        for X, y in self._iterator:
+            if X.shape[0] == 0:
+                continue
+            input_data(data=X, label=y, feature_types=self.feature_types)
+            self.rows += X.shape[0]
+            self.chunks += 1
+            return True
+        return False
+
+    def reset(self) -> None:
+        """Restart from the first chunk on the next call to next()"""
+        self._iterator = None
+
+def external_memory_matrix(iterator: FeatureChunkIterator, max_bin: int = 256, ref: Optional[xgb.DMatrix] = None,
+                           enable_categorical: bool = False, nthread: Optional[int] = None) -> xgb.DMatrix:
+    """Quantized external-memory matrix over an iterator (a paged DMatrix before XGBoost 3.0)"""
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        return xgb.ExtMemQuantileDMatrix(iterator, max_bin=max_bin, ref=ref, enable_categorical=enable_categorical,
+                                         nthread=nthread)
+
+    logging.getLogger(__name__).info("ExtMemQuantileDMatrix unavailable, using a paged DMatrix")
+    return xgb.DMatrix(iterator, enable_categorical=enable_categorical, nthread=nthread)
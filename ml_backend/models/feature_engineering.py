@@ -4,46 +4,226 @@ Feature engineering for vehicle pricing model
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
-from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from typing import Dict, List, Any, Optional, Tuple, Union
+from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder, OrdinalEncoder
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+from sklearn.preprocessing import normalize
 from textblob import TextBlob
 import re
+import hashlib
 import logging
+from collections import OrderedDict
+from functools import lru_cache
+
+from .schema import fill_missing_category
+from .geo_index import GeoIndex, haversine_miles
+
+class HashingTextVectorizer:
+    """Stateless hashed term counts with optional IDF weights kept as a plain array
+    
+    Drop-in for the fitted TfidfVectorizer: no vocabulary, so any chunk of rows can be
+    transformed independently; only idf_ (n_features floats) is learned by fit.
+    """
+    
+    def __init__(self, n_features: int = 1024, use_idf: bool = True):
+        self.n_features = n_features
+        self.use_idf = use_idf
+        self.hasher = HashingVectorizer(n_features=n_features, stop_words='english',
+                                        alternate_sign=False, norm=None)
+        self.idf_ = None
+    
+    def fit_transform(self, texts: Any) -> sparse.csr_matrix:
+        """Learn IDF weights (when enabled) and transform"""
+        counts = self.hasher.transform(texts)
+        if self.use_idf:
+            # Smoothed IDF, as TfidfTransformer computes it
+            document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+            n_documents = counts.shape[0]
+            self.idf_ = np.log((1 + n_documents) / (1 + document_frequency)) + 1
+        return self._weight(counts)
+    
+    def transform(self, texts: Any) -> sparse.csr_matrix:
+        """Transform texts; needs no fitted state beyond idf_"""
+        return self._weight(self.hasher.transform(texts))
+    
+    def _weight(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Apply IDF weights and L2-normalize rows"""
+        counts = sparse.csr_matrix(counts, dtype=np.float64)
+        counts.sort_indices()
+        if self.idf_ is not None:
+            counts.data *= self.idf_[counts.indices]
+        return normalize(counts, norm='l2', copy=False)
 
 class VehicleFeatureEngineer:
     """Feature engineering for vehicle pricing data"""
     
-    def __init__(self):
+    # Bump when a feature formula changes so stored feature rows are not reused
+    FEATURE_VERSION = 1
+    
+    NUMERICAL_FEATURES = ['age', 'mileage', 'mileage_per_year', 'log_mileage', 
+                          'fuel_efficiency_score', 'transmission_score', 'drivetrain_score',
+                          'feature_count', 'exterior_color_score', 'seasonal_factor']
+    CATEGORICAL_FEATURES = ['make', 'brand_tier', 'body_type_category', 'fuel_type', 
+                            'transmission', 'drivetrain', 'dealer_type']
+    
+    # Derived columns as a DAG: name -> (method, inputs). Inputs are raw columns or other
+    # nodes; a node is computed only when requested and cached per fingerprint of its raw inputs.
+    # Underscored nodes are intermediates left out of the base feature frame.
+    FEATURE_NODES = {
+        'age': ('_age_node', ('year',)),
+        'mileage_per_year': ('_mileage_per_year_node', ('mileage', 'age')),
+        'log_mileage': ('_log_node', ('mileage',)),
+        'log_price': ('_log_node', ('price',)),
+        'brand_tier': ('_categorize_brand_vectorized', ('make',)),
+        'body_type_category': ('_body_type_node', ('body_type',)),
+        'fuel_efficiency_score': ('_fuel_efficiency_node', ('fuel_type',)),
+        'transmission_score': ('_transmission_node', ('transmission',)),
+        'drivetrain_score': ('_drivetrain_node', ('drivetrain',)),
+        'feature_count': ('_count_features_vectorized', ('features',)),
+        'exterior_color_score': ('_color_popularity_node', ('exterior_color',)),
+        '_geo_position': ('_geo_position_node', ('location',)),
+        'latitude': ('_latitude_node', ('_geo_position',)),
+        'longitude': ('_longitude_node', ('_geo_position',)),
+        'metro': ('_metro_node', ('_geo_position',)),
+        'distance_to_center': ('_distance_to_center_node', ('latitude', 'longitude')),
+        'location_tier': ('_location_tier_node', ('location', '_geo_position')),
+        'dealer_type': ('_dealer_type_node', ('dealer_name',)),
+        'seasonal_factor': ('_seasonal_factor_node', ('year',)),
+    }
+    
+    LUXURY_BRANDS = ['BMW', 'Mercedes-Benz', 'Audi', 'Lexus', 'Acura', 'Infiniti', 
+                     'Cadillac', 'Lincoln', 'Volvo', 'Jaguar', 'Land Rover', 'Porsche']
+    MAINSTREAM_BRANDS = ['Toyota', 'Honda', 'Ford', 'Chevrolet', 'Nissan', 'Hyundai', 
+                         'Kia', 'Mazda', 'Subaru', 'Volkswagen', 'Jeep', 'Ram', 'GMC']
+    
+    # Categorical features usable as model segments -> (single-record categorizer, raw column)
+    SEGMENT_FEATURES = {
+        'brand_tier': ('_categorize_brand', 'make'),
+        'body_type_category': ('_categorize_body_type', 'body_type'),
+    }
+    
+    # Ordered (category, keywords) rules; the first rule with a keyword in the value wins
+    BODY_TYPE_RULES = [
+        ('suv', ['suv', 'crossover', 'utility']),
+        ('sedan', ['sedan', 'saloon']),
+        ('truck', ['truck', 'pickup']),
+        ('hatchback', ['hatchback', 'hatch']),
+        ('coupe', ['coupe', 'convertible']),
+        ('wagon', ['wagon', 'estate']),
+    ]
+    FUEL_EFFICIENCY_RULES = [
+        (1.0, ['electric']),
+        (0.8, ['hybrid']),
+        (0.7, ['diesel']),
+        (0.5, ['gasoline', 'gas']),
+    ]
+    TRANSMISSION_RULES = [
+        (1.0, ['automatic', 'cvt']),
+        (0.7, ['manual']),
+    ]
+    DRIVETRAIN_RULES = [
+        (1.0, ['awd', 'all wheel']),
+        (0.9, ['4wd', 'four wheel']),
+        (0.7, ['fwd', 'front wheel']),
+        (0.8, ['rwd', 'rear wheel']),
+    ]
+    POPULAR_COLORS = ['white', 'black', 'silver', 'gray', 'grey']
+    MAJOR_CITIES = ['new york', 'los angeles', 'chicago', 'houston', 'phoenix', 
+                    'philadelphia', 'san antonio', 'san diego', 'dallas', 'san jose',
+                    'austin', 'jacksonville', 'fort worth', 'columbus', 'san francisco',
+                    'charlotte', 'indianapolis', 'seattle', 'denver', 'washington']
+    SUBURBAN_KEYWORDS = ['county', 'suburb', 'township']
+    FRANCHISE_KEYWORDS = ['ford', 'toyota', 'honda', 'chevrolet', 'nissan', 'bmw', 
+                          'mercedes', 'audi', 'lexus', 'acura', 'infiniti', 'cadillac']
+    
+    CATEGORICAL_ENCODINGS = ('onehot', 'native')
+    TEXT_VECTORIZERS = ('tfidf', 'hashing')
+    OUTPUT_DTYPES = ('float64', 'float32')
+    
+    def __init__(self, sparse_output: bool = True, categorical_encoding: str = 'onehot',
+                 text_vectorizer: str = 'tfidf', hashing_features: int = 1024, hashing_idf: bool = True,
+                 dtype: str = 'float64', feature_cache_size: int = 0, geo_table_path: Optional[str] = None,
+                 search_center: Optional[str] = None):
+        if categorical_encoding not in self.CATEGORICAL_ENCODINGS:
+            raise ValueError(f"Unknown categorical encoding: {categorical_encoding}")
+        if text_vectorizer not in self.TEXT_VECTORIZERS:
+            raise ValueError(f"Unknown text vectorizer: {text_vectorizer}")
+        if dtype not in self.OUTPUT_DTYPES:
+            raise ValueError(f"Unsupported output dtype: {dtype}")
+        
+        self.sparse_output = sparse_output  # Emit CSR matrices instead of dense arrays
+        # Features are computed in float64 and cast once at the end; float32 is what XGBoost stores anyway
+        self.dtype = dtype
+        # 'onehot' expands each categorical; 'native' emits one integer-code column for XGBoost categorical splits
+        self.categorical_encoding = categorical_encoding
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.one_hot_encoders = {}
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+        self.ordinal_encoders = {}
+        # 'hashing' needs no vocabulary, so transforms are stateless and chunk-parallel
+        self.text_vectorizer = text_vectorizer
+        if text_vectorizer == 'hashing':
+            self.tfidf_vectorizer = HashingTextVectorizer(n_features=hashing_features, use_idf=hashing_idf)
+        else:
+            self.tfidf_vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
         self.feature_names = []
+        self._state_hash = None
+        self.feature_cache_size = feature_cache_size  # Cached derived columns (repeated diagnostics); 0 disables
+        self._feature_cache = OrderedDict()
+        self.feature_cache_stats = {'hits': 0, 'misses': 0}
         self.logger = logging.getLogger(self.__class__.__name__)
         
-    def fit_transform(self, df: pd.DataFrame) -> np.ndarray:
+        # Place table for location lookups; distances are measured from search_center
+        self.geo_table_path = geo_table_path
+        self.search_center = None
+        if search_center is not None:
+            self.set_search_center(search_center)
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Cached derived columns are not part of the fitted state"""
+        state = self.__dict__.copy()
+        state['_feature_cache'] = OrderedDict()
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        """Engineers pickled before sparse output existed always produced dense matrices"""
+        state.setdefault('sparse_output', False)
+        state.setdefault('_state_hash', None)
+        state.setdefault('categorical_encoding', 'onehot')
+        state.setdefault('ordinal_encoders', {})
+        state.setdefault('text_vectorizer', 'tfidf')
+        state.setdefault('dtype', 'float64')
+        state.setdefault('feature_cache_size', 0)
+        state.setdefault('_feature_cache', OrderedDict())
+        state.setdefault('feature_cache_stats', {'hits': 0, 'misses': 0})
+        state.setdefault('geo_table_path', None)
+        state.setdefault('search_center', None)
+        self.__dict__.update(state)
+        
+    def fit_transform(self, df: pd.DataFrame) -> Union[np.ndarray, sparse.csr_matrix]:
         """Fit transformers and transform data"""
         self.logger.info("Fitting feature transformers and transforming data")
+        self._state_hash = None
         
-        # Create feature dataframe
-        feature_df = self._create_base_features(df)
+        # Only the columns the model uses are derived
+        feature_df = self.compute_features(df, self._model_columns(df))
         
         # Fit and transform
-        X = self._fit_transform_features(feature_df)
+        X = self._encode_features(feature_df, fit=True)
         
         self.logger.info(f"Feature engineering complete. Shape: {X.shape}")
         return X
     
-    def transform(self, df: pd.DataFrame) -> np.ndarray:
+    def transform(self, df: pd.DataFrame) -> Union[np.ndarray, sparse.csr_matrix]:
         """Transform data using fitted transformers"""
         self.logger.info("Transforming data using fitted transformers")
         
-        # Create feature dataframe
-        feature_df = self._create_base_features(df)
+        # Only the columns the model uses are derived
+        feature_df = self.compute_features(df, self._model_columns(df))
         
         # Transform
-        X = self._transform_features(feature_df)
+        X = self._encode_features(feature_df, fit=False)
         
         self.logger.info(f"Data transformed. Shape: {X.shape}")
         return X
@@ -52,125 +232,320 @@ class VehicleFeatureEngineer:
         """Create base features from raw data"""
         feature_df = df.copy()
         
-        # Age feature
-        current_year = pd.Timestamp.now().year
-        feature_df['age'] = current_year - feature_df['year']
-        
-        # Mileage per year
-        feature_df['mileage_per_year'] = feature_df['mileage'] / (feature_df['age'] + 1)
-        
-        # Log transformations for skewed features
-        feature_df['log_mileage'] = np.log1p(feature_df['mileage'].fillna(0))
-        feature_df['log_price'] = np.log1p(feature_df['price'].fillna(0))
-        
-        # Brand tier (luxury, mainstream, economy)
-        luxury_brands = ['BMW', 'Mercedes-Benz', 'Audi', 'Lexus', 'Acura', 'Infiniti', 
-                        'Cadillac', 'Lincoln', 'Volvo', 'Jaguar', 'Land Rover', 'Porsche']
-        mainstream_brands = ['Toyota', 'Honda', 'Ford', 'Chevrolet', 'Nissan', 'Hyundai', 
-                           'Kia', 'Mazda', 'Subaru', 'Volkswagen', 'Jeep', 'Ram', 'GMC']
-        
-        feature_df['brand_tier'] = feature_df['make'].apply(self._categorize_brand)
-        
-        # Body type categories
-        feature_df['body_type_category'] = feature_df['body_type'].apply(self._categorize_body_type)
-        
-        # Fuel type efficiency score
-        feature_df['fuel_efficiency_score'] = feature_df['fuel_type'].apply(self._fuel_efficiency_score)
-        
-        # Transmission type score
-        feature_df['transmission_score'] = feature_df['transmission'].apply(self._transmission_score)
-        
-        # Drivetrain score
-        feature_df['drivetrain_score'] = feature_df['drivetrain'].apply(self._drivetrain_score)
-        
-        # Feature count from text features
-        feature_df['feature_count'] = feature_df['features'].apply(self._count_features)
-        
-        # Color popularity score
-        feature_df['exterior_color_score'] = feature_df['exterior_color'].apply(self._color_popularity_score)
-        
-        # Location-based features
-        feature_df = self._add_location_features(feature_df)
-        
-        # Dealer type (franchise vs independent)
-        feature_df['dealer_type'] = feature_df['dealer_name'].apply(self._categorize_dealer)
-        
-        # Seasonal adjustment
-        feature_df['seasonal_factor'] = self._get_seasonal_factor(feature_df)
+        names = [name for name in self.FEATURE_NODES if not name.startswith('_')]
+        derived = self.compute_features(df, names)
+        for name in names:
+            feature_df[name] = derived[name]
         
         return feature_df
     
-    def _fit_transform_features(self, feature_df: pd.DataFrame) -> np.ndarray:
-        """Fit transformers and transform features"""
+    def compute_features(self, df: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+        """Frame of the requested derived and raw columns, computing only the nodes they need
+        
+        Useful on its own for analytics or diagnostics, e.g. compute_features(df, ['age',
+        'mileage_per_year']) derives just those two columns.
+        """
+        values, fingerprints = {}, {}
+        for name in names:
+            self._resolve_feature(name, df, values, fingerprints)
+        
+        if not names:
+            return pd.DataFrame(index=df.index)
+        return pd.concat([values[name].rename(name) for name in names], axis=1)
+    
+    def _resolve_feature(self, name: str, df: pd.DataFrame, values: Dict[str, pd.Series],
+                         fingerprints: Dict[str, str]) -> pd.Series:
+        """Value of a raw column or feature node, from this call, the cache, or computed"""
+        if name in values:
+            return values[name]
+        
+        if name not in self.FEATURE_NODES:
+            values[name] = df[name]
+            return values[name]
+        
+        key = None
+        if self.feature_cache_size > 0:
+            # Age is relative to the current year, so it is part of every key
+            key = (name, pd.Timestamp.now().year, self.search_center) + tuple(
+                fingerprints.get(column) or fingerprints.setdefault(column, self._column_fingerprint(df[column]))
+                for column in self._node_sources(name)
+            )
+            if key in self._feature_cache:
+                self._feature_cache.move_to_end(key)
+                self.feature_cache_stats['hits'] += 1
+                values[name] = self._feature_cache[key]
+                return values[name]
+        
+        method, inputs = self.FEATURE_NODES[name]
+        result = getattr(self, method)(*[self._resolve_feature(i, df, values, fingerprints) for i in inputs])
+        values[name] = result
+        
+        if key is not None:
+            self.feature_cache_stats['misses'] += 1
+            self._feature_cache[key] = result
+            while len(self._feature_cache) > self.feature_cache_size:
+                self._feature_cache.popitem(last=False)
+        
+        return result
+    
+    @classmethod
+    def _node_sources(cls, name: str) -> Tuple[str, ...]:
+        """Raw columns a feature node depends on, directly or through other nodes"""
+        sources = []
+        for dependency in cls.FEATURE_NODES[name][1]:
+            for column in (cls._node_sources(dependency) if dependency in cls.FEATURE_NODES else (dependency,)):
+                if column not in sources:
+                    sources.append(column)
+        return tuple(sources)
+    
+    @staticmethod
+    def _column_fingerprint(values: pd.Series) -> str:
+        """Hash of a column's values, dtype and index"""
+        try:
+            row_hashes = pd.util.hash_pandas_object(values, index=True)
+        except TypeError:
+            # Unhashable cells such as feature lists
+            row_hashes = pd.util.hash_pandas_object(values.map(repr), index=True)
+        digest = hashlib.sha1(row_hashes.to_numpy().tobytes())
+        digest.update(str(values.dtype).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def clear_feature_cache(self) -> None:
+        """Drop all cached derived columns"""
+        self._feature_cache.clear()
+    
+    def _model_columns(self, df: pd.DataFrame) -> List[str]:
+        """Derived and raw columns the encoded feature matrix is built from"""
+        columns = list(self.NUMERICAL_FEATURES)
+        columns += [feature for feature in self.CATEGORICAL_FEATURES
+                    if feature in self.FEATURE_NODES or feature in df.columns]
+        if 'features' in df.columns:
+            columns.append('features')
+        return columns
+    
+    def _age_node(self, year: pd.Series) -> pd.Series:
+        """Vehicle age in years"""
+        return pd.Timestamp.now().year - year
+    
+    def _mileage_per_year_node(self, mileage: pd.Series, age: pd.Series) -> pd.Series:
+        """Mileage per year of age"""
+        return mileage / (age + 1)
+    
+    def _log_node(self, values: pd.Series) -> pd.Series:
+        """Log transformation for skewed features"""
+        return np.log1p(values.fillna(0))
+    
+    def _body_type_node(self, body_type: pd.Series) -> pd.Series:
+        """Body type categories"""
+        return self._match_rules(body_type, self.BODY_TYPE_RULES, default='other', missing='unknown')
+    
+    def _fuel_efficiency_node(self, fuel_type: pd.Series) -> pd.Series:
+        """Fuel type efficiency score"""
+        return self._match_rules(fuel_type, self.FUEL_EFFICIENCY_RULES, default=0.3, missing=0.5)
+    
+    def _transmission_node(self, transmission: pd.Series) -> pd.Series:
+        """Transmission type score"""
+        return self._match_rules(transmission, self.TRANSMISSION_RULES, default=0.5, missing=0.5)
+    
+    def _drivetrain_node(self, drivetrain: pd.Series) -> pd.Series:
+        """Drivetrain score"""
+        return self._match_rules(drivetrain, self.DRIVETRAIN_RULES, default=0.5, missing=0.5)
+    
+    def _color_popularity_node(self, exterior_color: pd.Series) -> pd.Series:
+        """Color popularity score"""
+        return self._match_rules(exterior_color, [(1.0, self.POPULAR_COLORS)], default=0.7, missing=0.5)
+    
+    @property
+    def geo_index(self) -> GeoIndex:
+        """Shared place table index, loaded once per process"""
+        return GeoIndex.default(self.geo_table_path)
+    
+    def set_search_center(self, location: str) -> None:
+        """Measure distance_to_center from a ZIP or "City, ST" in the place table"""
+        center = self.geo_index.locate(location)
+        if center is None:
+            raise ValueError(f"Unknown search center: {location}")
+        self.search_center = center
+    
+    def _geo_position_node(self, location: pd.Series) -> pd.Series:
+        """Row of each location in the place table, -1 when not found"""
+        return pd.Series(self.geo_index.lookup(location), index=location.index)
+    
+    def _latitude_node(self, positions: pd.Series) -> pd.Series:
+        """Latitude of the matched place, NaN when unmatched"""
+        return pd.Series(self.geo_index.take(positions.to_numpy(), self.geo_index.latitude, np.nan), index=positions.index)
+    
+    def _longitude_node(self, positions: pd.Series) -> pd.Series:
+        """Longitude of the matched place, NaN when unmatched"""
+        return pd.Series(self.geo_index.take(positions.to_numpy(), self.geo_index.longitude, np.nan), index=positions.index)
+    
+    def _metro_node(self, positions: pd.Series) -> pd.Series:
+        """Metro area of the matched place"""
+        return pd.Series(self.geo_index.take(positions.to_numpy(), self.geo_index.metro, 'unknown'), index=positions.index)
+    
+    def _distance_to_center_node(self, latitude: pd.Series, longitude: pd.Series) -> pd.Series:
+        """Haversine miles to the search center, NaN without a center or place match"""
+        if self.search_center is None:
+            return pd.Series(np.nan, index=latitude.index)
+        return pd.Series(haversine_miles(latitude.to_numpy(), longitude.to_numpy(), *self.search_center),
+                         index=latitude.index)
+    
+    def _location_tier_node(self, location: pd.Series, positions: pd.Series) -> pd.Series:
+        """Metro tier from the place table; unmatched locations fall back to keyword rules"""
+        positions = positions.to_numpy()
+        found = positions >= 0
+        tiers = np.empty(len(location), dtype=object)
+        tiers[found] = self.geo_index.metro_tier[positions[found]]
+        if not found.all():
+            tiers[~found] = self._match_rules(
+                location[~found], [('major_city', self.MAJOR_CITIES), ('suburban', self.SUBURBAN_KEYWORDS)],
+                default='rural', missing='unknown'
+            ).to_numpy()
+        return pd.Series(tiers, index=location.index)
+    
+    def _dealer_type_node(self, dealer_name: pd.Series) -> pd.Series:
+        """Dealer type (franchise vs independent)"""
+        return self._match_rules(dealer_name, [('franchise', self.FRANCHISE_KEYWORDS)],
+                                 default='independent', missing='unknown')
+    
+    def _seasonal_factor_node(self, year: pd.Series) -> pd.Series:
+        """Seasonal adjustment; year only supplies the row index for now"""
+        return self._get_seasonal_factor(pd.DataFrame(index=year.index))
+    
+    def _encode_features(self, feature_df: pd.DataFrame, fit: bool) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Scale, encode and vectorize features, fitting the transformers first when fit is set"""
         X_parts = []
         
         # Numerical features
-        numerical_features = ['age', 'mileage', 'mileage_per_year', 'log_mileage', 
-                            'fuel_efficiency_score', 'transmission_score', 'drivetrain_score',
-                            'feature_count', 'exterior_color_score', 'seasonal_factor']
-        
-        X_numerical = feature_df[numerical_features].fillna(0)
-        X_numerical_scaled = self.scaler.fit_transform(X_numerical)
-        X_parts.append(X_numerical_scaled)
-        
-        # Categorical features with one-hot encoding
-        categorical_features = ['make', 'brand_tier', 'body_type_category', 'fuel_type', 
-                               'transmission', 'drivetrain', 'dealer_type']
-        
-        for feature in categorical_features:
-            if feature in feature_df.columns:
-                encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-                X_cat = encoder.fit_transform(feature_df[[feature]].fillna('unknown'))
-                self.one_hot_encoders[feature] = encoder
-                X_parts.append(X_cat)
+        X_numerical = feature_df[self.NUMERICAL_FEATURES].fillna(0)
+        X_numerical_scaled = self.scaler.fit_transform(X_numerical) if fit else self.scaler.transform(X_numerical)
+        X_parts.append(self._explicit_block(X_numerical_scaled))
+        
+        # Categorical features, one-hot encoded or as integer codes
+        if fit:
+            self.one_hot_encoders = {}
+            self.ordinal_encoders = {}
+        for feature in self.CATEGORICAL_FEATURES:
+            if fit and feature in feature_df.columns:
+                if self.categorical_encoding == 'native':
+                    # Unseen categories become missing, which XGBoost routes like any missing value
+                    self.ordinal_encoders[feature] = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan)
+                else:
+                    self.one_hot_encoders[feature] = OneHotEncoder(sparse_output=self.sparse_output, handle_unknown='ignore')
+            
+            values = fill_missing_category(feature_df[[feature]]) if feature in feature_df.columns else None
+            if feature in self.ordinal_encoders:
+                encoder = self.ordinal_encoders[feature]
+                X_codes = encoder.fit_transform(values) if fit else encoder.transform(values)
+                X_parts.append(self._explicit_block(X_codes))
+            elif feature in self.one_hot_encoders:
+                encoder = self.one_hot_encoders[feature]
+                X_parts.append(encoder.fit_transform(values) if fit else encoder.transform(values))
         
-        # Text features (TF-IDF)
+        # Text features (TF-IDF or hashed)
         if 'features' in feature_df.columns:
             features_text = feature_df['features'].fillna('').apply(lambda x: ' '.join(x) if isinstance(x, list) else str(x))
-            X_text = self.tfidf_vectorizer.fit_transform(features_text)
-            X_parts.append(X_text.toarray())
+            X_text = self.tfidf_vectorizer.fit_transform(features_text) if fit else self.tfidf_vectorizer.transform(features_text)
+            X_parts.append(X_text if self.sparse_output else X_text.toarray())
         
         # Combine all features
-        X = np.hstack(X_parts)
+        X = self._stack(X_parts)
         
         # Store feature names for interpretability
-        self._create_feature_names(numerical_features, categorical_features)
+        if fit:
+            self._create_feature_names(self.NUMERICAL_FEATURES, self.CATEGORICAL_FEATURES)
         
         return X
     
-    def _transform_features(self, feature_df: pd.DataFrame) -> np.ndarray:
-        """Transform features using fitted transformers"""
-        X_parts = []
-        
-        # Numerical features
-        numerical_features = ['age', 'mileage', 'mileage_per_year', 'log_mileage', 
-                            'fuel_efficiency_score', 'transmission_score', 'drivetrain_score',
-                            'feature_count', 'exterior_color_score', 'seasonal_factor']
-        
-        X_numerical = feature_df[numerical_features].fillna(0)
-        X_numerical_scaled = self.scaler.transform(X_numerical)
-        X_parts.append(X_numerical_scaled)
-        
-        # Categorical features
-        categorical_features = ['make', 'brand_tier', 'body_type_category', 'fuel_type', 
-                               'transmission', 'drivetrain', 'dealer_type']
-        
-        for feature in categorical_features:
-            if feature in self.one_hot_encoders:
-                encoder = self.one_hot_encoders[feature]
-                X_cat = encoder.transform(feature_df[[feature]].fillna('unknown'))
-                X_parts.append(X_cat)
-        
-        # Text features
-        if 'features' in feature_df.columns:
-            features_text = feature_df['features'].fillna('').apply(lambda x: ' '.join(x) if isinstance(x, list) else str(x))
-            X_text = self.tfidf_vectorizer.transform(features_text)
-            X_parts.append(X_text.toarray())
-        
-        # Combine all features
-        X = np.hstack(X_parts)
-        
-        return X
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern:
+        """Compile keywords into one alternation matching any of them as a substring"""
+        return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    
+    @staticmethod
+    def _first_rule_match(value: str, rules: List[Tuple[Any, List[str]]], default: Any) -> Any:
+        """Result of the first rule with a keyword contained in a lowercased value"""
+        for result, keywords in rules:
+            if any(keyword in value for keyword in keywords):
+                return result
+        return default
+    
+    def _match_rules(self, values: pd.Series, rules: List[Tuple[Any, List[str]]],
+                     default: Any, missing: Any) -> pd.Series:
+        """Vectorized first-match keyword rules over lowercased strings
+        
+        Equivalent to the scalar scoring methods: missing values map to `missing`,
+        otherwise the first rule with a keyword contained in the value wins. Rules are
+        evaluated once per distinct value and broadcast back through the factor codes.
+        """
+        codes, uniques = pd.factorize(values)
+        lowered = pd.Series(uniques, dtype=object).str.lower()
+        
+        conditions = [
+            lowered.str.contains(self._keyword_pattern(tuple(keywords)), regex=True, na=False).to_numpy()
+            for _, keywords in rules
+        ]
+        choices = [result for result, _ in rules]
+        
+        dtype = object if isinstance(default, str) else np.float64
+        unique_results = np.select(conditions, choices, default=default) if len(uniques) else []
+        return self._broadcast_codes(codes, unique_results, missing, values.index, dtype)
+    
+    def _categorize_brand_vectorized(self, makes: pd.Series) -> pd.Series:
+        """Vectorized equivalent of _categorize_brand"""
+        codes, uniques = pd.factorize(makes)
+        titled = pd.Series(uniques, dtype=object).str.title()
+        unique_tiers = np.select(
+            [titled.isin(self.LUXURY_BRANDS).to_numpy(), titled.isin(self.MAINSTREAM_BRANDS).to_numpy()],
+            ['luxury', 'mainstream'],
+            default='economy'
+        )
+        return self._broadcast_codes(codes, unique_tiers, 'unknown', makes.index, object)
+    
+    @staticmethod
+    def _broadcast_codes(codes: np.ndarray, unique_results: Any, missing: Any,
+                         index: pd.Index, dtype: Any) -> pd.Series:
+        """Map per-distinct-value results back to rows; missing values (code -1) take the last slot"""
+        lookup = np.empty(len(unique_results) + 1, dtype=dtype)
+        lookup[:-1] = unique_results
+        lookup[-1] = missing
+        return pd.Series(lookup[codes], index=index, dtype=dtype)
+    
+    def _count_features_vectorized(self, features: pd.Series) -> pd.Series:
+        """Vectorized equivalent of _count_features"""
+        values = features.to_numpy(dtype=object)
+        value_types = features.map(type).to_numpy()
+        is_list = value_types == list
+        is_str = value_types == str
+        
+        counts = np.zeros(len(values), dtype=np.int64)
+        counts[is_list] = np.fromiter(map(len, values[is_list]), dtype=np.int64, count=int(is_list.sum()))
+        counts[is_str] = np.char.count(values[is_str].astype(str), ',') + 1
+        return pd.Series(counts, index=features.index)
+    
+    def _explicit_block(self, X_block: np.ndarray) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Dense block, as CSR with every non-NaN entry stored when output is sparse
+        
+        XGBoost treats entries absent from a sparse matrix as missing, so zeros in the
+        numerical and category-code columns are kept explicitly and only NaN (unknown
+        category) is left out; one-hot and TF-IDF zeros stay implicit.
+        """
+        if not self.sparse_output:
+            return X_block
+        
+        present = ~np.isnan(X_block)
+        indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+        return sparse.csr_matrix(
+            (X_block[present], np.nonzero(present)[1], indptr), shape=X_block.shape
+        )
+    
+    def _stack(self, X_parts: List[Any]) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Horizontally combine feature blocks into one matrix of the output dtype"""
+        if self.sparse_output:
+            return sparse.hstack(X_parts, format='csr', dtype=self.dtype)
+        # C-contiguous, so XGBoost can read it without its own copy
+        return np.ascontiguousarray(np.hstack(X_parts), dtype=self.dtype)
     
     def _categorize_brand(self, make: str) -> str:
         """Categorize brand into luxury, mainstream, or economy"""
@@ -178,14 +553,9 @@ class VehicleFeatureEngineer:
             return 'unknown'
         
         make = make.title()
-        luxury_brands = ['BMW', 'Mercedes-Benz', 'Audi', 'Lexus', 'Acura', 'Infiniti', 
-                        'Cadillac', 'Lincoln', 'Volvo', 'Jaguar', 'Land Rover', 'Porsche']
-        mainstream_brands = ['Toyota', 'Honda', 'Ford', 'Chevrolet', 'Nissan', 'Hyundai', 
-                           'Kia', 'Mazda', 'Subaru', 'Volkswagen', 'Jeep', 'Ram', 'GMC']
-        
-        if make in luxury_brands:
+        if make in self.LUXURY_BRANDS:
             return 'luxury'
-        elif make in mainstream_brands:
+        elif make in self.MAINSTREAM_BRANDS:
             return 'mainstream'
         else:
             return 'economy'
@@ -195,68 +565,28 @@ class VehicleFeatureEngineer:
         if pd.isna(body_type):
             return 'unknown'
         
-        body_type = body_type.lower()
-        if any(x in body_type for x in ['suv', 'crossover', 'utility']):
-            return 'suv'
-        elif any(x in body_type for x in ['sedan', 'saloon']):
-            return 'sedan'
-        elif any(x in body_type for x in ['truck', 'pickup']):
-            return 'truck'
-        elif any(x in body_type for x in ['hatchback', 'hatch']):
-            return 'hatchback'
-        elif any(x in body_type for x in ['coupe', 'convertible']):
-            return 'coupe'
-        elif any(x in body_type for x in ['wagon', 'estate']):
-            return 'wagon'
-        else:
-            return 'other'
+        return self._first_rule_match(body_type.lower(), self.BODY_TYPE_RULES, 'other')
     
     def _fuel_efficiency_score(self, fuel_type: str) -> float:
         """Score fuel type by efficiency"""
         if pd.isna(fuel_type):
             return 0.5
         
-        fuel_type = fuel_type.lower()
-        if 'electric' in fuel_type:
-            return 1.0
-        elif 'hybrid' in fuel_type:
-            return 0.8
-        elif 'diesel' in fuel_type:
-            return 0.7
-        elif 'gasoline' in fuel_type or 'gas' in fuel_type:
-            return 0.5
-        else:
-            return 0.3
+        return self._first_rule_match(fuel_type.lower(), self.FUEL_EFFICIENCY_RULES, 0.3)
     
     def _transmission_score(self, transmission: str) -> float:
         """Score transmission type"""
         if pd.isna(transmission):
             return 0.5
         
-        transmission = transmission.lower()
-        if 'automatic' in transmission or 'cvt' in transmission:
-            return 1.0
-        elif 'manual' in transmission:
-            return 0.7
-        else:
-            return 0.5
+        return self._first_rule_match(transmission.lower(), self.TRANSMISSION_RULES, 0.5)
     
     def _drivetrain_score(self, drivetrain: str) -> float:
         """Score drivetrain type"""
         if pd.isna(drivetrain):
             return 0.5
         
-        drivetrain = drivetrain.lower()
-        if 'awd' in drivetrain or 'all wheel' in drivetrain:
-            return 1.0
-        elif '4wd' in drivetrain or 'four wheel' in drivetrain:
-            return 0.9
-        elif 'fwd' in drivetrain or 'front wheel' in drivetrain:
-            return 0.7
-        elif 'rwd' in drivetrain or 'rear wheel' in drivetrain:
-            return 0.8
-        else:
-            return 0.5
+        return self._first_rule_match(drivetrain.lower(), self.DRIVETRAIN_RULES, 0.5)
     
     def _count_features(self, features: Any) -> int:
         """Count number of features"""
@@ -273,32 +603,24 @@ class VehicleFeatureEngineer:
             return 0.5
         
         color = color.lower()
-        popular_colors = ['white', 'black', 'silver', 'gray', 'grey']
-        if any(c in color for c in popular_colors):
+        if any(c in color for c in self.POPULAR_COLORS):
             return 1.0
         else:
             return 0.7
     
-    def _add_location_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Add location-based features"""
-        # This is a simplified version - in production, you'd use geocoding
-        df['location_tier'] = df['location'].apply(self._categorize_location)
-        return df
-    
     def _categorize_location(self, location: str) -> str:
         """Categorize location into tiers"""
         if pd.isna(location):
             return 'unknown'
         
-        location = location.lower()
-        major_cities = ['new york', 'los angeles', 'chicago', 'houston', 'phoenix', 
-                       'philadelphia', 'san antonio', 'san diego', 'dallas', 'san jose',
-                       'austin', 'jacksonville', 'fort worth', 'columbus', 'san francisco',
-                       'charlotte', 'indianapolis', 'seattle', 'denver', 'washington']
+        position = self.geo_index.find(location)
+        if position >= 0:
+            return self.geo_index.metro_tier[position]
         
-        if any(city in location for city in major_cities):
+        location = location.lower()
+        if any(city in location for city in self.MAJOR_CITIES):
             return 'major_city'
-        elif any(x in location for x in ['county', 'suburb', 'township']):
+        elif any(x in location for x in self.SUBURBAN_KEYWORDS):
             return 'suburban'
         else:
             return 'rural'
@@ -309,10 +631,7 @@ class VehicleFeatureEngineer:
             return 'unknown'
         
         dealer_name = dealer_name.lower()
-        franchise_keywords = ['ford', 'toyota', 'honda', 'chevrolet', 'nissan', 'bmw', 
-                             'mercedes', 'audi', 'lexus', 'acura', 'infiniti', 'cadillac']
-        
-        if any(keyword in dealer_name for keyword in franchise_keywords):
+        if any(keyword in dealer_name for keyword in self.FRANCHISE_KEYWORDS):
             return 'franchise'
         else:
             return 'independent'
@@ -328,15 +647,114 @@ class VehicleFeatureEngineer:
         
         # Add categorical feature names
         for feature in categorical_features:
-            if feature in self.one_hot_encoders:
+            if feature in self.ordinal_encoders:
+                self.feature_names.append(feature)
+            elif feature in self.one_hot_encoders:
                 encoder = self.one_hot_encoders[feature]
                 feature_names = [f"{feature}_{cat}" for cat in encoder.categories_[0]]
                 self.feature_names.extend(feature_names)
         
         # Add TF-IDF feature names
-        if hasattr(self.tfidf_vectorizer, 'feature_names_out'):
+        if hasattr(self.tfidf_vectorizer, 'vocabulary_'):
             tfidf_features = [f"tfidf_{name}" for name in self.tfidf_vectorizer.get_feature_names_out()]
             self.feature_names.extend(tfidf_features)
+        elif isinstance(self.tfidf_vectorizer, HashingTextVectorizer):
+            self.feature_names.extend(f"text_hash_{i}" for i in range(self.tfidf_vectorizer.n_features))
+    
+    def get_feature_types(self) -> List[str]:
+        """XGBoost feature types per column: 'c' for category codes, 'q' otherwise"""
+        feature_types = ['q'] * len(self.NUMERICAL_FEATURES)
+        for feature in self.CATEGORICAL_FEATURES:
+            if feature in self.ordinal_encoders:
+                feature_types.append('c')
+            elif feature in self.one_hot_encoders:
+                feature_types.extend(['q'] * len(self.one_hot_encoders[feature].categories_[0]))
+        feature_types.extend(['q'] * self._text_width())
+        return feature_types
+    
+    def _text_width(self) -> int:
+        """Number of columns in the fitted text block"""
+        if isinstance(self.tfidf_vectorizer, HashingTextVectorizer):
+            return self.tfidf_vectorizer.n_features
+        if hasattr(self.tfidf_vectorizer, 'vocabulary_'):
+            return len(self.tfidf_vectorizer.vocabulary_)
+        return 0
+    
+    def is_fitted(self) -> bool:
+        """Whether fit_transform has been run"""
+        return hasattr(self.scaler, 'mean_')
+    
+    def get_version(self) -> str:
+        """Fingerprint of the fitted state and feature rules; feature rows are reusable within one version"""
+        # Age is relative to the current year, so rows expire when it changes
+        return f"{self.get_schema_version()}-{pd.Timestamp.now().year}"
+    
+    def get_schema_version(self) -> str:
+        """Fingerprint of the fitted state and feature rules; models trained within one version share columns"""
+        if self._state_hash is None:
+            self._state_hash = self._hash_fitted_state()
+        return self._state_hash
+    
+    def _hash_fitted_state(self) -> str:
+        """Hash everything transform() depends on besides the input row"""
+        digest = hashlib.sha1()
+        digest.update(repr((
+            self.FEATURE_VERSION, self.sparse_output, self.categorical_encoding, self.dtype,
+            self.NUMERICAL_FEATURES, self.CATEGORICAL_FEATURES,
+            self.LUXURY_BRANDS, self.MAINSTREAM_BRANDS, self.BODY_TYPE_RULES, self.FUEL_EFFICIENCY_RULES,
+            self.TRANSMISSION_RULES, self.DRIVETRAIN_RULES, self.POPULAR_COLORS, self.MAJOR_CITIES,
+            self.SUBURBAN_KEYWORDS, self.FRANCHISE_KEYWORDS
+        )).encode('utf-8'))
+        
+        if hasattr(self.scaler, 'mean_'):
+            digest.update(np.asarray(self.scaler.mean_, dtype=np.float64).tobytes())
+            digest.update(np.asarray(self.scaler.scale_, dtype=np.float64).tobytes())
+        for encoders in (self.one_hot_encoders, self.ordinal_encoders):
+            for feature in sorted(encoders):
+                categories = encoders[feature].categories_[0]
+                digest.update(repr((feature, list(categories))).encode('utf-8'))
+        if isinstance(self.tfidf_vectorizer, HashingTextVectorizer):
+            digest.update(repr(('hashing', self.tfidf_vectorizer.n_features)).encode('utf-8'))
+            if self.tfidf_vectorizer.idf_ is not None:
+                digest.update(np.asarray(self.tfidf_vectorizer.idf_, dtype=np.float64).tobytes())
+        elif hasattr(self.tfidf_vectorizer, 'vocabulary_'):
+            digest.update(repr(sorted(self.tfidf_vectorizer.vocabulary_.items())).encode('utf-8'))
+            digest.update(np.asarray(self.tfidf_vectorizer.idf_, dtype=np.float64).tobytes())
+        
+        return digest.hexdigest()[:16]
+    
+    def compile_row_transformer(self) -> 'RowFeatureTransformer':
+        """Build a single-row transformer from the fitted state"""
+        from .row_transformer import RowFeatureTransformer
+        return RowFeatureTransformer(self)
+    
+    def chunked_transformer(self, n_jobs: int = None, chunk_size: int = 20000,
+                            thread_budget: 'ThreadBudget' = None) -> 'ChunkedFeatureTransformer':
+        """Build a multi-process row-block transformer from the fitted state"""
+        from .parallel_transform import ChunkedFeatureTransformer
+        return ChunkedFeatureTransformer(self, n_jobs=n_jobs, chunk_size=chunk_size, thread_budget=thread_budget)
+    
+    @classmethod
+    def get_input_columns(cls) -> List[str]:
+        """Raw listing columns the features are computed from, e.g. to project loader queries"""
+        columns = []
+        for feature in cls.NUMERICAL_FEATURES + cls.CATEGORICAL_FEATURES + ['features']:
+            sources = cls._node_sources(feature) if feature in cls.FEATURE_NODES else (feature,)
+            columns += [column for column in sources if column not in columns]
+        return columns
+    
+    def get_segments(self, df: pd.DataFrame, segment_by: str) -> np.ndarray:
+        """Segment label (e.g. brand tier) of every row"""
+        if segment_by not in self.SEGMENT_FEATURES:
+            raise ValueError(f"Unknown segment feature: {segment_by}")
+        return self.compute_features(df, [segment_by])[segment_by].to_numpy(dtype=object)
+    
+    def get_segment(self, vehicle_data: Dict[str, Any], segment_by: str) -> str:
+        """Segment label of a single record, without building a frame"""
+        if segment_by not in self.SEGMENT_FEATURES:
+            raise ValueError(f"Unknown segment feature: {segment_by}")
+        method, column = self.SEGMENT_FEATURES[segment_by]
+        return getattr(self, method)(vehicle_data.get(column))
     
     def get_feature_names(self) -> List[str]:
         """Get list of feature names"""
@@ -0,0 +1,158 @@
+"""
+Versioned store of computed feature rows
+"""
+
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from scipy import sparse
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+class FeatureStore:
+    """Caches feature rows keyed by listing id, listing content hash and feature-engineer version
+
+    A stored row is reused only while the listing content and the fitted engineer are
+    unchanged; anything else is recomputed with the engineer and written back.
+    """
+
+    def __init__(self, db_path: str = 'data/vehicle_listings.db'):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self.stats = {'hits': 0, 'misses': 0}
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the feature row table"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS feature_rows (
+                    listing_id INTEGER NOT NULL,
+                    engineer_version TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    n_features INTEGER NOT NULL,
+                    indices BLOB NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at TIMESTAMP,
+                    PRIMARY KEY (listing_id, engineer_version)
+                )
+            ''')
+            conn.commit()
+
+    def transform(self, engineer, df: pd.DataFrame, cacheable: Optional[np.ndarray] = None,
+                  transformer: Optional[Any] = None) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Feature matrix for df using stored rows where possible
+
+        df needs 'id' and 'content_hash' columns. Rows without them, or with cacheable
+        False (e.g. values imputed from the rest of the batch), are always computed, by
+        transformer (e.g. a ChunkedFeatureTransformer) when given, else by the engineer.
+        """
+        n_rows = len(df)
+        if n_rows == 0:
+            return engineer.transform(df)
+
+        version = engineer.get_version()
+
+        listing_ids = df['id'].to_numpy() if 'id' in df.columns else np.full(n_rows, None, dtype=object)
+        hashes = df['content_hash'].to_numpy() if 'content_hash' in df.columns else np.full(n_rows, None, dtype=object)
+        keyed = pd.notna(listing_ids) & pd.notna(hashes)
+        if cacheable is not None:
+            keyed &= np.asarray(cacheable, dtype=bool)
+
+        stored = self._load_rows([int(listing_id) for listing_id in listing_ids[keyed]], version)
+
+        rows: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * n_rows
+        for position in np.flatnonzero(keyed):
+            entry = stored.get(int(listing_ids[position]))
+            if entry is not None and entry[0] == hashes[position]:
+                rows[position] = (entry[1], entry[2])
+
+        missing = [position for position in range(n_rows) if rows[position] is None]
+        self.stats['hits'] += n_rows - len(missing)
+        self.stats['misses'] += len(missing)
+
+        n_features = None
+        if missing:
+            X_missing = sparse.csr_matrix((transformer or engineer).transform(df.iloc[missing]))
+            n_features = X_missing.shape[1]
+
+            to_store = []
+            for i, position in enumerate(missing):
+                start, end = X_missing.indptr[i], X_missing.indptr[i + 1]
+                rows[position] = (X_missing.indices[start:end], X_missing.data[start:end])
+                if keyed[position]:
+                    to_store.append((int(listing_ids[position]), hashes[position], rows[position]))
+            self._store_rows(to_store, version, n_features)
+
+        if n_features is None:
+            n_features = next(iter(stored.values()))[3] if stored else 0
+
+        self.logger.info(f"Feature store: {n_rows - len(missing)} reused, {len(missing)} computed (version {version})")
+        X = self._assemble(rows, n_features).astype(engineer.dtype, copy=False)
+        return X if engineer.sparse_output else X.toarray()
+
+    def _assemble(self, rows: List[Tuple[np.ndarray, np.ndarray]], n_features: int) -> sparse.csr_matrix:
+        """Stack per-row indices and values into one CSR matrix, keeping explicit zeros"""
+        lengths = np.array([len(indices) for indices, _ in rows], dtype=np.int64)
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.concatenate([indices for indices, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+        data = np.concatenate([data for _, data in rows]) if rows else np.empty(0, dtype=np.float64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), n_features))
+
+    def _load_rows(self, listing_ids: List[int], version: str) -> Dict[int, Tuple[str, np.ndarray, np.ndarray, int]]:
+        """Stored rows of one engineer version by listing id"""
+        rows = {}
+        unique_ids = list(dict.fromkeys(listing_ids))
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(unique_ids), 500):
+                chunk = unique_ids[start:start + 500]
+                cursor = conn.execute(f'''
+                    SELECT listing_id, content_hash, n_features, indices, data FROM feature_rows
+                    WHERE engineer_version = ? AND listing_id IN ({','.join('?' * len(chunk))})
+                ''', [version] + chunk)
+                for listing_id, content_hash, n_features, indices, data in cursor.fetchall():
+                    rows[listing_id] = (
+                        content_hash,
+                        np.frombuffer(indices, dtype=np.int32),
+                        np.frombuffer(data, dtype=np.float64),
+                        n_features
+                    )
+        return rows
+
+    def _store_rows(self, rows: List[Tuple[int, str, Tuple[np.ndarray, np.ndarray]]],
+                    version: str, n_features: int) -> None:
+        """Upsert computed rows for one engineer version"""
+        if not rows:
+            return
+
+        now = datetime.now()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO feature_rows
+                (listing_id, engineer_version, content_hash, n_features, indices, data, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (listing_id, version, content_hash, n_features,
+                 np.asarray(indices, dtype=np.int32).tobytes(), np.asarray(data, dtype=np.float64).tobytes(), now)
+                for listing_id, content_hash, (indices, data) in rows
+            ])
+            conn.commit()
+
+    def prune(self, keep_version: str) -> int:
+        """Delete rows of every other engineer version"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('DELETE FROM feature_rows WHERE engineer_version != ?', (keep_version,))
+            conn.commit()
+            deleted = cursor.rowcount
+
+        self.logger.info(f"Pruned {deleted} feature rows from old engineer versions")
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since creation"""
+        total = self.stats['hits'] + self.stats['misses']
+        return dict(self.stats, hit_rate=self.stats['hits'] / total if total else 0.0)
@@ -0,0 +1,138 @@
+"""
+Offline geo lookup index for listing locations
+"""
+
+import re
+import logging
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+EARTH_RADIUS_MILES = 3958.8
+
+def haversine_miles(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> np.ndarray:
+    """Great-circle distance in miles, vectorized over any broadcastable inputs"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+class GeoIndex:
+    """ZIP and city -> latitude/longitude/metro tier table held in hash indexes
+
+    The table is a CSV with zip, city, state, latitude, longitude, metro and
+    metro_tier columns. The bundled file covers the major metros the scrapers search;
+    a full ZIP gazetteer with the same columns can be loaded instead.
+    """
+
+    DEFAULT_PATH = Path(__file__).parent / 'data' / 'us_places.csv'
+    COLUMNS = ['zip', 'city', 'state', 'latitude', 'longitude', 'metro', 'metro_tier']
+
+    ZIP_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\b')
+    CITY_STATE_PATTERN = re.compile(r"^\s*([a-z][a-z .'-]*?)\s*,\s*([a-z]{2})\b")
+
+    # Loaded tables by path, so each file is read once per process
+    _instances: Dict[str, 'GeoIndex'] = {}
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        table = pd.read_csv(self.path, dtype={'zip': str})
+        missing_columns = [column for column in self.COLUMNS if column not in table.columns]
+        if missing_columns:
+            raise ValueError(f"Geo table {self.path} is missing columns: {missing_columns}")
+
+        self.latitude = table['latitude'].to_numpy(dtype=np.float64)
+        self.longitude = table['longitude'].to_numpy(dtype=np.float64)
+        self.metro = table['metro'].to_numpy(dtype=object)
+        self.metro_tier = table['metro_tier'].to_numpy(dtype=object)
+
+        # Row position by ZIP, by "city, st", and by city alone where the name is unambiguous
+        self.zip_index = {}
+        self.city_state_index = {}
+        city_positions = {}
+        for position, (zip_code, city, state) in enumerate(zip(table['zip'], table['city'], table['state'])):
+            if isinstance(zip_code, str):
+                self.zip_index.setdefault(zip_code.zfill(5), position)
+            city_key = self._normalize(city)
+            self.city_state_index.setdefault(f"{city_key}, {state.lower()}", position)
+            city_positions.setdefault(city_key, set()).add(position)
+        self.city_index = {city: positions.pop() for city, positions in city_positions.items() if len(positions) == 1}
+
+        self.logger.info(f"Loaded {len(table)} places from {self.path}")
+
+    @classmethod
+    def default(cls, path: Optional[Union[str, Path]] = None) -> 'GeoIndex':
+        """Shared index for a table path, loaded on first use"""
+        key = str(Path(path) if path else cls.DEFAULT_PATH)
+        if key not in cls._instances:
+            cls._instances[key] = cls(key)
+        return cls._instances[key]
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Lowercase with periods dropped and whitespace collapsed"""
+        return ' '.join(text.lower().replace('.', '').split())
+
+    def find(self, location: Any) -> int:
+        """Table position of one location string, -1 when not found
+
+        Tries a 5-digit ZIP, then "City, ST", then an unambiguous city name.
+        """
+        if not isinstance(location, str):
+            return -1
+
+        zip_match = self.ZIP_PATTERN.search(location)
+        if zip_match and zip_match.group(1) in self.zip_index:
+            return self.zip_index[zip_match.group(1)]
+
+        text = self._normalize(location)
+        city_state = self.CITY_STATE_PATTERN.match(text)
+        if city_state:
+            position = self.city_state_index.get(f"{city_state.group(1)}, {city_state.group(2)}")
+            if position is not None:
+                return position
+            return self.city_index.get(city_state.group(1), -1)
+
+        return self.city_index.get(text, -1)
+
+    def lookup(self, locations: pd.Series) -> np.ndarray:
+        """Table positions for a column of locations, -1 where not found
+
+        Each distinct string is resolved once and broadcast back through factor codes.
+        """
+        codes, uniques = pd.factorize(locations)
+        lookup = np.fromiter((self.find(location) for location in uniques), dtype=np.int64, count=len(uniques))
+        return np.append(lookup, -1)[codes]
+
+    def locate(self, location: str) -> Optional[Tuple[float, float]]:
+        """(latitude, longitude) of a ZIP or place name, None when not found"""
+        position = self.find(location)
+        if position < 0:
+            return None
+        return float(self.latitude[position]), float(self.longitude[position])
+
+    def take(self, positions: np.ndarray, values: np.ndarray, missing: Any) -> np.ndarray:
+        """Per-row values of a table column, with `missing` where positions are -1"""
+        positions = np.asarray(positions)
+        result = np.full(len(positions), missing, dtype=object if values.dtype == object else np.float64)
+        found = positions >= 0
+        result[found] = values[positions[found]]
+        return result
+
+    def distances(self, locations: pd.Series, center: Tuple[float, float]) -> np.ndarray:
+        """Miles from center for each location, NaN where not found"""
+        positions = self.lookup(locations)
+        return haversine_miles(self.take(positions, self.latitude, np.nan), self.take(positions, self.longitude, np.nan),
+                               center[0], center[1])
+
+    def within_radius(self, locations: pd.Series, center: Union[str, Tuple[float, float]],
+                      radius_miles: float) -> np.ndarray:
+        """Boolean mask of locations within radius_miles of a center place or (lat, lon)"""
+        if isinstance(center, str):
+            resolved = self.locate(center)
+            if resolved is None:
+                raise ValueError(f"Unknown search center: {center}")
+            center = resolved
+        return self.distances(locations, center) <= radius_miles
@@ -0,0 +1,164 @@
+"""
+Budgeted successive-halving hyperparameter search for XGBoost
+"""
+
+import math
+import time
+import itertools
+import logging
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error
+from .dmatrix_cache import QuantileDMatrixCache, train_booster, predict_best
+
+class SuccessiveHalvingSearch:
+    """Successive halving over boosting rounds and training-data fraction
+
+    A random sample of candidates from the parameter space is trained on a small data
+    fraction with few trees; the best 1/eta move to the next rung with eta times more
+    of both, until one candidate trains on all the data. Every trial stops early on a
+    held-out validation split, and the search stops starting trials once the time
+    budget is spent; the first trial always runs, so there is a best candidate even
+    with no budget. Each rung's rows are quantized once and shared by all its trials.
+    """
+
+    DEFAULT_PARAM_SPACE = {
+        'max_depth': [6, 8, 10],
+        'learning_rate': [0.05, 0.1, 0.15],
+        'subsample': [0.7, 0.8, 0.9],
+        'colsample_bytree': [0.7, 0.8, 0.9]
+    }
+
+    def __init__(self, estimator_factory: Callable[..., Any], param_space: Optional[Dict[str, List[Any]]] = None,
+                 n_candidates: int = 27, eta: int = 3, max_estimators: int = 1200, min_estimators: int = 100,
+                 min_data_fraction: float = 0.1, early_stopping_rounds: int = 50,
+                 budget_seconds: Optional[float] = None, validation_fraction: float = 0.2, random_state: int = 42,
+                 seed_candidates: Optional[List[Dict[str, Any]]] = None):
+        self.estimator_factory = estimator_factory
+        self.param_space = param_space or self.DEFAULT_PARAM_SPACE
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.max_estimators = max_estimators
+        self.min_estimators = min_estimators
+        self.min_data_fraction = min_data_fraction
+        self.early_stopping_rounds = early_stopping_rounds
+        self.budget_seconds = budget_seconds  # None searches all rungs
+        self.validation_fraction = validation_fraction
+        self.random_state = random_state
+        self.seed_candidates = seed_candidates or []  # Always evaluated, e.g. the previous best params
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.trace = []
+        self.best_params_ = None
+        self.best_score_ = None
+        self.report = {}
+
+    def fit(self, X: Any, y: np.ndarray) -> Dict[str, Any]:
+        """Run the search and return the best parameters found"""
+        start = time.perf_counter()
+        rng = np.random.default_rng(self.random_state)
+
+        fit_rows, val_rows = train_test_split(
+            np.arange(X.shape[0]), test_size=self.validation_fraction, random_state=self.random_state
+        )
+        # One row order for every rung, so each rung's data contains the previous rung's
+        order = fit_rows[rng.permutation(len(fit_rows))]
+        
+        y = np.asarray(y)
+        matrices = QuantileDMatrixCache.for_estimator(self.estimator_factory(), X, y)
+        dval = matrices.eval_matrix(val_rows)
+
+        candidates = self._sample_candidates(rng)
+        n_rungs = int(math.floor(math.log(len(candidates), self.eta) + 1e-9)) + 1
+
+        self.trace = []
+        survivors = list(range(len(candidates)))
+        rung_scores = {}
+        budget_exhausted = False
+
+        for rung in range(n_rungs):
+            resource = self.eta ** (rung - (n_rungs - 1))
+            data_fraction = max(self.min_data_fraction, resource)
+            n_estimators = max(self.min_estimators, int(round(self.max_estimators * resource)))
+            rows = np.sort(order[:max(1, int(round(len(order) * data_fraction)))])
+            dtrain = matrices.train_matrix(rows)
+
+            scores = {}
+            for candidate in survivors:
+                if (self.budget_seconds is not None and self.trace
+                        and time.perf_counter() - start >= self.budget_seconds):
+                    budget_exhausted = True
+                    break
+                scores[candidate] = self._run_trial(
+                    rung, candidate, candidates[candidate], dtrain, dval, data_fraction, n_estimators
+                )
+
+            if scores:
+                rung_scores = scores
+            if budget_exhausted or rung == n_rungs - 1:
+                break
+
+            n_keep = max(1, len(survivors) // self.eta)
+            survivors = sorted(scores, key=scores.get)[:n_keep]
+
+        # Scores from different rungs are not comparable, so the best of the highest rung reached wins
+        best = min(rung_scores, key=rung_scores.get)
+        self.best_params_ = candidates[best]
+        self.best_score_ = rung_scores[best]
+
+        elapsed = time.perf_counter() - start
+        self.report = {
+            'strategy': 'successive_halving',
+            'trials': len(self.trace),
+            'candidates': len(candidates),
+            'rungs_completed': max(trial['rung'] for trial in self.trace) + 1,
+            'seconds': round(elapsed, 2),
+            'trials_per_second': round(len(self.trace) / elapsed, 3) if elapsed > 0 else 0.0,
+            'budget_exhausted': budget_exhausted,
+            'best_params': self.best_params_,
+            'best_validation_mae': round(float(self.best_score_), 2)
+        }
+        self.logger.info(f"Search finished: {self.report['trials']} trials in {self.report['seconds']:.1f}s "
+                         f"({self.report['trials_per_second']:.2f} trials/s), best MAE {self.best_score_:.2f} "
+                         f"with {self.best_params_}")
+        return self.best_params_
+
+    def _sample_candidates(self, rng: np.random.Generator) -> List[Dict[str, Any]]:
+        """Seed candidates followed by random distinct parameter combinations from the space"""
+        names = list(self.param_space)
+        candidates = [{name: seed[name] for name in names if name in seed} for seed in self.seed_candidates]
+        grid = [combination for combination in itertools.product(*(self.param_space[name] for name in names))
+                if dict(zip(names, combination)) not in candidates]
+        
+        n_random = max(0, min(self.n_candidates - len(candidates), len(grid)))
+        picks = rng.choice(len(grid), size=n_random, replace=False)
+        candidates += [{name: value.item() if hasattr(value, 'item') else value
+                        for name, value in zip(names, grid[pick])} for pick in picks]
+        return candidates
+
+    def _run_trial(self, rung: int, candidate: int, params: Dict[str, Any], dtrain: Any, dval: Any,
+                   data_fraction: float, n_estimators: int) -> float:
+        """Fit one candidate with early stopping and return its validation MAE"""
+        trial_start = time.perf_counter()
+        estimator = self.estimator_factory(
+            **params, n_estimators=n_estimators,
+            early_stopping_rounds=self.early_stopping_rounds, eval_metric='mae'
+        )
+        booster = train_booster(estimator, dtrain, dval)
+        mae = float(mean_absolute_error(dval.get_label(), predict_best(booster, dval)))
+
+        trial = {
+            'rung': rung,
+            'candidate': candidate,
+            'params': params,
+            'data_fraction': round(data_fraction, 4),
+            'n_estimators': n_estimators,
+            'best_iteration': int(booster.best_iteration),
+            'mae': round(mae, 2),
+            'seconds': round(time.perf_counter() - trial_start, 3)
+        }
+        self.trace.append(trial)
+        self.logger.info(f"Trial {len(self.trace)} rung {rung}: {dtrain.num_row()} rows, {n_estimators} trees "
+                         f"(best {trial['best_iteration']}), MAE {mae:.2f} in {trial['seconds']:.2f}s - {params}")
+        return mae
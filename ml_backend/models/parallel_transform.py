@@ -0,0 +1,133 @@
+"""
+Chunked multi-process feature transformation
+"""
+
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy import sparse
+from threadpoolctl import threadpool_limits
+from typing import List, Any, Optional, Iterable, Iterator, Tuple, Union
+from .thread_budget import ThreadBudget
+
+# Fitted engineer of the current worker process, set once by the pool initializer
+_worker_engineer = None
+_worker_thread_limits = None
+
+def _init_worker(engineer_bytes: bytes, threads: int) -> None:
+    """Unpickle the fitted engineer once per worker instead of once per chunk and cap its native threads"""
+    global _worker_engineer, _worker_thread_limits
+    _worker_thread_limits = threadpool_limits(limits=threads)
+    _worker_engineer = pickle.loads(engineer_bytes)
+    _worker_engineer.logger.setLevel(logging.WARNING)
+
+def _transform_chunk(chunk: pd.DataFrame) -> Union[np.ndarray, sparse.csr_matrix]:
+    """Transform one row block and return the matrix"""
+    return _worker_engineer.transform(chunk)
+
+def _transform_chunk_into(task: Tuple[pd.DataFrame, str, Tuple[int, int], int]) -> int:
+    """Transform one row block and write it into the shared output array at its row offset"""
+    chunk, shm_name, shape, start = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        output = np.ndarray(shape, dtype=_worker_engineer.dtype, buffer=shm.buf)
+        output[start:start + len(chunk)] = _worker_engineer.transform(chunk)
+        del output
+    finally:
+        shm.close()
+    return len(chunk)
+
+class ChunkedFeatureTransformer:
+    """Applies a fitted VehicleFeatureEngineer to row blocks across a process pool
+
+    Every transform step is row-local once the engineer is fitted, so row blocks are
+    independent and their results equal VehicleFeatureEngineer.transform() on the whole
+    frame. Dense blocks are written straight into one shared-memory output array;
+    sparse blocks are returned and stacked.
+    """
+
+    def __init__(self, engineer, n_jobs: Optional[int] = None, chunk_size: int = 20000,
+                 parallel_min_rows: int = 50000, thread_budget: Optional[ThreadBudget] = None):
+        if not engineer.is_fitted():
+            raise ValueError("Feature engineer must be fitted before chunked transforms")
+
+        self.engineer = engineer
+        self.thread_budget = thread_budget or ThreadBudget()
+        # Processes x BLAS/OpenMP threads per process stay within the budget's cores
+        self.n_jobs, self.worker_threads = self.thread_budget.transform_split(self.thread_budget.total_cores, n_jobs)
+        self.chunk_size = chunk_size
+        self.parallel_min_rows = parallel_min_rows  # Below this, transform stays in-process
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._engineer_bytes = None
+        self._engineer_version = None
+
+    def transform(self, df: pd.DataFrame) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Transform a frame, splitting it into row blocks across worker processes"""
+        if self.n_jobs <= 1 or len(df) < self.parallel_min_rows or 'features' not in df.columns:
+            return self.engineer.transform(df)
+
+        chunks = self._split(df)
+        workers = min(self.n_jobs, len(chunks))
+        self.logger.info(f"Transforming {len(df)} rows in {len(chunks)} chunks across {workers} processes")
+
+        with self._pool(workers) as executor:
+            if self.engineer.sparse_output:
+                return sparse.vstack(list(executor.map(_transform_chunk, chunks)), format='csr')
+            return self._transform_dense(executor, chunks, len(df))
+
+    def transform_stream(self, chunks: Iterable[pd.DataFrame]) -> Iterator[Tuple[pd.DataFrame, Union[np.ndarray, sparse.csr_matrix]]]:
+        """Transform frames as they arrive (e.g. pd.read_sql_query with chunksize)
+
+        Yields (chunk, matrix) pairs in input order. At most n_jobs chunks are in
+        flight, so memory stays bounded by the chunk size however long the input is.
+        """
+        if self.n_jobs <= 1:
+            for chunk in chunks:
+                yield chunk, self.engineer.transform(chunk)
+            return
+
+        with self._pool(self.n_jobs) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, executor.submit(_transform_chunk, chunk)))
+                if len(pending) >= self.n_jobs:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+
+    def _transform_dense(self, executor: ProcessPoolExecutor, chunks: List[pd.DataFrame],
+                         n_rows: int) -> np.ndarray:
+        """Have workers fill one shared output array so results are not pickled back"""
+        shape = (n_rows, len(self.engineer.get_feature_types()))
+        dtype = np.dtype(self.engineer.dtype)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * shape[1] * dtype.itemsize))
+        try:
+            offsets = np.concatenate([[0], np.cumsum([len(chunk) for chunk in chunks])[:-1]])
+            tasks = [(chunk, shm.name, shape, int(start)) for chunk, start in zip(chunks, offsets)]
+            list(executor.map(_transform_chunk_into, tasks))
+
+            # Copy out so the segment can be released
+            return np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _split(self, df: pd.DataFrame) -> List[pd.DataFrame]:
+        """Row blocks of at most chunk_size rows, enough for every worker to get one"""
+        chunk_size = min(self.chunk_size, max(1, -(-len(df) // self.n_jobs)))
+        return [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+
+    def _pool(self, workers: int) -> ProcessPoolExecutor:
+        """Process pool whose workers each hold a copy of the fitted engineer"""
+        version = self.engineer.get_version()
+        if self._engineer_version != version:
+            self._engineer_bytes = pickle.dumps(self.engineer)
+            self._engineer_version = version
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(self._engineer_bytes, self.worker_threads))
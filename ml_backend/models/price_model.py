@@ -6,22 +6,111 @@ import pandas as pd
 import numpy as np
 import joblib
 import logging
-from typing import Dict, List, Any, Optional, Tuple
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, Tuple, Union
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, KFold, ParameterGrid
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import xgboost as xgb
 from xgboost import XGBRegressor
-import sqlite3
+from scipy import sparse
 from datetime import datetime, timedelta
+from pathlib import Path
 from .feature_engineering import VehicleFeatureEngineer
+from .feature_store import FeatureStore
+from .hyperparameter_search import SuccessiveHalvingSearch
+from .dmatrix_cache import QuantileDMatrixCache, train_booster, predict_best
+from .thread_budget import ThreadBudget
+from .external_memory import FeatureChunkIterator, external_memory_matrix
+from .training_loader import TrainingDataLoader
+from .stage_profiler import StageProfiler
+from .segmented_model import SegmentedEnsemble
+from .tuning_store import TuningStore, TuningPolicy, data_profile
+from .schema import fill_missing_category, matrix_memory_bytes, memory_stage
+
+# Feature matrices are CSR unless the feature engineer was built with sparse_output=False
+FeatureMatrix = Union[np.ndarray, sparse.csr_matrix]
 
 class VehiclePriceModel:
     """XGBoost-based vehicle pricing model with real-time predictions"""
     
-    def __init__(self, model_path: str = 'models/vehicle_price_model.pkl'):
+    # Categorical columns filled with 'unknown' before feature engineering
+    CATEGORICAL_FILL_COLUMNS = ['make', 'model', 'body_type', 'fuel_type', 'transmission', 'drivetrain']
+    
+    # Exhaustive search space of the 'grid' strategy
+    GRID_PARAM_SPACE = {
+        'max_depth': [6, 8, 10],
+        'learning_rate': [0.05, 0.1, 0.15],
+        'n_estimators': [800, 1000, 1200],
+        'subsample': [0.7, 0.8, 0.9],
+        'colsample_bytree': [0.7, 0.8, 0.9]
+    }
+    # Tree cap of tuned models that do not tune n_estimators; early stopping picks the count
+    SEARCH_MAX_ESTIMATORS = 1200
+    
+    # Listing columns read for training besides the feature engineer's inputs
+    TRAINING_KEY_COLUMNS = ['id', 'vin', 'price', 'content_hash']
+    
+    # Model settings (config.MODEL_CONFIG keys) and the constructor arguments they set
+    CONFIG_OPTIONS = {
+        'categorical_encoding': 'categorical_encoding',
+        'text_vectorizer': 'text_vectorizer',
+        'feature_jobs': 'feature_jobs',
+        'feature_dtype': 'feature_dtype',
+        'compact_dtypes': 'compact_dtypes',
+        'search_strategy': 'search_strategy',
+        'search_budget_seconds': 'search_budget_seconds',
+        'tuning_policy': 'tuning_policy',
+        'thread_budget': 'thread_budget',
+        'training_window_days': 'training_window_days',
+        'load_chunk_size': 'load_chunk_size',
+        'segmented_model': 'segmented'
+    }
+    
+    def __init__(self, model_path: str = 'models/vehicle_price_model.pkl', sparse_features: bool = True,
+                 feature_store_path: Optional[str] = None, categorical_encoding: str = 'onehot',
+                 text_vectorizer: str = 'tfidf', feature_jobs: int = 1, feature_dtype: str = 'float32',
+                 compact_dtypes: bool = True, search_strategy: str = 'halving',
+                 search_budget_seconds: Optional[float] = None, tuning_store_path: Optional[str] = None,
+                 tuning_policy: Optional[Dict[str, Any]] = None, thread_budget: Optional[Dict[str, Any]] = None,
+                 training_window_days: float = 30, load_chunk_size: int = 50000,
+                 segmented: Optional[Dict[str, Any]] = None):
         self.model = None
-        self.feature_engineer = VehicleFeatureEngineer()
+        self.feature_engineer = VehicleFeatureEngineer(sparse_output=sparse_features,
+                                                       categorical_encoding=categorical_encoding,
+                                                       text_vectorizer=text_vectorizer,
+                                                       dtype=feature_dtype)
+        self.row_transformer = None  # Compiled from the fitted feature engineer for single predictions
+        self.feature_store = FeatureStore(feature_store_path) if feature_store_path else None
+        self.feature_jobs = feature_jobs  # Worker processes for transforms of large frames
+        # Cores shared by search workers, XGBoost threads and transform processes
+        self.thread_budget = ThreadBudget(**(thread_budget or {}))
+        self.chunked_transformer = None
+        self.compact_dtypes = compact_dtypes  # Category strings and downcast integers in loaded frames
+        self.training_window_days = training_window_days  # Default scrape-time window of training loads
+        self.load_chunk_size = load_chunk_size  # Rows per chunk read from SQLite
+        self.memory_report = {}  # Memory before/after per stage of the last load and prepare
+        self.profiler = StageProfiler()  # Wall/CPU time and peak RSS per training stage; reset() per run
+        # 'halving' runs a budgeted successive-halving search, 'grid' the exhaustive 5-fold grid search
+        self.search_strategy = search_strategy
+        self.search_budget_seconds = search_budget_seconds
+        self.search_report = {}
+        # Past search results, reused across retrains while the data stays close
+        self.tuning_store = TuningStore(tuning_store_path) if tuning_store_path else None
+        self.tuning_policy = TuningPolicy(**(tuning_policy or {}))
         self.model_path = model_path
         self.model_metrics = {}
+        # Feature engineer schema the booster was trained on; incremental updates require it unchanged
+        self.feature_schema = None
+        self.incremental_history = []
+        # Per-segment sub-models (SegmentedEnsemble options, e.g. {'segment_by': 'body_type_category'}); None trains one global model
+        self.segment_options = segmented
+        self.segment_by = segmented.get('segment_by', 'brand_tier') if segmented is not None else None
+        self.segments = None  # Trained SegmentedEnsemble, routed to by predictions
+        self._prepared_segments = None  # Segment labels of the last prepare_data() rows
+        self._cv_matrices = None  # Quantized fold matrices of the last cross_validate() input
         self.logger = logging.getLogger(self.__class__.__name__)
         
         # XGBoost parameters
@@ -38,112 +127,497 @@ class VehiclePriceModel:
             'eval_metric': 'mae'
         }
     
-    def load_training_data(self, data_source: str = 'data/vehicle_listings.db') -> pd.DataFrame:
-        """Load training data from database"""
+    @classmethod
+    def from_config(cls, model_path: str, config: Dict[str, Any], **kwargs: Any) -> 'VehiclePriceModel':
+        """Model built from the CONFIG_OPTIONS settings in config; keyword arguments take precedence"""
+        options = {argument: config[key] for key, argument in cls.CONFIG_OPTIONS.items() if key in config}
+        return cls(model_path, **dict(options, **kwargs))
+    
+    def training_loader(self, data_source: str = 'data/vehicle_listings.db') -> TrainingDataLoader:
+        """Chunked loader reading only the columns training uses"""
+        columns = self.feature_engineer.get_input_columns() + self.TRAINING_KEY_COLUMNS
+        return TrainingDataLoader(data_source, columns=columns, chunk_size=self.load_chunk_size,
+                                  compact_dtypes=self.compact_dtypes, window_days=self.training_window_days)
+    
+    def load_training_data(self, data_source: str = 'data/vehicle_listings.db', since: Optional[datetime] = None,
+                           start: Optional[datetime] = None, end: Optional[datetime] = None,
+                           sample_ratio: float = 1.0) -> pd.DataFrame:
+        """Load training data from database
+        
+        Rows scraped between start and end (default: the last training_window_days) are
+        read chunk by chunk with only the training columns. With `since` (UTC) only
+        listings inserted or changed after it are loaded; sample_ratio keeps a stable
+        share of the listings.
+        """
         try:
-            conn = sqlite3.connect(data_source)
-            
-            query = """
-            SELECT * FROM vehicle_listings 
-            WHERE price IS NOT NULL 
-            AND price > 1000 
-            AND price < 200000
-            AND scraped_at > datetime('now', '-30 days')
-            """
+            loader = self.training_loader(data_source)
+            with self.profiler.stage('load') as stage:
+                df = loader.load(start=start, end=end, since=since, sample_ratio=sample_ratio)
+                stage['rows'] = len(df)
             
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            stats = loader.last_load_stats
+            self._record_memory_stage('training_frame', stats['raw_bytes'], stats['loaded_bytes'])
             
-            self.logger.info(f"Loaded {len(df)} training samples")
+            self.logger.info(f"Loaded {len(df)} training samples in {stats['seconds']:.2f}s")
             return df
             
         except Exception as e:
             self.logger.error(f"Error loading training data: {str(e)}")
             return pd.DataFrame()
     
-    def prepare_data(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for training"""
+    def iter_training_features(self, data_source: str = 'data/vehicle_listings.db',
+                               chunk_size: int = 20000) -> Iterator[Tuple[FeatureMatrix, np.ndarray]]:
+        """Stream training rows from the database through the fitted engineer chunk by chunk
+        
+        Rows are read with a cursor-backed chunked query and transformed across
+        feature_jobs processes, so the raw frame is never held in memory at once.
+        Missing values are filled with per-chunk medians.
+        """
+        if not self.feature_engineer.is_fitted():
+            raise ValueError("Feature engineer not fitted. Call prepare_data() first.")
+        
+        transformer = self.feature_engineer.chunked_transformer(n_jobs=self.feature_jobs, chunk_size=chunk_size,
+                                                                thread_budget=self.thread_budget)
+        loader = self.training_loader(data_source)
+        loader.chunk_size = chunk_size
+        chunks = (self._handle_missing_values(chunk) for chunk in loader.iter_frames())
+        for chunk, X in transformer.transform_stream(chunks):
+            yield X, chunk['price'].values
+    
+    def prepare_data(self, df: pd.DataFrame, refit_features: bool = True) -> Tuple[FeatureMatrix, np.ndarray]:
+        """Prepare data for training
+        
+        With refit_features=False an already fitted feature engineer is reused, so
+        unchanged listings are served from the feature store instead of recomputed.
+        """
         # Remove duplicates based on VIN
-        df_clean = df.drop_duplicates(subset=['vin'], keep='last')
+        with self.profiler.stage('dedup', rows=len(df)):
+            df_clean = df.drop_duplicates(subset=['vin'], keep='last')
+        
+        # Rows whose year or mileage get a batch median cannot reuse stored features
+        imputed = df_clean[[col for col in ['year', 'mileage'] if col in df_clean.columns]].isna().any(axis=1)
         
         # Handle missing values
-        df_clean = self._handle_missing_values(df_clean)
+        with self.profiler.stage('missing_values', rows=len(df_clean)):
+            df_clean = self._handle_missing_values(df_clean)
         
         # Remove outliers
-        df_clean = self._remove_outliers(df_clean)
+        with self.profiler.stage('outliers', rows=len(df_clean)):
+            df_clean = self._remove_outliers(df_clean)
         
         # Feature engineering
-        X = self.feature_engineer.fit_transform(df_clean)
+        if refit_features or not self.feature_engineer.is_fitted():
+            with self.profiler.stage('feature_fit', rows=len(df_clean)):
+                X = self.feature_engineer.fit_transform(df_clean)
+                self.row_transformer = self._compile_row_transformer(df_clean)
+        else:
+            with self.profiler.stage('feature_transform', rows=len(df_clean)):
+                X = self._transform_features(df_clean, cacheable=~imputed.loc[df_clean.index].to_numpy())
         y = df_clean['price'].values
+        self._prepared_segments = (self.feature_engineer.get_segments(df_clean, self.segment_by)
+                                   if self.segment_by else None)
+        
+        # Compared with the same matrix holding float64 values
+        matrix_bytes = matrix_memory_bytes(X)
+        value_bytes = X.data.nbytes if sparse.issparse(X) else X.nbytes
+        float64_bytes = matrix_bytes - value_bytes + value_bytes // X.dtype.itemsize * 8
+        self._record_memory_stage('feature_matrix', float64_bytes, matrix_bytes)
         
-        self.logger.info(f"Data prepared. Features: {X.shape[1]}, Samples: {X.shape[0]}")
+        self.logger.info(f"Data prepared. Features: {X.shape[1]}, Samples: {X.shape[0]}, "
+                         f"Matrix: {matrix_bytes / 1024 ** 2:.1f} MB ({'sparse' if sparse.issparse(X) else 'dense'}, {X.dtype})")
         return X, y
     
-    def train(self, X: np.ndarray, y: np.ndarray, optimize_params: bool = True) -> Dict[str, float]:
-        """Train the XGBoost model"""
+    def _record_memory_stage(self, stage: str, before_bytes: int, after_bytes: int) -> None:
+        """Add one stage to the memory report and log its savings"""
+        self.memory_report[stage] = memory_stage(before_bytes, after_bytes)
+        entry = self.memory_report[stage]
+        self.logger.info(f"Memory {stage}: {entry['before_mb']:.1f} MB -> {entry['after_mb']:.1f} MB "
+                         f"({entry['saved_pct']:.1f}% saved)")
+    
+    def train(self, X: FeatureMatrix, y: np.ndarray, optimize_params: bool = True,
+              segments: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Train the XGBoost model
+        
+        In segmented mode sub-models are trained on top of the global model, for the
+        segment labels of X's rows (default: those of the last prepare_data() call).
+        """
         self.logger.info("Starting model training...")
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        if self.segment_by:
+            segments = segments if segments is not None else self._prepared_segments
+            if segments is None or len(segments) != len(y):
+                self.logger.warning("No segment labels for these rows, training the global model only")
+                segments = None
+        else:
+            segments = None
+        
+        # Split data 70/10/20: early stopping and segment selection use the validation rows,
+        # so the test rows behind the reported metrics are never seen during training
+        if segments is not None:
+            X_train, X_test, y_train, y_test, segments_train, segments_test = train_test_split(
+                X, y, np.asarray(segments, dtype=object), test_size=0.2, random_state=42
+            )
+            X_train, X_val, y_train, y_val, segments_train, segments_val = train_test_split(
+                X_train, y_train, segments_train, test_size=0.125, random_state=42
+            )
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42
+            )
+            X_train, X_val, y_train, y_val = train_test_split(
+                X_train, y_train, test_size=0.125, random_state=42
+            )
+            segments_val = segments_test = None
         
         # Optimize hyperparameters if requested
         if optimize_params:
-            self.model = self._optimize_hyperparameters(X_train, y_train)
+            with self.profiler.stage('search', rows=len(y_train)):
+                self.model = self._optimize_hyperparameters(X_train, y_train)
         else:
-            self.model = XGBRegressor(**self.xgb_params)
+            self.model = self._xgb_estimator(**self.xgb_params)
         
         # Train the model
-        self.model.fit(
-            X_train, y_train,
-            eval_set=[(X_test, y_test)],
-            verbose=False
-        )
+        with self.profiler.stage('final_fit', rows=len(y_train)):
+            self.model.fit(
+                X_train, y_train,
+                eval_set=[(X_val, y_val)],
+                verbose=False
+            )
+        
+        # Sub-models per segment, routed to by predictions, with the global model as fallback
+        self.segments = None
+        if segments_val is not None:
+            with self.profiler.stage('segment_fit', rows=len(y_train)):
+                self.segments = SegmentedEnsemble(**self.segment_options)
+                self.segments.fit(self._xgb_estimator, self.model.get_params(), X_train, y_train, segments_train,
+                                  X_val, y_val, segments_val, self.model, self.thread_budget)
         
         # Evaluate model
-        metrics = self._evaluate_model(X_test, y_test)
+        with self.profiler.stage('evaluate', rows=len(y_test)):
+            metrics = self._evaluate_model(X_test, y_test, segments_test)
+        metrics['training_samples'] = len(y)
         self.model_metrics = metrics
+        self.feature_schema = self.feature_engineer.get_schema_version()
+        self.incremental_history = []
         
         self.logger.info(f"Model training complete. MAE: {metrics['mae']:.2f}, R2: {metrics['r2']:.3f}")
         return metrics
     
-    def _optimize_hyperparameters(self, X_train: np.ndarray, y_train: np.ndarray) -> XGBRegressor:
-        """Optimize hyperparameters using GridSearchCV"""
-        self.logger.info("Optimizing hyperparameters...")
-        
-        param_grid = {
-            'max_depth': [6, 8, 10],
-            'learning_rate': [0.05, 0.1, 0.15],
-            'n_estimators': [800, 1000, 1200],
-            'subsample': [0.7, 0.8, 0.9],
-            'colsample_bytree': [0.7, 0.8, 0.9]
-        }
+    def train_external_memory(self, data_source: str = 'data/vehicle_listings.db', chunk_size: int = 50000,
+                              cache_dir: Optional[str] = None, validation_fraction: float = 0.2,
+                              fit_sample_rows: int = 100000, refit_features: bool = True) -> Dict[str, float]:
+        """Train on the whole training window without holding it in memory
+        
+        Listings are streamed from SQLite chunk by chunk, transformed (through the feature
+        store when configured) and quantized by XGBoost into pages cached on disk, so peak
+        memory depends on chunk_size rather than the row count. Rows whose id falls in the
+        validation_fraction bucket form the early-stopping and evaluation set. The feature
+        engineer is fitted on a random sample of fit_sample_rows listings first, unless
+        refit_features is False and it is already fitted.
+        """
+        self.logger.info("Starting external-memory model training...")
+        start = time.perf_counter()
+        
+        loader = self.training_loader(data_source)
+        loader.chunk_size = chunk_size
+        if refit_features or not self.feature_engineer.is_fitted():
+            with self.profiler.stage('load') as stage:
+                sample = loader.load(sample_ratio=min(1.0, fit_sample_rows / max(loader.count(), 1)))
+                stage['rows'] = len(sample)
+            self.prepare_data(sample)
+            del sample
+        
+        # Outlier bounds come from all prices; only the price column is read for them
+        with self.profiler.stage('outlier_bounds') as stage:
+            prices = loader.load(columns=['price'])['price'].to_numpy()
+            bounds = self._outlier_bounds(prices)
+            stage['rows'] = len(prices)
+        del prices
+        
+        cache_prefix = Path(cache_dir or Path(data_source).parent / 'xgb_cache')
+        estimator = self._xgb_estimator(**self.xgb_params)
+        feature_types = estimator.feature_types if estimator.enable_categorical else None
+        train_iter = FeatureChunkIterator(lambda: self._iter_feature_chunks(data_source, chunk_size, bounds, validation_fraction, False),
+                                          str(cache_prefix / 'train'), feature_types)
+        val_iter = FeatureChunkIterator(lambda: self._iter_feature_chunks(data_source, chunk_size, bounds, validation_fraction, True),
+                                        str(cache_prefix / 'validation'), feature_types)
+        
+        matrix_options = {'max_bin': estimator.max_bin or 256, 'enable_categorical': estimator.enable_categorical,
+                          'nthread': self.thread_budget.training_threads}
+        with self.profiler.stage('quantize') as stage:
+            dtrain = external_memory_matrix(train_iter, **matrix_options)
+            dval = external_memory_matrix(val_iter, ref=dtrain, **matrix_options)
+            stage['rows'] = train_iter.rows + val_iter.rows
+        self.logger.info(f"Quantized {train_iter.rows} training and {val_iter.rows} validation rows "
+                         f"from {train_iter.chunks} + {val_iter.chunks} chunks into {cache_prefix}")
+        
+        with self.profiler.stage('final_fit', rows=train_iter.rows):
+            booster = train_booster(estimator, dtrain, dval)
+        del dtrain, dval
+        
+        # Evaluation streams the validation chunks once more instead of materializing them
+        y_true, y_pred = [], []
+        with self.profiler.stage('evaluate', rows=val_iter.rows):
+            for X_chunk, y_chunk in self._iter_feature_chunks(data_source, chunk_size, bounds, validation_fraction, True):
+                y_true.append(y_chunk)
+                y_pred.append(predict_best(booster, xgb.DMatrix(X_chunk, feature_types=feature_types,
+                                                                enable_categorical=estimator.enable_categorical)))
+        
+        # Wrapped in the sklearn estimator the rest of the model code expects
+        self.model = estimator
+        self.segments = None
+        self.model.load_model(bytearray(booster.save_raw()))
+        
+        metrics = self._regression_metrics(np.concatenate(y_true), np.concatenate(y_pred))
+        metrics['training_samples'] = train_iter.rows + val_iter.rows
+        self.model_metrics = metrics
+        self.feature_schema = self.feature_engineer.get_schema_version()
+        self.incremental_history = []
         
-        base_model = XGBRegressor(
-            objective='reg:squarederror',
-            random_state=42,
-            n_jobs=-1
-        )
+        self.logger.info(f"External-memory training complete in {time.perf_counter() - start:.1f}s. "
+                         f"MAE: {metrics['mae']:.2f}, R2: {metrics['r2']:.3f}")
+        return metrics
+    
+    def _iter_feature_chunks(self, data_source: str, chunk_size: int, bounds: Tuple[float, float],
+                             validation_fraction: float, validation: bool) -> Iterator[Tuple[FeatureMatrix, np.ndarray]]:
+        """Feature matrix chunks of the training or validation rows, in a stable order on every pass"""
+        loader = self.training_loader(data_source)
+        loader.chunk_size = chunk_size
+        for chunk in loader.iter_frames(order_by_id=True):
+            # The id bucket keeps a listing on the same side of the split in every pass
+            in_validation = (chunk['id'] % 100) < validation_fraction * 100
+            chunk = chunk[in_validation == validation]
+            
+            imputed = chunk[[col for col in ['year', 'mileage'] if col in chunk.columns]].isna().any(axis=1)
+            chunk = self._handle_missing_values(chunk)
+            chunk = chunk[(chunk['price'] >= bounds[0]) & (chunk['price'] <= bounds[1])]
+            if chunk.empty:
+                continue
+            
+            X = self._transform_features(chunk, cacheable=~imputed.loc[chunk.index].to_numpy())
+            yield X, chunk['price'].to_numpy()
+    
+    def train_incremental(self, X: FeatureMatrix, y: np.ndarray, mode: str = 'continue', n_new_trees: int = 100,
+                          max_degradation: float = 0.05) -> Dict[str, Any]:
+        """Update the trained booster with newly arrived listings instead of retraining from zero trees
+        
+        'continue' boosts n_new_trees more trees on the new rows from the current booster;
+        'update' keeps the tree structure and refreshes leaf values on the new rows. X must
+        come from the same fitted feature engineer (prepare_data with refit_features=False).
+        
+        A holdout of the new rows guards the update: it is rejected, and the current model
+        kept, when its MAE exceeds the current model's by more than max_degradation. The
+        result's 'fallback' is True when the caller should run a full retrain instead, as
+        it always is for a model with segment sub-models: only the global booster would be
+        updated while the sub-models kept serving their segments.
+        """
+        if mode not in ('continue', 'update'):
+            raise ValueError(f"Unknown incremental mode: {mode}")
+        if not self.model:
+            raise ValueError("Model not trained. Call train() first.")
         
-        grid_search = GridSearchCV(
-            base_model,
-            param_grid,
-            cv=5,
-            scoring='neg_mean_absolute_error',
-            n_jobs=-1,
-            verbose=1
-        )
+        result = {'mode': mode, 'samples': int(X.shape[0]), 'applied': False, 'fallback': True}
+        booster = self.model.get_booster()
+        schema = self.feature_engineer.get_schema_version()
+        if schema != self.feature_schema or X.shape[1] != booster.num_features():
+            result['reason'] = (f"feature schema changed ({self.feature_schema} -> {schema}, "
+                                f"{booster.num_features()} -> {X.shape[1]} features)")
+            self.logger.warning(f"Incremental {mode} skipped: {result['reason']}")
+            return result
+        if self.segments is not None and self.segments.models:
+            result['reason'] = (f"{self.segments.segment_by} sub-models for {sorted(self.segments.models)} "
+                                f"are only updated by a full retrain")
+            self.logger.warning(f"Incremental {mode} skipped: {result['reason']}")
+            return result
+        
+        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        # Trees past the early-stopping optimum are dropped before building on the booster
+        best_iteration = getattr(self.model, 'best_iteration', None)
+        if best_iteration is not None:
+            booster = booster[:best_iteration + 1]
+        n_trees = booster.num_boosted_rounds()
+        
+        params = dict(self.model.get_params(), early_stopping_rounds=None, n_jobs=self.thread_budget.training_threads)
+        if mode == 'continue':
+            params['n_estimators'] = n_new_trees
+        else:
+            # One refresh round per existing tree; the structure stays, leaf values are refit. The refresh
+            # updater cannot read the QuantileDMatrix the sklearn API builds for 'hist', and with
+            # process_type='update' tree_method only selects the input DMatrix type
+            params.update(n_estimators=n_trees, process_type='update', updater='refresh', refresh_leaf=True,
+                          tree_method='approx')
+        candidate = self._xgb_estimator(**{name: value for name, value in params.items()
+                                           if name not in ('enable_categorical', 'feature_types')})
+        
+        start = time.perf_counter()
+        with self.profiler.stage('final_fit', rows=len(y_train)), warnings.catch_warnings():
+            # Setting updater explicitly makes XGBoost warn that tree_method is ignored, which is intended here
+            warnings.filterwarnings('ignore', message='.*manually specified the `updater`')
+            candidate.fit(X_train, y_train, xgb_model=booster, verbose=False)
+        seconds = time.perf_counter() - start
+        
+        with self.profiler.stage('evaluate', rows=len(y_val)):
+            current_mae = float(mean_absolute_error(y_val, self.model.predict(X_val)))
+            candidate_mae = float(mean_absolute_error(y_val, candidate.predict(X_val)))
+        result.update(trees_before=n_trees, trees_after=candidate.get_booster().num_boosted_rounds(),
+                      seconds=round(seconds, 2), current_mae=round(current_mae, 2),
+                      candidate_mae=round(candidate_mae, 2))
+        
+        if candidate_mae > current_mae * (1 + max_degradation):
+            result['reason'] = f"validation MAE degraded from {current_mae:.2f} to {candidate_mae:.2f}"
+            self.logger.warning(f"Incremental {mode} rejected: {result['reason']}")
+            return result
+        
+        self.model = candidate
+        self.model_metrics = dict(self._evaluate_model(X_val, y_val), training_samples=len(y))
+        result.update(applied=True, fallback=False, reason='validation MAE within tolerance')
+        self.incremental_history.append(dict(result, timestamp=datetime.now().isoformat()))
+        
+        self.logger.info(f"Incremental {mode} applied in {seconds:.2f}s: {n_trees} -> {result['trees_after']} trees, "
+                         f"validation MAE {current_mae:.2f} -> {candidate_mae:.2f}")
+        return result
+    
+    def _optimize_hyperparameters(self, X_train: FeatureMatrix, y_train: np.ndarray) -> XGBRegressor:
+        """Optimize hyperparameters, reusing stored tuning results when the policy allows"""
+        if self.search_strategy not in ('halving', 'grid'):
+            raise ValueError(f"Unknown search strategy: {self.search_strategy}")
+        search_space = self.GRID_PARAM_SPACE if self.search_strategy == 'grid' else SuccessiveHalvingSearch.DEFAULT_PARAM_SPACE
+        
+        if self.tuning_store is None:
+            best_params, _ = self._run_search(X_train, y_train, search_space)
+            return self._estimator_from_params(best_params)
+        
+        profile = data_profile(X_train, y_train)
+        previous = self.tuning_store.get_latest()
+        decision = self.tuning_policy.decide(previous, profile, search_space)
+        
+        if decision['action'] == 'reuse':
+            self.search_report = {'strategy': 'reuse', 'trials': 0, 'seconds': 0.0,
+                                  'best_params': previous['best_params'], 'decision': decision}
+            self.logger.info(f"Reusing tuned parameters: {previous['best_params']}")
+            return self._estimator_from_params(previous['best_params'])
+        
+        if decision['action'] == 'local':
+            # A small halving search over the neighbourhood of the previous best, which is always a candidate
+            local_space = TuningPolicy.local_space(previous['best_params'], search_space)
+            best_params, best_score = self._run_search(X_train, y_train, local_space, strategy='halving',
+                                                       n_candidates=9, seed_candidates=[previous['best_params']])
+        else:
+            best_params, best_score = self._run_search(X_train, y_train, search_space)
         
-        grid_search.fit(X_train, y_train)
+        self.search_report['decision'] = decision
+        self.tuning_store.record(self.search_report['strategy'], search_space, best_params, best_score,
+                                 profile, self.search_report)
+        return self._estimator_from_params(best_params)
+    
+    def _run_search(self, X_train: FeatureMatrix, y_train: np.ndarray, search_space: Dict[str, List[Any]],
+                    strategy: Optional[str] = None, **search_options) -> Tuple[Dict[str, Any], float]:
+        """Run a search over search_space and return the best params and validation MAE"""
+        if (strategy or self.search_strategy) == 'grid':
+            return self._grid_search(X_train, y_train, search_space)
+        
+        self.logger.info("Optimizing hyperparameters with successive halving...")
+        search = SuccessiveHalvingSearch(self._xgb_estimator_with_defaults, param_space=search_space,
+                                         max_estimators=self.SEARCH_MAX_ESTIMATORS,
+                                         budget_seconds=self.search_budget_seconds, **search_options)
+        best_params = search.fit(X_train, y_train)
+        self.search_report = search.report
+        return best_params, search.best_score_
+    
+    def _estimator_from_params(self, best_params: Dict[str, Any]) -> XGBRegressor:
+        """Unfitted estimator with tuned params; train() refits it with early stopping on its evaluation set"""
+        params = dict(self.xgb_params, n_estimators=self.SEARCH_MAX_ESTIMATORS)
+        params.update(best_params)
+        return self._xgb_estimator(**params)
+    
+    def _xgb_estimator_with_defaults(self, **params) -> XGBRegressor:
+        """Estimator from xgb_params with the given overrides"""
+        return self._xgb_estimator(**dict(self.xgb_params, **params))
+    
+    def _grid_search(self, X_train: FeatureMatrix, y_train: np.ndarray,
+                     param_grid: Dict[str, List[Any]]) -> Tuple[Dict[str, Any], float]:
+        """Optimize hyperparameters with an exhaustive 5-fold grid search
         
-        self.logger.info(f"Best parameters: {grid_search.best_params_}")
-        return grid_search.best_estimator_
+        Each fold's training rows are quantized once and reused by every grid point.
+        """
+        self.logger.info("Optimizing hyperparameters...")
+        start = time.perf_counter()
+        
+        base_params = {'objective': 'reg:squarederror', 'random_state': 42, 'n_jobs': -1}
+        matrices = QuantileDMatrixCache.for_estimator(self._xgb_estimator(**base_params), X_train, y_train)
+        folds = list(KFold(n_splits=5).split(np.arange(X_train.shape[0])))
+        
+        candidates = list(ParameterGrid(param_grid))
+        scores = []
+        for i, params in enumerate(candidates, 1):
+            fold_maes = self._fold_maes(self._xgb_estimator(**base_params, **params), matrices, folds)
+            scores.append(float(np.mean(fold_maes)))
+            self.logger.info(f"Grid point {i}/{len(candidates)}: MAE {scores[-1]:.2f} - {params}")
+        
+        best = int(np.argmin(scores))
+        best_params, best_score = candidates[best], scores[best]
+        
+        elapsed = time.perf_counter() - start
+        n_trials = len(candidates) * len(folds)
+        self.search_report = {
+            'strategy': 'grid',
+            'trials': n_trials,
+            'seconds': round(elapsed, 2),
+            'trials_per_second': round(n_trials / elapsed, 3) if elapsed > 0 else 0.0,
+            'best_params': best_params,
+            'best_validation_mae': round(best_score, 2)
+        }
+        self.logger.info(f"Best parameters: {best_params}")
+        return best_params, best_score
     
-    def _evaluate_model(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, float]:
+    def _fold_maes(self, estimator: XGBRegressor, matrices: QuantileDMatrixCache,
+                   folds: List[Tuple[np.ndarray, np.ndarray]]) -> List[float]:
+        """Validation MAE of an unfitted estimator on each (train rows, validation rows) fold
+        
+        Estimators with early_stopping_rounds stop on the fold's validation rows, as train() does on its test split.
+        Folds run concurrently when the thread budget allows several search workers, each on its share of the cores.
+        """
+        # Matrices are built up front; the cache is not shared between threads
+        fold_matrices = [(matrices.train_matrix(train_rows), matrices.eval_matrix(val_rows))
+                         for train_rows, val_rows in folds]
+        workers, threads = self.thread_budget.split(len(folds))
+        estimator = clone(estimator).set_params(n_jobs=threads)
+        
+        def fold_mae(dtrain, dval) -> float:
+            booster = train_booster(estimator, dtrain, dval if estimator.early_stopping_rounds else None)
+            return float(mean_absolute_error(dval.get_label(), predict_best(booster, dval)))
+        
+        if workers == 1:
+            return [fold_mae(dtrain, dval) for dtrain, dval in fold_matrices]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda pair: fold_mae(*pair), fold_matrices))
+    
+    def _xgb_estimator(self, **params) -> XGBRegressor:
+        """XGBRegressor set up for the feature engineer's categorical encoding and the thread budget"""
+        if params.get('n_jobs', -1) in (-1, None):
+            params['n_jobs'] = self.thread_budget.training_threads
+        if self.feature_engineer.categorical_encoding == 'native':
+            # Category-code columns are split on natively instead of as ordered numbers
+            params.setdefault('tree_method', 'hist')
+            params['enable_categorical'] = True
+            params['feature_types'] = self.feature_engineer.get_feature_types()
+        return XGBRegressor(**params)
+    
+    def _evaluate_model(self, X_test: FeatureMatrix, y_test: np.ndarray,
+                        segments: Optional[np.ndarray] = None) -> Dict[str, float]:
         """Evaluate model performance"""
-        y_pred = self.model.predict(X_test)
-        
+        return self._regression_metrics(y_test, self._predict_matrix(X_test, segments))
+    
+    def _predict_matrix(self, X: FeatureMatrix, segments: Optional[np.ndarray] = None) -> np.ndarray:
+        """Predictions of the global model, or routed to segment sub-models when their labels are given"""
+        if self.segments is not None and segments is not None:
+            return self.segments.predict(X, segments, self.model)
+        return self.model.predict(X)
+    
+    @staticmethod
+    def _regression_metrics(y_test: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+        """MAE, RMSE, R2 and MAPE of predictions"""
         metrics = {
             'mae': mean_absolute_error(y_test, y_pred),
             'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
@@ -158,18 +632,31 @@ class VehiclePriceModel:
         if not self.model:
             raise ValueError("Model not trained. Call train() first.")
         
-        # Convert to DataFrame
-        df = pd.DataFrame([vehicle_data])
-        
-        # Handle missing values
-        df = self._handle_missing_values(df)
-        
-        # Feature engineering
-        X = self.feature_engineer.transform(df)
+        if self.row_transformer is not None:
+            # Same values as the DataFrame path below, without pandas overhead
+            X = self.row_transformer.transform_row(self._fill_missing_record(vehicle_data))
+        else:
+            # Convert to DataFrame
+            df = pd.DataFrame([vehicle_data])
+            
+            # Handle missing values
+            df = self._handle_missing_values(df)
+            
+            # Feature engineering
+            X = self.feature_engineer.transform(df)
         
-        # Make prediction
-        predicted_price = self.model.predict(X)[0]
+        # Make prediction, routed to the vehicle's segment model when trained
+        segments = None
+        if self.segments is not None:
+            record = self._fill_missing_record(vehicle_data)
+            segments = [self.feature_engineer.get_segment(record, self.segments.segment_by)]
+        predicted_price = self._predict_matrix(X, segments)[0]
         
+        return self._build_prediction(vehicle_data, predicted_price, X)
+    
+    def _build_prediction(self, vehicle_data: Dict[str, Any], predicted_price: float,
+                          X: FeatureMatrix) -> Dict[str, Any]:
+        """Assemble the prediction response for one vehicle"""
         # Calculate confidence interval
         confidence_interval = self._calculate_confidence_interval(X, predicted_price)
         
@@ -184,6 +671,49 @@ class VehiclePriceModel:
             'prediction_timestamp': datetime.now().isoformat()
         }
     
+    def predict_listings(self, listings: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Predict stored listings in one batch, reusing feature rows from the feature store
+        
+        Missing values are filled per listing exactly as predict() does, so results match
+        predicting each listing on its own. Falls back to predict_batch on failure.
+        """
+        if not self.model:
+            raise ValueError("Model not trained. Call train() first.")
+        
+        if not listings:
+            return []
+        
+        try:
+            df = pd.DataFrame([self._fill_missing_record(listing) for listing in listings])
+            X = self._transform_features(df)
+            segments = (self.feature_engineer.get_segments(df, self.segments.segment_by)
+                        if self.segments is not None else None)
+            predicted_prices = self._predict_matrix(X, segments)
+        except Exception as e:
+            self.logger.error(f"Batch prediction failed, predicting one by one: {str(e)}")
+            return self.predict_batch(listings)
+        
+        return [
+            self._build_prediction(listing, predicted_price, X[i:i + 1])
+            for i, (listing, predicted_price) in enumerate(zip(listings, predicted_prices))
+        ]
+    
+    def _transform_features(self, df: pd.DataFrame, cacheable: Optional[np.ndarray] = None) -> FeatureMatrix:
+        """Transform with the fitted engineer, through the feature store when configured"""
+        transformer = self._get_chunked_transformer()
+        if self.feature_store is not None:
+            return self.feature_store.transform(self.feature_engineer, df, cacheable, transformer)
+        return (transformer or self.feature_engineer).transform(df)
+    
+    def _get_chunked_transformer(self):
+        """Multi-process transformer for the current engineer, or None when feature_jobs is 1"""
+        if self.feature_jobs <= 1:
+            return None
+        if self.chunked_transformer is None or self.chunked_transformer.engineer is not self.feature_engineer:
+            self.chunked_transformer = self.feature_engineer.chunked_transformer(n_jobs=self.feature_jobs,
+                                                                                 thread_budget=self.thread_budget)
+        return self.chunked_transformer
+    
     def predict_batch(self, vehicle_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Predict prices for multiple vehicles"""
         results = []
@@ -198,7 +728,7 @@ class VehiclePriceModel:
         
         return results
     
-    def _calculate_confidence_interval(self, X: np.ndarray, predicted_price: float) -> Dict[str, float]:
+    def _calculate_confidence_interval(self, X: FeatureMatrix, predicted_price: float) -> Dict[str, float]:
         """Calculate confidence interval for prediction"""
         # Simplified confidence interval calculation
         # In production, you might use quantile regression or bootstrap methods
@@ -302,11 +832,16 @@ class VehiclePriceModel:
             'model': self.model,
             'feature_engineer': self.feature_engineer,
             'metrics': self.model_metrics,
+            'search': self.search_report,
+            'feature_schema': self.feature_schema,
+            'incremental': self.incremental_history,
+            'segments': self.segments,
             'version': self._get_model_version(),
             'timestamp': datetime.now().isoformat()
         }
         
-        joblib.dump(model_data, save_path)
+        with self.profiler.stage('save'):
+            joblib.dump(model_data, save_path)
         self.logger.info(f"Model saved to {save_path}")
     
     def load_model(self, path: str = None) -> None:
@@ -316,8 +851,17 @@ class VehiclePriceModel:
         try:
             model_data = joblib.load(load_path)
             self.model = model_data['model']
+            # Served models predict few rows per request; more threads only contend between requests
+            self.model.set_params(n_jobs=self.thread_budget.prediction_threads)
             self.feature_engineer = model_data['feature_engineer']
             self.model_metrics = model_data.get('metrics', {})
+            self.search_report = model_data.get('search', {})
+            self.feature_schema = model_data.get('feature_schema', self.feature_engineer.get_schema_version())
+            self.incremental_history = model_data.get('incremental', [])
+            self.segments = model_data.get('segments')
+            if self.segments is not None:
+                self.segments.set_threads(self.thread_budget.prediction_threads)
+            self.row_transformer = self._compile_row_transformer()
             
             self.logger.info(f"Model loaded from {load_path}")
             
@@ -337,27 +881,60 @@ class VehiclePriceModel:
                 df[col] = df[col].fillna(df[col].median())
         
         # Categorical columns
-        categorical_cols = ['make', 'model', 'body_type', 'fuel_type', 'transmission', 'drivetrain']
-        for col in categorical_cols:
+        for col in self.CATEGORICAL_FILL_COLUMNS:
             if col in df.columns:
-                df[col] = df[col].fillna('unknown')
+                df[col] = fill_missing_category(df[col])
         
         return df
     
+    def _fill_missing_record(self, vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Single-record equivalent of _handle_missing_values
+        
+        The median of a one-row column is the value itself, so only categorical
+        columns change.
+        """
+        record = dict(vehicle_data)
+        for col in self.CATEGORICAL_FILL_COLUMNS:
+            value = record.get(col)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                record[col] = 'unknown'
+        return record
+    
+    def _compile_row_transformer(self, sample_df: Optional[pd.DataFrame] = None):
+        """Compile the single-row transformer, verified against transform() on a sample when given"""
+        try:
+            row_transformer = self.feature_engineer.compile_row_transformer()
+            
+            if sample_df is not None and len(sample_df) > 0:
+                sample = sample_df.sample(min(200, len(sample_df)), random_state=42)
+                max_difference = row_transformer.verify(sample)
+                if max_difference > 1e-9:
+                    self.logger.warning(f"Row transformer differs from transform() by {max_difference}; "
+                                        f"using the DataFrame path for predictions")
+                    return None
+            
+            return row_transformer
+            
+        except Exception as e:
+            self.logger.warning(f"Could not compile row transformer: {str(e)}")
+            return None
+    
     def _remove_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
         """Remove price outliers using IQR method"""
-        Q1 = df['price'].quantile(0.25)
-        Q3 = df['price'].quantile(0.75)
-        IQR = Q3 - Q1
-        
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+        lower_bound, upper_bound = self._outlier_bounds(df['price'])
         
         df_clean = df[(df['price'] >= lower_bound) & (df['price'] <= upper_bound)]
         
         self.logger.info(f"Removed {len(df) - len(df_clean)} outliers")
         return df_clean
     
+    @staticmethod
+    def _outlier_bounds(prices: Union[pd.Series, np.ndarray]) -> Tuple[float, float]:
+        """IQR price bounds: 1.5 interquartile ranges beyond the quartiles"""
+        Q1, Q3 = pd.Series(prices).quantile([0.25, 0.75])
+        IQR = Q3 - Q1
+        return Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+    
     def _get_model_version(self) -> str:
         """Get model version string"""
         return f"v1.0_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -369,20 +946,21 @@ class VehiclePriceModel:
         
         return self.feature_engineer.get_feature_importance_df(self.model, top_n)
     
-    def cross_validate(self, X: np.ndarray, y: np.ndarray, cv: int = 5) -> Dict[str, float]:
+    def cross_validate(self, X: FeatureMatrix, y: np.ndarray, cv: int = 5) -> Dict[str, float]:
         """Perform cross-validation"""
         if not self.model:
-            self.model = XGBRegressor(**self.xgb_params)
+            self.model = self._xgb_estimator(**self.xgb_params)
+        
+        # Fold training rows are quantized once, so repeated calls on the same X reuse them
+        if self._cv_matrices is None or self._cv_matrices.X is not X:
+            self._cv_matrices = QuantileDMatrixCache.for_estimator(self.model, X, y)
+        folds = list(KFold(n_splits=cv).split(np.arange(X.shape[0])))
         
-        cv_scores = cross_val_score(
-            self.model, X, y, 
-            cv=cv, 
-            scoring='neg_mean_absolute_error',
-            n_jobs=-1
-        )
+        estimator = self._xgb_estimator(**self.model.get_params())
+        cv_scores = np.array(self._fold_maes(estimator, self._cv_matrices, folds))
         
         return {
-            'cv_mae_mean': -cv_scores.mean(),
+            'cv_mae_mean': cv_scores.mean(),
             'cv_mae_std': cv_scores.std(),
-            'cv_scores': -cv_scores
+            'cv_scores': cv_scores
         }
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Single-row feature transformer for real-time predictions
+"""
+
+import math
+import numpy as np
+import pandas as pd
+import logging
+from datetime import datetime
+from scipy import sparse
+from typing import Dict, List, Any, Tuple, Union
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.utils import murmurhash3_32
+
+from .feature_engineering import HashingTextVectorizer
+
+def _is_missing(value: Any) -> bool:
+    """Scalar equivalent of pd.isna for the values listings carry"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def _to_float(value: Any) -> float:
+    """Numeric field as float, NaN when missing"""
+    return math.nan if _is_missing(value) else float(value)
+
+def _dense_with_missing(X: Union[np.ndarray, sparse.spmatrix]) -> np.ndarray:
+    """Dense float64 copy in which entries a sparse X does not store are NaN, as XGBoost reads them"""
+    if not sparse.issparse(X):
+        return np.asarray(X, dtype=np.float64)
+
+    X = sparse.csr_matrix(X)
+    dense = np.full(X.shape, np.nan)
+    dense[np.repeat(np.arange(X.shape[0]), np.diff(X.indptr)), X.indices] = X.data
+    return dense
+
+class RowFeatureTransformer:
+    """Maps one listing dict straight to a feature vector without building a DataFrame
+
+    All lookup tables are taken from a fitted VehicleFeatureEngineer: scaler
+    coefficients, one-hot category offsets and the TF-IDF vocabulary and idf weights.
+    Output equals VehicleFeatureEngineer.transform() on the same record, dense or CSR
+    to match the engineer.
+    """
+
+    def __init__(self, engineer):
+        self.engineer = engineer
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sparse_output = engineer.sparse_output
+
+        # Scaler coefficients for the numerical block
+        self.numerical_features = list(engineer.NUMERICAL_FEATURES)
+        self.scaler_mean = np.asarray(engineer.scaler.mean_, dtype=np.float64)
+        self.scaler_scale = np.asarray(engineer.scaler.scale_, dtype=np.float64)
+        self.n_numerical = len(self.numerical_features)
+
+        # Category -> one-hot column index, or -> code for native encoding, in transform() column order
+        offset = self.n_numerical
+        self.category_index: List[Tuple[str, Dict[Any, int]]] = []
+        self.code_index: List[Tuple[str, int, Dict[Any, int]]] = []
+        for feature in engineer.CATEGORICAL_FEATURES:
+            if feature in engineer.ordinal_encoders:
+                categories = engineer.ordinal_encoders[feature].categories_[0]
+                self.code_index.append((feature, offset, {category: i for i, category in enumerate(categories)}))
+                offset += 1
+            elif feature in engineer.one_hot_encoders:
+                categories = engineer.one_hot_encoders[feature].categories_[0]
+                self.category_index.append(
+                    (feature, {category: offset + i for i, category in enumerate(categories)})
+                )
+                offset += len(categories)
+
+        # Text block: replicate TF-IDF or hashing term by term when possible, otherwise defer to the vectorizer
+        self.text_offset = offset
+        self.text_vectorizer = engineer.tfidf_vectorizer
+        self.text_analyzer = None
+        self.vocabulary = None
+        self.hash_buckets = None
+        self.idf = None
+        if isinstance(self.text_vectorizer, HashingTextVectorizer):
+            self.text_analyzer = self.text_vectorizer.hasher.build_analyzer()
+            self.hash_buckets = self.text_vectorizer.n_features
+            self.idf = self.text_vectorizer.idf_
+        elif hasattr(self.text_vectorizer, 'vocabulary_') and self._is_plain_tfidf(self.text_vectorizer):
+            self.text_analyzer = self.text_vectorizer.build_analyzer()
+            self.vocabulary = self.text_vectorizer.vocabulary_
+            self.idf = self.text_vectorizer.idf_
+        self.n_features = offset + engineer._text_width()
+
+    @staticmethod
+    def _is_plain_tfidf(vectorizer: Any) -> bool:
+        """Whether the TF-IDF weighting can be reproduced term by term"""
+        return (isinstance(vectorizer, TfidfVectorizer) and vectorizer.use_idf and
+                not vectorizer.sublinear_tf and vectorizer.norm == 'l2' and not vectorizer.binary)
+
+    def transform_row(self, record: Dict[str, Any]) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Transform one listing into a 1 x n_features matrix"""
+        engineer = self.engineer
+
+        # Numerical block, in NUMERICAL_FEATURES order
+        year = _to_float(record.get('year'))
+        mileage = _to_float(record.get('mileage'))
+        age = datetime.now().year - year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mileage_per_year = float(np.float64(mileage) / np.float64(age + 1))
+        log_mileage = float(np.log1p(0.0 if math.isnan(mileage) else mileage))
+
+        numerical = np.array([
+            age,
+            mileage,
+            mileage_per_year,
+            log_mileage,
+            engineer._fuel_efficiency_score(record.get('fuel_type')),
+            engineer._transmission_score(record.get('transmission')),
+            engineer._drivetrain_score(record.get('drivetrain')),
+            engineer._count_features(record.get('features')),
+            engineer._color_popularity_score(record.get('exterior_color')),
+            1.0  # seasonal_factor, constant in _get_seasonal_factor
+        ], dtype=np.float64)
+        numerical[np.isnan(numerical)] = 0.0
+        if not np.isfinite(numerical).all():
+            # The scaler rejects these in transform() as well (e.g. a model year of next year)
+            raise ValueError("Numerical features contain infinity")
+        numerical = (numerical - self.scaler_mean) / self.scaler_scale
+
+        # One-hot block: column index of each known category
+        derived = {
+            'brand_tier': engineer._categorize_brand(record.get('make')),
+            'body_type_category': engineer._categorize_body_type(record.get('body_type')),
+            'dealer_type': engineer._categorize_dealer(record.get('dealer_name')),
+        }
+        one_hot_columns = []
+        for feature, index in self.category_index:
+            value = derived[feature] if feature in derived else record.get(feature)
+            column = index.get('unknown' if _is_missing(value) else value)
+            if column is not None:
+                one_hot_columns.append(column)
+        
+        # Native category codes; unseen categories are left missing
+        code_columns, code_values = [], []
+        for feature, column, codes in self.code_index:
+            value = derived[feature] if feature in derived else record.get(feature)
+            code = codes.get('unknown' if _is_missing(value) else value)
+            if code is not None:
+                code_columns.append(column)
+                code_values.append(float(code))
+
+        text_columns, text_values = self._transform_text(record.get('features'))
+
+        if self.sparse_output:
+            # Numerical entries and known codes are always stored, matching _explicit_block
+            indices = np.concatenate([
+                np.arange(self.n_numerical), np.array(code_columns + one_hot_columns, dtype=np.int64), text_columns
+            ]).astype(np.int32)
+            data = np.concatenate([numerical, np.array(code_values, dtype=np.float64),
+                                   np.ones(len(one_hot_columns)), text_values])
+            return sparse.csr_matrix((data.astype(engineer.dtype), indices, np.array([0, len(data)])),
+                                     shape=(1, self.n_features))
+
+        row = np.zeros((1, self.n_features), dtype=engineer.dtype)
+        row[0, :self.n_numerical] = numerical
+        row[0, one_hot_columns] = 1.0
+        row[0, [column for _, column, _ in self.code_index]] = np.nan
+        row[0, code_columns] = code_values
+        row[0, text_columns] = text_values
+        return row
+
+    def _transform_text(self, features: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """Column indices and weights of the text block"""
+        if _is_missing(features):
+            text = ''
+        else:
+            text = ' '.join(features) if isinstance(features, list) else str(features)
+
+        if self.text_analyzer is None:
+            X_text = sparse.csr_matrix(self.text_vectorizer.transform([text]))
+            X_text.sort_indices()
+            return X_text.indices.astype(np.int64) + self.text_offset, X_text.data.astype(np.float64)
+
+        counts = {}
+        for term in self.text_analyzer(text):
+            column = self._term_column(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+
+        columns = np.array(sorted(counts), dtype=np.int64)
+        values = np.array([counts[column] for column in columns], dtype=np.float64)
+        if self.idf is not None:
+            values = values * self.idf[columns]
+        norm = math.sqrt(sum(value * value for value in values.tolist()))
+        if norm > 0:
+            values = values / norm
+        return columns + self.text_offset, values
+
+    def _term_column(self, term: str) -> Any:
+        """Text-block column of a term: vocabulary lookup, or its hash bucket as FeatureHasher computes it"""
+        if self.hash_buckets is None:
+            return self.vocabulary.get(term)
+
+        h = murmurhash3_32(term, seed=0)
+        if h == -2147483648:
+            return (2147483647 - (self.hash_buckets - 1)) % self.hash_buckets
+        return abs(h) % self.hash_buckets
+
+    def verify(self, df: pd.DataFrame) -> float:
+        """Largest absolute difference between transform_row and transform() over the rows of df
+
+        Missing values (NaN, or entries sparse output leaves out, e.g. unseen native
+        categories) must be missing in both paths; a value missing in only one of them
+        counts as an infinite difference.
+        """
+        expected = _dense_with_missing(self.engineer.transform(df))
+
+        max_difference = 0.0
+        for i, record in enumerate(df.to_dict('records')):
+            row = _dense_with_missing(self.transform_row(record))
+            missing = np.isnan(row[0])
+            if not np.array_equal(missing, np.isnan(expected[i])):
+                return math.inf
+            difference = np.abs(row[0] - expected[i])[~missing]
+            max_difference = max(max_difference, float(difference.max()) if difference.size else 0.0)
+
+        return max_difference
@@ -0,0 +1,84 @@
+"""
+Column schema and compact dtypes for listing frames
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, Any, Optional, Union
+
+# Storage kind per vehicle_listings column; columns not listed keep their loaded dtype
+LISTING_SCHEMA = {
+    'id': 'integer',
+    'year': 'integer',
+    'mileage': 'integer',
+    'price': 'float',
+    'make': 'category',
+    'model': 'category',
+    'body_type': 'category',
+    'fuel_type': 'category',
+    'transmission': 'category',
+    'drivetrain': 'category',
+    'exterior_color': 'category',
+    'interior_color': 'category',
+    'engine': 'category',
+    'location': 'category',
+    'dealer_name': 'category',
+    'source': 'category',
+}
+
+def compact_frame(df: pd.DataFrame, schema: Optional[Dict[str, str]] = None,
+                  max_category_ratio: float = 0.5) -> pd.DataFrame:
+    """Copy of df with low-cardinality strings as category and integers downcast
+
+    'category' columns are converted only when distinct values are at most
+    max_category_ratio of the rows. 'integer' columns are downcast to the smallest
+    integer type holding them, unless they contain missing values. Floats are kept
+    as float64 so derived features do not change.
+    """
+    schema = LISTING_SCHEMA if schema is None else schema
+    df = df.copy()
+
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+
+        values = df[column]
+        if kind == 'category':
+            if values.dtype == object and values.nunique(dropna=True) <= max_category_ratio * len(values):
+                df[column] = values.astype('category')
+        elif kind == 'integer':
+            numeric = pd.to_numeric(values, errors='coerce')
+            if numeric.notna().all() and (numeric == np.floor(numeric)).all():
+                df[column] = pd.to_numeric(numeric.astype(np.int64), downcast='integer')
+
+    return df
+
+def fill_missing_category(values: Union[pd.Series, pd.DataFrame], fill_value: str = 'unknown') -> Union[pd.Series, pd.DataFrame]:
+    """fillna(fill_value) that also works on category columns lacking fill_value"""
+    if isinstance(values, pd.DataFrame):
+        return values.apply(lambda column: fill_missing_category(column, fill_value))
+
+    if isinstance(values.dtype, pd.CategoricalDtype) and fill_value not in values.cat.categories:
+        if not values.isna().any():
+            return values
+        values = values.cat.add_categories([fill_value])
+    return values.fillna(fill_value)
+
+def frame_memory_bytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a frame, including string payloads"""
+    return int(df.memory_usage(deep=True).sum())
+
+def matrix_memory_bytes(X: Union[np.ndarray, sparse.spmatrix]) -> int:
+    """Memory held by a dense or CSR feature matrix"""
+    if sparse.issparse(X):
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(X.nbytes)
+
+def memory_stage(before: int, after: int) -> Dict[str, Any]:
+    """Memory report entry for one stage, in MB"""
+    return {
+        'before_mb': round(before / 1024 ** 2, 2),
+        'after_mb': round(after / 1024 ** 2, 2),
+        'saved_pct': round(100 * (1 - after / before), 1) if before else 0.0
+    }
@@ -0,0 +1,158 @@
+"""
+Per-segment XGBoost sub-models routed by brand tier or body category
+"""
+
+import time
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Callable, Tuple
+from sklearn.metrics import mean_absolute_error
+from xgboost import XGBRegressor
+from .thread_budget import ThreadBudget
+from .shared_matrix import SharedTrainingData, attach_training_data
+from .dmatrix_cache import quantized_rows, train_booster
+
+# Shared training arrays of the current worker process, attached once by the pool initializer
+_worker_arrays = None
+_worker_blocks = None
+
+def _init_worker(spec: Dict[str, Dict[str, Any]]) -> None:
+    """Attach to the parent's shared training arrays once per worker instead of receiving copies per task"""
+    global _worker_arrays, _worker_blocks
+    _worker_arrays, _worker_blocks = attach_training_data(spec)
+
+def _fit_shared_segment(task: Tuple[str, XGBRegressor, np.ndarray, np.ndarray]) -> Tuple[str, XGBRegressor, float]:
+    """Fit one segment's sub-model on its rows of the shared training arrays"""
+    return _fit_segment(*task, **_worker_arrays)
+
+def _fit_segment(segment: str, estimator: XGBRegressor, train_rows: np.ndarray, val_rows: np.ndarray,
+                 X_train: Any, y_train: np.ndarray, X_val: Any, y_val: np.ndarray) -> Tuple[str, XGBRegressor, float]:
+    """Fit one segment's sub-model on its rows and return it with its fit time
+
+    The rows are quantized batch by batch straight from the full matrices, so no float
+    copy of the segment is made.
+    """
+    start = time.perf_counter()
+    options = {'max_bin': estimator.max_bin or 256, 'enable_categorical': estimator.enable_categorical,
+               'feature_types': estimator.feature_types if estimator.enable_categorical else None,
+               'nthread': estimator.n_jobs}
+    dtrain = quantized_rows(X_train, y_train, train_rows, **options)
+    dval = quantized_rows(X_val, y_val, val_rows, ref=dtrain, **options)
+    booster = train_booster(estimator, dtrain, dval)
+
+    # Wrapped in the sklearn estimator the prediction code expects
+    estimator.load_model(bytearray(booster.save_raw()))
+    return segment, estimator, time.perf_counter() - start
+
+class SegmentedEnsemble:
+    """Sub-models per segment of a categorical feature, with the global model as fallback
+
+    Sub-models use the global model's feature matrix, so a request is transformed once
+    and only the booster differs. Each segment covers a narrower price range than the
+    whole market, so sub-models are shallower and have fewer trees (segment_params).
+    They train concurrently in a process pool sized by the thread budget. A segment
+    keeps its sub-model only when it has min_segment_samples rows and beats the global
+    model on its own validation rows. Worker processes read the training matrices from
+    shared memory rather than receiving pickled copies. Other segments, and labels
+    unseen in training, are routed to the global model.
+    """
+
+    # Overrides of the global model's parameters for sub-models
+    SEGMENT_PARAMS = {
+        'max_depth': 6,
+        'n_estimators': 400
+    }
+
+    def __init__(self, segment_by: str = 'brand_tier', min_segment_samples: int = 500,
+                 segment_params: Optional[Dict[str, Any]] = None, max_workers: Optional[int] = None):
+        self.segment_by = segment_by
+        self.min_segment_samples = min_segment_samples
+        self.segment_params = dict(self.SEGMENT_PARAMS, **(segment_params or {}))
+        self.max_workers = max_workers  # Concurrent sub-model fits; None lets the thread budget decide
+        self.models: Dict[str, XGBRegressor] = {}
+        self.report: Dict[str, Dict[str, Any]] = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def fit(self, make_estimator: Callable[..., XGBRegressor], base_params: Dict[str, Any], X_train: Any,
+            y_train: np.ndarray, segments_train: np.ndarray, X_val: Any, y_val: np.ndarray,
+            segments_val: np.ndarray, global_model: XGBRegressor,
+            thread_budget: Optional[ThreadBudget] = None) -> Dict[str, Dict[str, Any]]:
+        """Train a sub-model for every large enough segment and keep those that beat the global model"""
+        thread_budget = thread_budget or ThreadBudget()
+        self.models, self.report = {}, {}
+
+        tasks = []
+        for segment in sorted(set(segments_train)):
+            train_rows = np.flatnonzero(segments_train == segment)
+            val_rows = np.flatnonzero(segments_val == segment)
+            self.report[segment] = {'train_rows': len(train_rows), 'val_rows': len(val_rows), 'kept': False}
+            if len(train_rows) < self.min_segment_samples or len(val_rows) == 0:
+                self.report[segment]['reason'] = 'too few rows'
+                continue
+            tasks.append((segment, train_rows, val_rows))
+
+        if not tasks:
+            self.logger.info(f"No {self.segment_by} segment has {self.min_segment_samples} rows, using the global model only")
+            return self.report
+
+        workers, threads = thread_budget.split(len(tasks), max_workers=self.max_workers or thread_budget.total_cores)
+        params = dict(base_params, **self.segment_params, n_jobs=threads)
+
+        self.logger.info(f"Training {len(tasks)} {self.segment_by} sub-models across {workers} processes "
+                         f"with {threads} threads each")
+        arrays = {'X_train': X_train, 'y_train': y_train, 'X_val': X_val, 'y_val': y_val}
+        if workers <= 1:
+            fitted = [_fit_segment(segment, make_estimator(**params), train_rows, val_rows, **arrays)
+                      for segment, train_rows, val_rows in tasks]
+        else:
+            # Workers attach to one shared copy of the matrices and pick their segment's rows by index.
+            # Spawned, as forked children of a process that already ran OpenMP can deadlock
+            with SharedTrainingData(arrays) as shared, \
+                    ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker, initargs=(shared.spec,)) as executor:
+                fitted = list(executor.map(_fit_shared_segment, [(segment, make_estimator(**params), train_rows, val_rows)
+                                                                 for segment, train_rows, val_rows in tasks]))
+
+        for (segment, model, seconds), (_, _, val_rows) in zip(fitted, tasks):
+            X_segment_val, y_segment_val = X_val[val_rows], y_val[val_rows]
+            segment_mae = float(mean_absolute_error(y_segment_val, model.predict(X_segment_val)))
+            global_mae = float(mean_absolute_error(y_segment_val, global_model.predict(X_segment_val)))
+            kept = segment_mae <= global_mae
+            self.report[segment].update(kept=kept, mae=round(segment_mae, 2), global_mae=round(global_mae, 2),
+                                        trees=model.get_booster().num_boosted_rounds(), fit_seconds=round(seconds, 2))
+            if kept:
+                self.models[segment] = model
+            else:
+                self.report[segment]['reason'] = 'global model is more accurate'
+
+        self.logger.info(f"Kept {self.segment_by} sub-models for {sorted(self.models) or 'no segments'}")
+        return self.report
+
+    def predict(self, X: Any, segments: np.ndarray, global_model: XGBRegressor) -> np.ndarray:
+        """Predictions with each row routed to its segment's sub-model, or the global model"""
+        segments = np.asarray(segments, dtype=object)
+        routed = np.isin(segments, list(self.models))
+        predictions = np.empty(X.shape[0], dtype=np.float64)
+        if not routed.all():
+            rows = np.flatnonzero(~routed)
+            predictions[rows] = global_model.predict(X[rows])
+        for segment, model in self.models.items():
+            rows = np.flatnonzero(segments == segment)
+            if len(rows):
+                predictions[rows] = model.predict(X[rows])
+        return predictions
+
+    def set_threads(self, n_jobs: int) -> None:
+        """Set the XGBoost threads of every sub-model, e.g. for serving"""
+        for model in self.models.values():
+            model.set_params(n_jobs=n_jobs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Segment feature, kept segments and the per-segment training report"""
+        return {
+            'segment_by': self.segment_by,
+            'segments': sorted(self.models),
+            'report': self.report
+        }
@@ -0,0 +1,79 @@
+"""
+Training matrices and targets in named shared memory for worker processes
+"""
+
+import logging
+import numpy as np
+from multiprocessing import shared_memory
+from scipy import sparse
+from typing import Dict, List, Any, Tuple, Union
+
+SharedArray = Union[np.ndarray, sparse.csr_matrix]
+
+class SharedTrainingData:
+    """Copies arrays (dense, or CSR as its three component arrays) into shared memory once
+
+    Worker processes receive only `spec`, a small picklable description of the blocks,
+    and attach to them with attach_training_data() instead of unpickling their own copy
+    of the matrix for every task. The creating process owns the blocks and unlinks them
+    in close(); use it as a context manager around the pool.
+    """
+
+    def __init__(self, arrays: Dict[str, SharedArray]):
+        self.spec: Dict[str, Dict[str, Any]] = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+        try:
+            for name, value in arrays.items():
+                if sparse.issparse(value):
+                    value = sparse.csr_matrix(value)
+                    parts = {part: self._share(getattr(value, part)) for part in ('data', 'indices', 'indptr')}
+                    self.spec[name] = {'format': 'csr', 'shape': value.shape, 'parts': parts}
+                else:
+                    self.spec[name] = {'format': 'dense', 'shape': np.shape(value),
+                                       'parts': {'values': self._share(np.asarray(value))}}
+        except Exception:
+            self.close()
+            raise
+        self.logger.debug(f"Shared {len(arrays)} arrays in {len(self._blocks)} blocks ({self.nbytes / 1024 ** 2:.1f} MB)")
+
+    def _share(self, array: np.ndarray) -> Tuple[str, Tuple[int, ...], str]:
+        """Copy one array into a new block and return (block name, shape, dtype)"""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self._blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        return block.name, array.shape, array.dtype.str
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    def close(self) -> None:
+        """Release and unlink every block"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedTrainingData':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def attach_training_data(spec: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, SharedArray], List[shared_memory.SharedMemory]]:
+    """Zero-copy views of shared arrays; the returned blocks must stay open while the views are used"""
+    blocks, arrays = [], {}
+    for name, entry in spec.items():
+        parts = {}
+        for part, (block_name, shape, dtype) in entry['parts'].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            parts[part] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        if entry['format'] == 'csr':
+            arrays[name] = sparse.csr_matrix((parts['data'], parts['indices'], parts['indptr']), shape=entry['shape'],
+                                             copy=False)
+        else:
+            arrays[name] = parts['values']
+    return arrays, blocks
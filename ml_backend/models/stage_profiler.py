@@ -0,0 +1,92 @@
+"""
+Wall time, CPU time and peak memory per stage of a training run
+"""
+
+import os
+import time
+import logging
+import resource
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional
+
+def peak_rss_mb() -> float:
+    """Peak resident memory since the last reset; VmHWM where available, as ru_maxrss survives exec on Linux"""
+    peak = _read_status_mb('VmHWM:')
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def reset_peak_rss() -> bool:
+    """Restart the VmHWM peak at the current RSS; False where the kernel does not support it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _read_status_mb(field: str) -> Optional[float]:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def cpu_seconds() -> float:
+    """User + system CPU of this process, its threads and its finished child processes"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+class StageProfiler:
+    """Records wall time, CPU time and peak RSS of named stages
+
+    Stages are entered with `with profiler.stage('name'):` and appended in the order
+    they finish. The peak is reset when a stage starts, so each stage reports its own
+    peak instead of the run's; a nested stage's peak also counts towards its parent.
+    Where the peak cannot be reset (non-Linux), peaks are process lifetime maxima.
+    """
+
+    def __init__(self):
+        self.stages: List[Dict[str, Any]] = []
+        self._open_peaks: List[float] = []  # Peak seen so far by each open stage, outermost first
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def reset(self) -> None:
+        """Start a new run"""
+        self.stages = []
+        self._open_peaks = []
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Profile the enclosed block; the yielded record may be updated, e.g. with 'rows'"""
+        if self._open_peaks:
+            self._open_peaks[-1] = max(self._open_peaks[-1], peak_rss_mb())
+        reset_peak_rss()
+        self._open_peaks.append(0.0)
+
+        record = {'stage': name, 'depth': len(self._open_peaks) - 1, 'rows': rows}
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        try:
+            yield record
+        finally:
+            peak = max(self._open_peaks.pop(), peak_rss_mb())
+            if self._open_peaks:
+                self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+
+            record.update({
+                'wall_time': round(time.perf_counter() - wall_start, 4),
+                'cpu_time': round(cpu_seconds() - cpu_start, 4),
+                'peak_rss_mb': round(peak, 1)
+            })
+            self.stages.append(record)
+            self.logger.info(f"Stage {name}: {record['wall_time']:.2f}s wall, {record['cpu_time']:.2f}s CPU, "
+                             f"peak {record['peak_rss_mb']:.1f} MB")
+
+    def total_time(self) -> float:
+        """Wall time of the run; nested stages lie within their parent's time"""
+        return round(sum(record['wall_time'] for record in self.stages if record['depth'] == 0), 4)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Copies of the stage records, e.g. for store_training_stages()"""
+        return [dict(record) for record in self.stages]
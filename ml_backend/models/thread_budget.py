@@ -0,0 +1,57 @@
+"""
+Central core budget for nested parallelism in training, prediction and feature transforms
+
+The budget limits oversubscription (workers x threads beyond the available cores); it
+does not make any single fit faster.
+"""
+
+import os
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+def available_cores() -> int:
+    """Cores this process may run on (CPU affinity / container limits where the OS reports them)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+class ThreadBudget:
+    """Splits a fixed number of cores between outer workers and the threads inside each
+
+    Outer parallelism (concurrent CV folds, feature-transform processes) times the
+    XGBoost/BLAS threads each worker runs never exceeds total_cores, instead of every
+    level defaulting to all cores. Defaults: training runs one fit at a time on all
+    cores, serving predicts single rows on one thread so concurrent API requests do not
+    contend, and transform processes get one thread each.
+    """
+
+    def __init__(self, total_cores: Optional[int] = None, search_workers: int = 1,
+                 prediction_threads: int = 1, transform_workers: Optional[int] = None):
+        self.total_cores = max(1, total_cores or available_cores())
+        self.search_workers = max(1, min(search_workers, self.total_cores))  # Concurrent fits in searches and CV
+        self.prediction_threads = max(1, min(prediction_threads, self.total_cores))  # XGBoost threads of served models
+        self.transform_workers = max(1, min(transform_workers or self.total_cores, self.total_cores))
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def training_threads(self) -> int:
+        """XGBoost threads for a fit that runs alone"""
+        return self.total_cores
+
+    def split(self, n_tasks: int, max_workers: Optional[int] = None) -> Tuple[int, int]:
+        """(workers, threads per worker) for n_tasks independent jobs, with workers x threads <= total_cores"""
+        workers = max(1, min(n_tasks, max_workers or self.search_workers, self.total_cores))
+        return workers, max(1, self.total_cores // workers)
+
+    def transform_split(self, n_chunks: int, n_jobs: Optional[int] = None) -> Tuple[int, int]:
+        """(processes, threads per process) for a chunked feature transform"""
+        return self.split(n_chunks, max_workers=n_jobs or self.transform_workers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Budget settings as keyword arguments of the constructor"""
+        return {
+            'total_cores': self.total_cores,
+            'search_workers': self.search_workers,
+            'prediction_threads': self.prediction_threads,
+            'transform_workers': self.transform_workers
+        }
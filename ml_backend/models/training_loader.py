@@ -0,0 +1,139 @@
+"""
+Column-projected, chunked loader for training listings
+"""
+
+import time
+import sqlite3
+import logging
+import pandas as pd
+from datetime import datetime
+from pandas.api.types import union_categoricals
+from typing import List, Any, Optional, Iterator, Tuple
+from .schema import compact_frame, frame_memory_bytes
+
+class TrainingDataLoader:
+    """Streams training listings from SQLite in chunks with only the requested columns
+
+    Each chunk is converted to compact dtypes as it arrives, so the loaded frame never
+    holds every column, or every row as Python strings, at once. Rows can be limited to
+    a scrape-time window, to rows written after a point in time, and to a deterministic
+    sample: a listing's id decides whether it is sampled, so repeated passes over the
+    same window return the same rows.
+    """
+
+    PRICE_FILTER = "price IS NOT NULL AND price > 1000 AND price < 200000"
+    # Multiplicative hash spreading ids over the sampling buckets
+    SAMPLE_HASH = 2654435761
+    SAMPLE_BUCKETS = 1000000
+
+    def __init__(self, db_path: str = 'data/vehicle_listings.db', columns: Optional[List[str]] = None,
+                 chunk_size: int = 50000, compact_dtypes: bool = True, window_days: float = 30):
+        self.db_path = db_path
+        self.columns = columns  # None selects every column
+        self.chunk_size = chunk_size
+        self.compact_dtypes = compact_dtypes
+        self.window_days = window_days  # Default window when no start is given
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.last_load_stats = {}
+
+    def _table_columns(self, conn: sqlite3.Connection) -> List[str]:
+        """Columns of the listings table in this database"""
+        return [row[1] for row in conn.execute("PRAGMA table_info(vehicle_listings)")]
+
+    def _query(self, conn: sqlite3.Connection, columns: Optional[List[str]], start: Optional[datetime],
+               end: Optional[datetime], since: Optional[datetime], sample_ratio: float,
+               order_by_id: bool) -> Tuple[str, List[Any]]:
+        """SELECT statement and parameters for a window, sample and column projection"""
+        if columns is None:
+            select = '*'
+        else:
+            # Columns an older database lacks are left out rather than failing the query
+            available = set(self._table_columns(conn))
+            select = ', '.join(column for column in dict.fromkeys(columns) if column in available)
+
+        conditions, params = [self.PRICE_FILTER], []
+        if start is None:
+            conditions.append("scraped_at > datetime('now', ?)")
+            params.append(f'-{self.window_days} days')
+        else:
+            conditions.append("scraped_at > ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("scraped_at <= ?")
+            params.append(end)
+        if since is not None:
+            # processed_at is written by SQLite's CURRENT_TIMESTAMP, which is UTC
+            conditions.append("processed_at > ?")
+            params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+        if sample_ratio < 1.0:
+            conditions.append(f"abs(id * {self.SAMPLE_HASH}) % {self.SAMPLE_BUCKETS} < ?")
+            params.append(int(sample_ratio * self.SAMPLE_BUCKETS))
+
+        query = f"SELECT {select} FROM vehicle_listings WHERE {' AND '.join(conditions)}"
+        if order_by_id:
+            query += " ORDER BY id"
+        return query, params
+
+    def _iter_raw(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  since: Optional[datetime] = None, sample_ratio: float = 1.0,
+                  columns: Optional[List[str]] = None, order_by_id: bool = False) -> Iterator[pd.DataFrame]:
+        """Chunks of a window as read from SQLite, before dtype compaction"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            query, params = self._query(conn, self.columns if columns is None else columns,
+                                        start, end, since, sample_ratio, order_by_id)
+            yield from pd.read_sql_query(query, conn, params=params, chunksize=self.chunk_size)
+        finally:
+            conn.close()
+
+    def iter_frames(self, **window: Any) -> Iterator[pd.DataFrame]:
+        """Chunks of at most chunk_size rows, in compact dtypes when enabled
+
+        Window keys: start/end bound scraped_at (default: the last window_days), since
+        bounds processed_at (UTC), sample_ratio keeps that share of listings, columns
+        overrides the loader's projection and order_by_id fixes the row order.
+        """
+        for chunk in self._iter_raw(**window):
+            yield compact_frame(chunk) if self.compact_dtypes else chunk
+
+    def load(self, **window: Any) -> pd.DataFrame:
+        """All chunks of a window (see iter_frames) as one frame"""
+        start = time.perf_counter()
+        frames, raw_bytes = [], 0
+        for chunk in self._iter_raw(**window):
+            raw_bytes += frame_memory_bytes(chunk)
+            frames.append(compact_frame(chunk) if self.compact_dtypes else chunk)
+
+        df = concat_frames(frames)
+        self.last_load_stats = {
+            'rows': len(df),
+            'chunks': len(frames),
+            'columns': len(df.columns),
+            'raw_bytes': raw_bytes,
+            'loaded_bytes': frame_memory_bytes(df),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+        self.logger.info(f"Loaded {len(df)} rows x {len(df.columns)} columns in {len(frames)} chunks "
+                         f"({self.last_load_stats['seconds']}s)")
+        return df
+
+    def count(self, **window: Any) -> int:
+        """Number of rows in a window (see iter_frames)"""
+        window.pop('columns', None)
+        with sqlite3.connect(self.db_path) as conn:
+            query, params = self._query(conn, None, window.get('start'), window.get('end'), window.get('since'),
+                                        window.get('sample_ratio', 1.0), False)
+            return conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps category columns categorical when chunks saw different categories"""
+    if not frames:
+        return pd.DataFrame()
+
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
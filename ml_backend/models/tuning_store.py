@@ -0,0 +1,160 @@
+"""
+Persisted hyperparameter tuning results and the policy for reusing them
+"""
+
+import json
+import sqlite3
+import logging
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+def data_profile(X: Any, y: np.ndarray) -> Dict[str, Any]:
+    """Fingerprint of a training set: size, width and target distribution"""
+    y = np.asarray(y, dtype=np.float64)
+    return {
+        'n_samples': int(X.shape[0]),
+        'n_features': int(X.shape[1]),
+        'target_mean': float(np.mean(y)),
+        'target_std': float(np.std(y)),
+        'target_quantiles': [float(q) for q in np.quantile(y, [0.1, 0.25, 0.5, 0.75, 0.9])]
+    }
+
+class TuningStore:
+    """SQLite log of hyperparameter searches: best params, search space, data profile and scores"""
+
+    def __init__(self, db_path: str = 'data/vehicle_listings.db'):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create the tuning results table"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tuning_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    strategy TEXT NOT NULL,
+                    search_space TEXT NOT NULL,
+                    best_params TEXT NOT NULL,
+                    best_score REAL,
+                    data_profile TEXT NOT NULL,
+                    report TEXT,
+                    created_at TIMESTAMP
+                )
+            ''')
+            conn.commit()
+
+    def record(self, strategy: str, search_space: Dict[str, List[Any]], best_params: Dict[str, Any],
+               best_score: float, profile: Dict[str, Any], report: Optional[Dict[str, Any]] = None) -> None:
+        """Store the outcome of one search"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO tuning_results
+                (strategy, search_space, best_params, best_score, data_profile, report, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (strategy, json.dumps(search_space), json.dumps(best_params), best_score,
+                  json.dumps(profile), json.dumps(report or {}, default=str), datetime.now()))
+            conn.commit()
+
+        self.logger.info(f"Recorded {strategy} tuning result: {best_params} (score {best_score:.2f})")
+
+    def get_latest(self) -> Optional[Dict[str, Any]]:
+        """Most recent search result, or None before the first search"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('''
+                SELECT strategy, search_space, best_params, best_score, data_profile, report, created_at
+                FROM tuning_results ORDER BY id DESC LIMIT 1
+            ''').fetchone()
+
+        if row is None:
+            return None
+
+        strategy, search_space, best_params, best_score, profile, report, created_at = row
+        return {
+            'strategy': strategy,
+            'search_space': json.loads(search_space),
+            'best_params': json.loads(best_params),
+            'best_score': best_score,
+            'data_profile': json.loads(profile),
+            'report': json.loads(report) if report else {},
+            'created_at': datetime.fromisoformat(str(created_at))
+        }
+
+    def get_history(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Recent search results, newest first"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT strategy, best_params, best_score, data_profile, created_at
+                FROM tuning_results ORDER BY id DESC LIMIT ?
+            ''', (limit,)).fetchall()
+
+        return [
+            {'strategy': strategy, 'best_params': json.loads(best_params), 'best_score': best_score,
+             'n_samples': json.loads(profile)['n_samples'], 'created_at': created_at}
+            for strategy, best_params, best_score, profile, created_at in rows
+        ]
+
+class TuningPolicy:
+    """Decides between reusing the last best params, a local search around them, or a full search
+
+    Growth is measured against the data the last search ran on; drift is the largest
+    shift of a target quantile in units of the previous target standard deviation.
+    """
+
+    def __init__(self, reuse_growth: float = 0.1, search_growth: float = 0.5,
+                 reuse_drift: float = 0.05, search_drift: float = 0.2, max_age_days: float = 30):
+        self.reuse_growth = reuse_growth  # Up to this growth the previous params are reused as is
+        self.search_growth = search_growth  # Beyond this growth a full search runs
+        self.reuse_drift = reuse_drift
+        self.search_drift = search_drift
+        self.max_age_days = max_age_days  # Results older than this always trigger a full search
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def decide(self, previous: Optional[Dict[str, Any]], profile: Dict[str, Any],
+               search_space: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """Decision dict with 'action' ('reuse', 'local' or 'search') and the measurements behind it"""
+        if previous is None:
+            return {'action': 'search', 'reason': 'no previous tuning result'}
+
+        previous_profile = previous['data_profile']
+        growth = abs(profile['n_samples'] / max(previous_profile['n_samples'], 1) - 1)
+        drift = self.target_drift(previous_profile, profile)
+        age_days = (datetime.now() - previous['created_at']).total_seconds() / 86400
+        decision = {'growth': round(growth, 4), 'drift': round(drift, 4), 'age_days': round(age_days, 2)}
+
+        if previous['search_space'] != search_space:
+            decision.update(action='search', reason='search space changed')
+        elif age_days > self.max_age_days:
+            decision.update(action='search', reason='tuning result expired')
+        elif growth > self.search_growth or drift > self.search_drift:
+            decision.update(action='search', reason='data growth or drift above search threshold')
+        elif growth > self.reuse_growth or drift > self.reuse_drift:
+            decision.update(action='local', reason='data growth or drift above reuse threshold')
+        else:
+            decision.update(action='reuse', reason='data close to last search')
+
+        self.logger.info(f"Tuning decision: {decision}")
+        return decision
+
+    @staticmethod
+    def target_drift(previous: Dict[str, Any], current: Dict[str, Any]) -> float:
+        """Largest target quantile shift in previous standard deviations"""
+        scale = previous['target_std'] or 1.0
+        shifts = np.abs(np.subtract(current['target_quantiles'], previous['target_quantiles'])) / scale
+        return float(shifts.max())
+
+    @staticmethod
+    def local_space(best_params: Dict[str, Any], search_space: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Each parameter's best value and its neighbours in the search space"""
+        space = {}
+        for name, values in search_space.items():
+            if name not in best_params or best_params[name] not in values:
+                space[name] = values
+                continue
+            position = values.index(best_params[name])
+            space[name] = values[max(0, position - 1):position + 2]
+        return space
@@ -6,13 +6,14 @@ import os
 import sys
 import logging
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from config import MODEL_CONFIG
 from models import VehiclePriceModel
 from utils.data_storage import DataStorage
 
@@ -20,9 +21,10 @@ class ModelRetrainer:
     """Handles periodic retraining of the vehicle pricing model"""
     
     def __init__(self, config: Dict[str, Any] = None):
-        self.config = config or self._load_default_config()
+        # Model settings come from config.MODEL_CONFIG unless the retraining config overrides them
+        self.config = {**MODEL_CONFIG, **(config or self._load_default_config())}
         self.data_storage = DataStorage(self.config['database_path'])
-        self.price_model = VehiclePriceModel(self.config['model_path'])
+        self.price_model = VehiclePriceModel.from_config(self.config['model_path'], self.config)
         self.logger = logging.getLogger(__name__)
         
     def _load_default_config(self) -> Dict[str, Any]:
@@ -35,10 +37,12 @@ class ModelRetrainer:
             'performance_threshold': 0.1,  # 10% degradation threshold
             'retraining_interval_days': 7,
             'data_freshness_days': 30,
-            'cross_validation_folds': 5,
-            'hyperparameter_tuning': True,
             'model_comparison_metrics': ['mae', 'rmse', 'r2'],
-            'backup_old_models': True
+            'backup_old_models': True,
+            'incremental_mode': 'continue',  # 'continue' adds trees, 'update' refreshes leaf values
+            'incremental_new_trees': 100,
+            'incremental_max_degradation': 0.05,  # Larger validation MAE increases fall back to a full retrain
+            'min_incremental_samples': 100
         }
     
     def should_retrain(self) -> Dict[str, Any]:
@@ -101,8 +105,13 @@ class ModelRetrainer:
             if self.config['backup_old_models'] and os.path.exists(self.config['model_path']):
                 backup_path = self._backup_current_model()
             
+            # The new model loads and prepares the data, so its profiler covers every stage and
+            # its engineer, which is saved alongside its booster, is the one fitted
+            new_model = VehiclePriceModel.from_config(self.config['model_path'], self.config,
+                                                      tuning_store_path=self.config['database_path'])
+            
             # Load training data
-            training_data = self._load_training_data()
+            training_data = self._load_training_data(new_model)
             
             if len(training_data) < self.config['min_training_samples']:
                 return {
@@ -111,14 +120,12 @@ class ModelRetrainer:
                     'min_required': self.config['min_training_samples']
                 }
             
-            # Prepare data
-            X, y = self.price_model.prepare_data(training_data)
+            X, y = new_model.prepare_data(training_data)
             
             # Cross-validate current model performance (if exists)
             baseline_metrics = self._get_baseline_metrics()
             
             # Train new model
-            new_model = VehiclePriceModel(self.config['model_path'])
             training_metrics = new_model.train(
                 X, y, 
                 optimize_params=self.config['hyperparameter_tuning']
@@ -132,8 +139,9 @@ class ModelRetrainer:
                 # Save new model
                 new_model.save_model()
                 
-                # Store metrics
-                self.data_storage.store_training_metrics(training_metrics)
+                # Store metrics with the run's wall time and stage breakdown
+                training_metrics['training_time'] = new_model.profiler.total_time()
+                self.data_storage.store_training_metrics(training_metrics, stages=new_model.profiler.to_records())
                 
                 # Log success
                 self.logger.info(f"Model retrained successfully: {training_metrics}")
@@ -170,6 +178,67 @@ class ModelRetrainer:
                 'error': str(e)
             }
     
+    def refresh_model(self, mode: Optional[str] = None) -> Dict[str, Any]:
+        """Update the saved model with listings scraped since it was saved
+        
+        Continues boosting from (or refreshes the leaves of) the saved booster, which is
+        cheap enough to run hourly. Falls back to a full retrain when the feature schema
+        changed, the update degrades validation MAE or the model has segment sub-models.
+        """
+        mode = mode or self.config['incremental_mode']
+        model_path = self.config['model_path']
+        if not os.path.exists(model_path):
+            return self.retrain_model(force=True)
+        
+        try:
+            model = VehiclePriceModel.from_config(model_path, self.config,
+                                                  tuning_store_path=self.config['database_path'])
+            model.load_model()
+            
+            saved_at = datetime.fromtimestamp(os.path.getmtime(model_path), tz=timezone.utc)
+            new_data = model.load_training_data(self.config['database_path'], since=saved_at)
+            if len(new_data) < self.config['min_incremental_samples']:
+                return {
+                    'success': False,
+                    'message': f'Not enough new listings since {saved_at:%Y-%m-%d %H:%M} UTC: {len(new_data)}',
+                    'min_required': self.config['min_incremental_samples']
+                }
+            
+            X, y = model.prepare_data(new_data, refit_features=False)
+            incremental = model.train_incremental(
+                X, y, mode=mode,
+                n_new_trees=self.config['incremental_new_trees'],
+                max_degradation=self.config['incremental_max_degradation']
+            )
+            
+            if not incremental['applied']:
+                self.logger.info(f"Incremental {mode} not applied ({incremental['reason']}), running full retrain")
+                result = self.retrain_model(force=True)
+                result['incremental'] = incremental
+                return result
+            
+            if self.config['backup_old_models']:
+                self._backup_current_model()
+            model.save_model()
+            model.model_metrics['training_time'] = model.profiler.total_time()
+            self.data_storage.store_training_metrics(model.model_metrics, stages=model.profiler.to_records())
+            
+            return {
+                'success': True,
+                'message': f'Model refreshed incrementally ({mode})',
+                'metrics': model.model_metrics,
+                'incremental': incremental,
+                'training_samples': len(new_data)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error during incremental refresh: {str(e)}")
+            return {
+                'success': False,
+                'message': f'Incremental refresh failed: {str(e)}',
+                'error': str(e)
+            }
+    
     def _get_model_age(self) -> int:
         """Get age of current model in days"""
         try:
@@ -253,9 +322,10 @@ class ModelRetrainer:
         except Exception as e:
             return {'volume': 0, 'sufficient': False, 'message': f'Error checking data volume: {str(e)}'}
     
-    def _load_training_data(self) -> pd.DataFrame:
+    def _load_training_data(self, model: Optional[VehiclePriceModel] = None) -> pd.DataFrame:
         """Load training data for retraining"""
-        return self.price_model.load_training_data(self.config['database_path'])
+        return (model or self.price_model).load_training_data(self.config['database_path'],
+                                                              sample_ratio=self.config['training_sample_ratio'])
     
     def _get_baseline_metrics(self) -> Optional[Dict[str, float]]:
         """Get baseline model metrics"""
@@ -349,8 +419,14 @@ class ModelRetrainer:
                 result = self.retrain_model()
                 self.logger.info(f"Scheduled retraining result: {result}")
             
+            def refresh_job():
+                result = self.refresh_model()
+                self.logger.info(f"Scheduled refresh result: {result}")
+            
             # Parse cron-like schedule (simplified)
-            if cron_schedule == "0 2 * * 0":  # Weekly
+            if cron_schedule == "0 * * * *":  # Hourly incremental refresh
+                schedule.every().hour.do(refresh_job)
+            elif cron_schedule == "0 2 * * 0":  # Weekly
                 schedule.every().sunday.at("02:00").do(retrain_job)
             elif cron_schedule == "0 2 * * *":  # Daily
                 schedule.every().day.at("02:00").do(retrain_job)
@@ -359,7 +435,7 @@ class ModelRetrainer:
             
             while True:
                 schedule.run_pending()
-                time.sleep(3600)  # Check every hour
+                time.sleep(60)  # Check every minute
                 
         except ImportError:
             self.logger.error("Schedule library not available for automatic retraining")
@@ -371,8 +447,12 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Vehicle Price Model Retrainer')
-    parser.add_argument('--action', choices=['check', 'retrain', 'schedule'], 
+    parser.add_argument('--action', choices=['check', 'retrain', 'refresh', 'schedule'], 
                        default='check', help='Action to perform')
+    parser.add_argument('--mode', choices=['continue', 'update'],
+                       help='Incremental refresh mode (default from config)')
+    parser.add_argument('--schedule', type=str, default="0 2 * * 0",
+                       help='Cron-like schedule: "0 2 * * 0" weekly, "0 2 * * *" daily, "0 * * * *" hourly refresh')
     parser.add_argument('--force', action='store_true', 
                        help='Force retraining even if not needed')
     parser.add_argument('--config', type=str, help='Path to config file')
@@ -390,9 +470,13 @@ def main():
         result = retrainer.retrain_model(force=args.force)
         print(f"Retraining result: {result}")
         
+    elif args.action == 'refresh':
+        result = retrainer.refresh_model(mode=args.mode)
+        print(f"Refresh result: {result}")
+        
     elif args.action == 'schedule':
         print("Starting scheduled retraining...")
-        retrainer.schedule_retraining()
+        retrainer.schedule_retraining(args.schedule)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
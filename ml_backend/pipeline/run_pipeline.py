@@ -16,21 +16,27 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from config import MODEL_CONFIG
 from scraper import CarGurusScraper, AutoTraderScraper
 from models import VehiclePriceModel, VehicleFeatureEngineer
 from utils.data_storage import DataStorage
 from utils.deduplication import VehicleDeduplicator
+from utils.vin_decoder import VINDecoder
 
 class VehiclePricingPipeline:
     """Autonomous vehicle pricing pipeline"""
     
     def __init__(self, config: Dict[str, Any] = None):
-        self.config = config or self._load_default_config()
+        # Model settings come from config.MODEL_CONFIG unless the pipeline config overrides them
+        self.config = {**MODEL_CONFIG, **(config or self._load_default_config())}
         self.setup_logging()
         
         self.data_storage = DataStorage(self.config['database_path'])
         self.deduplicator = VehicleDeduplicator()
-        self.price_model = VehiclePriceModel(self.config['model_path'])
+        self.vin_decoder = VINDecoder(self.config['database_path'])
+        self.price_model = VehiclePriceModel.from_config(self.config['model_path'], self.config,
+                                                         feature_store_path=self.config['database_path'],
+                                                         tuning_store_path=self.config['database_path'])
         
         # Initialize scrapers
         self.scrapers = {
@@ -58,6 +64,7 @@ class VehiclePricingPipeline:
                 'mileage_max': 150000
             },
             'model_update_threshold': 0.1,  # Retrain if MAE increases by 10%
+            'refit_features': True,  # False reuses the saved feature engineer and stored feature rows
             'log_level': 'INFO'
         }
     
@@ -111,6 +118,9 @@ class VehiclePricingPipeline:
         
         # Deduplicate and clean data
         if all_listings:
+            # Decode VINs offline: fill make/year/country and reject malformed VINs
+            all_listings = self.vin_decoder.enrich_listings(all_listings)
+            
             self.logger.info("Deduplicating and cleaning data")
             clean_listings = self.deduplicator.deduplicate_listings(all_listings)
             
@@ -131,27 +141,59 @@ class VehiclePricingPipeline:
         self.logger.info("Starting model training cycle")
         
         try:
+            external_memory = self.config['external_memory']
+            self.price_model.profiler.reset()
+            
             # Load training data
-            training_data = self.price_model.load_training_data(self.config['database_path'])
+            if external_memory:
+                sample_count = self.data_storage.get_training_data_volume()
+            else:
+                training_data = self.price_model.load_training_data(
+                    self.config['database_path'],
+                    sample_ratio=self.config['training_sample_ratio']
+                )
+                sample_count = len(training_data)
             
-            if len(training_data) < 100:
+            if sample_count < 100:
                 self.logger.warning("Insufficient training data, skipping training")
-                return {'error': 'insufficient_data', 'sample_count': len(training_data)}
+                return {'error': 'insufficient_data', 'sample_count': sample_count}
             
-            # Prepare data
-            X, y = self.price_model.prepare_data(training_data)
+            # Reusing stored feature rows needs the fitted engineer of the saved model
+            refit_features = self.config.get('refit_features', True)
+            if not refit_features and not self.price_model.model and os.path.exists(self.config['model_path']):
+                self.price_model.load_model()
             
-            # Train model
-            metrics = self.price_model.train(X, y, optimize_params=True)
+            if external_memory:
+                # Streamed from SQLite into disk-cached quantized pages; no hyperparameter search
+                metrics = self.price_model.train_external_memory(
+                    self.config['database_path'],
+                    chunk_size=self.config['external_memory_chunk_size'],
+                    refit_features=refit_features
+                )
+            else:
+                # Prepare data
+                X, y = self.price_model.prepare_data(training_data, refit_features=refit_features)
+                
+                # Train model
+                metrics = self.price_model.train(X, y, optimize_params=True)
             
             # Save model
             self.price_model.save_model()
             
-            # Store training metrics
-            self.data_storage.store_training_metrics(metrics)
+            # Feature rows of previous engineer versions can no longer be served
+            if self.price_model.feature_store is not None:
+                self.price_model.feature_store.prune(self.price_model.feature_engineer.get_version())
+            
+            # Store training metrics with the run's wall time and stage breakdown
+            profiler = self.price_model.profiler
+            metrics['training_time'] = profiler.total_time()
+            self.data_storage.store_training_metrics(metrics, stages=profiler.to_records())
             
             self.logger.info(f"Training complete: {metrics}")
-            return {'success': True, 'metrics': metrics}
+            segments = self.price_model.segments
+            return {'success': True, 'metrics': metrics, 'memory': self.price_model.memory_report,
+                    'search': self.price_model.search_report, 'stages': profiler.to_records(),
+                    'segments': segments.to_dict() if segments is not None else None}
             
         except Exception as e:
             self.logger.error(f"Error in training cycle: {str(e)}")
@@ -173,16 +215,14 @@ class VehiclePricingPipeline:
                 self.logger.info("No new listings to predict")
                 return {'predicted_count': 0}
             
-            # Generate predictions
+            # Generate predictions in one batch, reusing stored feature rows
             predictions = []
-            for listing in recent_listings:
-                try:
-                    prediction = self.price_model.predict(listing)
-                    prediction['listing_id'] = listing['id']
-                    predictions.append(prediction)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error predicting for listing {listing.get('id')}: {str(e)}")
+            for listing, prediction in zip(recent_listings, self.price_model.predict_listings(recent_listings)):
+                if prediction is None:
+                    self.logger.error(f"Error predicting for listing {listing.get('id')}")
+                    continue
+                prediction['listing_id'] = listing['id']
+                predictions.append(prediction)
             
             # Store predictions
             stored_count = self.data_storage.store_predictions(predictions)
@@ -0,0 +1,60 @@
+"""
+Change detection by content hash when storing cleaned listings
+"""
+
+import sys
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.data_storage import DataStorage
+
+@pytest.fixture
+def storage(tmp_path) -> DataStorage:
+    return DataStorage(str(tmp_path / 'listings.db'))
+
+def listing(**fields) -> dict:
+    """A cleaned listing scraped two days ago, with fields overridden"""
+    base = {'vin': '1HGCM82633A004352', 'make': 'Honda', 'model': 'Accord', 'year': 2018, 'price': 18000,
+            'mileage': 40000, 'location': 'Irvine, CA', 'dealer_name': 'Irvine Honda',
+            'scraped_at': (datetime.now() - timedelta(days=2)).timestamp()}
+    return dict(base, **fields)
+
+def stored_rows(storage: DataStorage) -> list:
+    with sqlite3.connect(storage.db_path) as conn:
+        return conn.execute('SELECT vin, price, scraped_at, content_hash FROM vehicle_listings ORDER BY id').fetchall()
+
+def test_unchanged_listing_is_skipped(storage):
+    hour_ago = (datetime.now() - timedelta(hours=1)).timestamp()
+    assert storage.store_cleaned_listings([listing(scraped_at=hour_ago)]) == 1
+    before = stored_rows(storage)
+
+    # Same content again: the stored row is within refresh_after_hours, so nothing is written
+    assert storage.store_cleaned_listings([listing(scraped_at=datetime.now().timestamp())]) == 0
+    assert stored_rows(storage) == before
+
+def test_stale_unchanged_listing_refreshes_scraped_at(storage):
+    storage.store_cleaned_listings([listing()])
+    (_, _, scraped_at, content_hash), = stored_rows(storage)
+
+    assert storage.store_cleaned_listings([listing(scraped_at=datetime.now().timestamp())]) == 0
+    (_, _, refreshed_at, refreshed_hash), = stored_rows(storage)
+    assert refreshed_at > scraped_at and refreshed_hash == content_hash
+
+def test_changed_listing_updates_its_row(storage):
+    storage.store_cleaned_listings([listing()])
+    (_, _, _, content_hash), = stored_rows(storage)
+
+    assert storage.store_cleaned_listings([listing(price=17500)]) == 1
+    (vin, price, _, updated_hash), = stored_rows(storage)
+    assert (vin, price) == ('1HGCM82633A004352', 17500) and updated_hash != content_hash
+
+def test_listings_without_vin_match_by_content_hash(storage):
+    assert storage.store_cleaned_listings([listing(vin=None), listing(vin=None)]) == 1
+    assert storage.store_cleaned_listings([listing(vin=None, price=17500)]) == 1
+    assert len(stored_rows(storage)) == 2
@@ -0,0 +1,48 @@
+"""
+Union-find clustering of duplicate listings and the valid-VIN cannot-link
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.deduplication import UnionFind, VehicleDeduplicator
+from utils.vin_decoder import VINDecoder
+
+def make_vin(serial: str) -> str:
+    """Valid Toyota VIN with the given six-digit serial"""
+    vin = f"4T1BF1FK0EU{serial}"
+    return vin[:8] + VINDecoder.compute_check_digit(vin) + vin[9:]
+
+def listing(**fields) -> dict:
+    """The same used Camry as one dealer lists it, with fields overridden"""
+    base = {'vin': make_vin('000123'), 'make': 'Toyota', 'model': 'Camry', 'year': 2014, 'price': 15000,
+            'mileage': 60000, 'dealer_name': 'Best Toyota', 'location': 'Irvine, CA'}
+    return dict(base, **fields)
+
+def test_union_find_merges_transitively():
+    union_find = UnionFind(5)
+    union_find.union(0, 1)
+    union_find.union(1, 3)
+    assert union_find.find(0) == union_find.find(3)
+    assert union_find.groups() == [[0, 1, 3]]
+
+def test_union_find_refuses_conflicting_labels():
+    union_find = UnionFind(3, labels=['A', None, 'B'])
+    assert union_find.union(0, 1)
+    # 1 now carries label A through its set, so the chain to B is cut
+    assert not union_find.union(1, 2)
+    assert union_find.groups() == [[0, 1]]
+
+def test_same_vin_listings_cluster():
+    deduplicator = VehicleDeduplicator(n_jobs=1)
+    listings = [listing(), listing(price=15200, dealer_name='Best Toyota Irvine'), listing(vin='', model='Corolla')]
+    assert deduplicator.cluster_listings(listings) == [[0, 1]]
+
+def test_different_valid_vins_never_cluster():
+    deduplicator = VehicleDeduplicator(n_jobs=1)
+    listings = [listing(), listing(vin=make_vin('000124'))]
+    assert deduplicator.cluster_listings(listings) == []
+    assert len(deduplicator.deduplicate_listings(listings)) == 2
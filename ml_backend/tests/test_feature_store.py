@@ -0,0 +1,66 @@
+"""
+Feature store reuse, invalidation by content hash and pruning of old engineer versions
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.feature_engineering import VehicleFeatureEngineer
+from models.feature_store import FeatureStore
+from utils.synthetic_data import SyntheticListingGenerator
+
+@pytest.fixture(scope='module')
+def listings() -> pd.DataFrame:
+    generated, _ = SyntheticListingGenerator(seed=11).generate(120)
+    df = pd.DataFrame(generated)
+    df['id'] = np.arange(1, len(df) + 1)
+    df['content_hash'] = [f'hash-{i}' for i in df['id']]
+    return df
+
+@pytest.fixture(scope='module')
+def engineer(listings) -> VehicleFeatureEngineer:
+    engineer = VehicleFeatureEngineer()
+    engineer.fit_transform(listings)
+    return engineer
+
+def test_second_transform_reuses_stored_rows(tmp_path, listings, engineer):
+    """Unchanged listings hit the store and give the same matrix as a fresh transform"""
+    store = FeatureStore(str(tmp_path / 'features.db'))
+    first = store.transform(engineer, listings)
+    assert store.stats == {'hits': 0, 'misses': len(listings)}
+
+    second = store.transform(engineer, listings)
+    assert store.stats == {'hits': len(listings), 'misses': len(listings)}
+    assert (first != second).nnz == 0
+    assert (second != engineer.transform(listings)).nnz == 0
+
+def test_changed_and_uncacheable_rows_are_recomputed(tmp_path, listings, engineer):
+    """An edited content hash or an uncacheable row is a miss"""
+    store = FeatureStore(str(tmp_path / 'features.db'))
+    store.transform(engineer, listings)
+
+    changed = listings.copy()
+    changed.loc[0, 'content_hash'] = 'hash-edited'
+    cacheable = np.ones(len(changed), dtype=bool)
+    cacheable[1] = False
+    store.stats = {'hits': 0, 'misses': 0}
+    store.transform(engineer, changed, cacheable=cacheable)
+    assert store.stats == {'hits': len(listings) - 2, 'misses': 2}
+
+def test_prune_keeps_only_the_current_version(tmp_path, listings, engineer):
+    """Pruning drops rows of other engineer versions and keeps the current ones"""
+    store = FeatureStore(str(tmp_path / 'features.db'))
+    store.transform(engineer, listings)
+    assert store.prune(engineer.get_version()) == 0
+    assert store.prune('older-version') == len(listings)
+
+    store.stats = {'hits': 0, 'misses': 0}
+    store.transform(engineer, listings)
+    assert store.stats['misses'] == len(listings)
@@ -0,0 +1,68 @@
+"""
+Incremental model updates and the fallbacks that send the caller to a full retrain
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.price_model import VehiclePriceModel
+from utils.synthetic_data import SyntheticListingGenerator
+
+def make_listings(seed: int, n: int) -> pd.DataFrame:
+    """Synthetic listings with unique VINs per seed"""
+    generated, _ = SyntheticListingGenerator(seed=seed).generate(n)
+    return pd.DataFrame(generated)
+
+@pytest.fixture
+def trained_model(tmp_path):
+    """Model trained without a search on a small synthetic set"""
+    model = VehiclePriceModel(str(tmp_path / 'model.pkl'), thread_budget={'total_cores': 1})
+    X, y = model.prepare_data(make_listings(1, 400))
+    model.train(X, y, optimize_params=False)
+    return model
+
+@pytest.mark.parametrize('mode', ['continue', 'update'])
+def test_update_applied_within_tolerance(trained_model, mode):
+    """New rows from the same feature engineer update the booster in place"""
+    X, y = trained_model.prepare_data(make_listings(2, 200), refit_features=False)
+    result = trained_model.train_incremental(X, y, mode=mode, n_new_trees=20, max_degradation=10.0)
+    assert result['applied'] and not result['fallback']
+    assert len(trained_model.incremental_history) == 1
+
+def test_feature_schema_change_falls_back(trained_model):
+    """Rows from a refitted feature engineer no longer match the booster's columns"""
+    model = trained_model.model
+    X, y = trained_model.prepare_data(make_listings(3, 200), refit_features=True)
+    result = trained_model.train_incremental(X, y)
+    assert result['fallback'] and not result['applied']
+    assert result['reason'].startswith('feature schema changed')
+    assert trained_model.model is model
+
+def test_degraded_update_is_rejected(trained_model):
+    """An update whose holdout MAE is worse than allowed keeps the current model"""
+    model = trained_model.model
+    X, y = trained_model.prepare_data(make_listings(2, 200), refit_features=False)
+    result = trained_model.train_incremental(X, y, n_new_trees=20, max_degradation=-1.0)
+    assert result['fallback'] and not result['applied']
+    assert result['reason'].startswith('validation MAE degraded')
+    assert trained_model.model is model
+    assert trained_model.incremental_history == []
+
+def test_segment_sub_models_fall_back(tmp_path):
+    """Only the global booster could be updated, so a segmented model needs a full retrain"""
+    model = VehiclePriceModel(str(tmp_path / 'model.pkl'), thread_budget={'total_cores': 1},
+                              segmented={'segment_by': 'brand_tier', 'min_segment_samples': 50, 'max_workers': 1})
+    X, y = model.prepare_data(make_listings(1, 600))
+    model.train(X, y, optimize_params=False)
+    assert model.segments.models
+
+    X, y = model.prepare_data(make_listings(2, 200), refit_features=False)
+    result = model.train_incremental(X, y, max_degradation=10.0)
+    assert result['fallback'] and not result['applied']
+    assert 'sub-models' in result['reason']
@@ -0,0 +1,43 @@
+"""
+Row transformer against the batch transform for categories unseen in training
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.feature_engineering import VehicleFeatureEngineer
+from utils.synthetic_data import SyntheticListingGenerator
+
+@pytest.fixture(scope='module')
+def listings() -> pd.DataFrame:
+    generated, _ = SyntheticListingGenerator(seed=7).generate(300)
+    return pd.DataFrame(generated)
+
+@pytest.mark.parametrize('sparse_output', [True, False])
+def test_missing_native_category_matches_batch_path(listings, sparse_output):
+    """A category missing or unseen in training is a missing code in both paths"""
+    engineer = VehicleFeatureEngineer(sparse_output=sparse_output, categorical_encoding='native')
+    engineer.fit_transform(listings)
+    row_transformer = engineer.compile_row_transformer()
+
+    requests = listings.head(4).copy()
+    requests['fuel_type'] = [None, 'hydrogen', np.nan, requests['fuel_type'].iloc[3]]
+    assert 'unknown' not in set(listings['fuel_type'])
+
+    # The batch transform leaves the first three codes missing
+    column = next(column for feature, column, _ in row_transformer.code_index if feature == 'fuel_type')
+    expected = engineer.transform(requests)
+    if sparse_output:
+        stored = [column in expected[i].indices for i in range(len(requests))]
+        assert stored == [False, False, False, True]
+    else:
+        assert np.isnan(expected[:3, column]).all() and not np.isnan(expected[3, column])
+
+    assert row_transformer.verify(requests) == 0.0
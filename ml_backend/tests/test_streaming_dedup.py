@@ -0,0 +1,65 @@
+"""
+Streaming deduplication: window eviction, persisted VIN index and merge rules
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.streaming_dedup import StreamingDeduplicator
+from utils.vin_decoder import VINDecoder
+
+def make_vin(serial: str) -> str:
+    """Valid Toyota VIN with the given six-digit serial"""
+    vin = f"4T1BF1FK0EU{serial}"
+    return vin[:8] + VINDecoder.compute_check_digit(vin) + vin[9:]
+
+def listing(serial: str = '000123', **fields) -> dict:
+    """A used Camry as one dealer lists it, with fields overridden"""
+    base = {'vin': make_vin(serial), 'make': 'Toyota', 'model': 'Camry', 'year': 2014, 'price': 15000,
+            'mileage': 60000, 'dealer_name': 'Best Toyota', 'location': 'Irvine, CA', 'scraped_at': 1}
+    return dict(base, **fields)
+
+def event_types(events: list) -> list:
+    return [event['type'] for event in events]
+
+def test_window_evicts_oldest_records():
+    stream = StreamingDeduplicator(window_size=2)
+    stream.process_batch([listing(f'00000{i}', model=f'Model {i}') for i in range(3)])
+    assert len(stream._window) == 2 and stream.stats['evicted'] == 1
+    assert make_vin('000000') not in stream._vin_index
+
+    # Without a persistent index, an evicted vehicle comes back as new
+    assert event_types(stream.process_batch([listing('000000', model='Model 0')])) == ['new']
+
+def test_persisted_index_recognises_evicted_vins(tmp_path):
+    db_path = str(tmp_path / 'stream.db')
+    stream = StreamingDeduplicator(window_size=1, db_path=db_path)
+    first = stream.process_batch([listing('000001'), listing('000002', model='Corolla')])
+    assert stream._window.keys() == {first[1]['key']}
+
+    # A restart keeps the VIN -> key mapping and continues key numbering
+    stream = StreamingDeduplicator(window_size=1, db_path=db_path)
+    events = stream.process_batch([listing('000001', price=14000), listing('000003', model='Prius')])
+    assert event_types(events) == ['merged', 'new']
+    assert events[0]['key'] == first[0]['key'] and events[1]['key'] == 2
+    assert stream.stats['index_hits'] == 1
+
+def test_persisted_key_replaces_its_stale_window_record():
+    stream = StreamingDeduplicator()
+    relisted = listing(model='Corolla', year=2012, price=9000, mileage=90000, dealer_name='Other', location='Reno, NV')
+    events = stream.process_batch([listing(), relisted])
+    assert event_types(events) == ['new', 'merged']
+    assert list(stream._block_index) == [(2012, 'TOYOTA', 'COROLLA')]
+
+def test_different_valid_vins_are_not_merged():
+    stream = StreamingDeduplicator()
+    assert event_types(stream.process_batch([listing('000123'), listing('000124')])) == ['new', 'new']
+
+def test_merge_keeps_the_rescraped_price():
+    stream = StreamingDeduplicator()
+    events = stream.process_batch([listing(price=20000), listing(price=18000, scraped_at=2)])
+    assert event_types(events) == ['new', 'merged']
+    assert (events[1]['listing']['price'], events[1]['listing']['scraped_at']) == (18000, 2)
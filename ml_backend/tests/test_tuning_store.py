@@ -0,0 +1,57 @@
+"""
+Tuning policy decisions between reusing, locally refining or re-running a hyperparameter search
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.tuning_store import TuningStore, TuningPolicy, data_profile
+
+SEARCH_SPACE = {'max_depth': [4, 6, 8, 10], 'learning_rate': [0.03, 0.1, 0.3]}
+
+def make_profile(n_samples: int, shift: float = 0.0):
+    """Profile of a uniform target over [0, 10000) moved by shift"""
+    y = np.linspace(0, 10000, n_samples) + shift
+    return data_profile(np.zeros((n_samples, 5)), y)
+
+@pytest.fixture
+def previous(tmp_path):
+    """Last search result as stored and read back by the tuning store"""
+    store = TuningStore(str(tmp_path / 'tuning.db'))
+    store.record('full', SEARCH_SPACE, {'max_depth': 6, 'learning_rate': 0.1}, 1500.0, make_profile(1000))
+    return store.get_latest()
+
+@pytest.mark.parametrize('n_samples, shift, action', [
+    (1050, 0.0, 'reuse'),      # 5% growth, no drift
+    (1300, 0.0, 'local'),      # 30% growth
+    (1000, 300.0, 'local'),    # ~0.1 std drift
+    (2000, 0.0, 'search'),     # 100% growth
+    (1000, 1000.0, 'search'),  # ~0.35 std drift
+])
+def test_decision_follows_growth_and_drift(previous, n_samples, shift, action):
+    """Growth and drift below, between and above the reuse and search thresholds"""
+    assert TuningPolicy().decide(previous, make_profile(n_samples, shift), SEARCH_SPACE)['action'] == action
+
+def test_missing_changed_or_expired_results_trigger_search(previous):
+    """No result, a different search space or an expired result always run a full search"""
+    policy = TuningPolicy()
+    profile = make_profile(1000)
+    assert policy.decide(None, profile, SEARCH_SPACE)['action'] == 'search'
+
+    changed_space = dict(SEARCH_SPACE, max_depth=[4, 6])
+    assert policy.decide(previous, profile, changed_space)['reason'] == 'search space changed'
+
+    expired = dict(previous, created_at=datetime.now() - timedelta(days=45))
+    assert policy.decide(expired, profile, SEARCH_SPACE)['reason'] == 'tuning result expired'
+
+def test_local_space_keeps_neighbours_of_best_params():
+    """A local search covers each best value and its neighbours"""
+    space = TuningPolicy.local_space({'max_depth': 10, 'learning_rate': 0.1}, SEARCH_SPACE)
+    assert space == {'max_depth': [8, 10], 'learning_rate': [0.03, 0.1, 0.3]}
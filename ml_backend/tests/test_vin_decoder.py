@@ -0,0 +1,59 @@
+"""
+VIN check digits, manufacturer lookup, model-year decoding and the decode caches
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.vin_decoder import VINDecoder
+
+@pytest.fixture
+def decoder() -> VINDecoder:
+    return VINDecoder(db_path=None)
+
+def test_check_digit(decoder):
+    assert VINDecoder.compute_check_digit('1HGCM82633A004352') == '3'
+    assert decoder.decode('1HGCM82633A004352')['check_digit_valid']
+
+    # A North American VIN with a wrong check digit is rejected
+    decoded = decoder.decode('1HGCM82643A004352')
+    assert not decoded['valid'] and decoded['error'] == 'Check digit mismatch'
+
+def test_malformed_vins(decoder):
+    assert decoder.decode('')['error'] == 'Empty VIN'
+    assert decoder.decode('1HGCM8263')['error'].startswith('Invalid VIN length')
+    assert decoder.decode('1HGCM82633A00435O')['error'] == 'Invalid characters'
+
+def test_make_and_country_from_wmi(decoder):
+    decoded = decoder.decode('1HGCM82633A004352')
+    assert (decoded['make'], decoded['country']) == ('Honda', 'United States')
+    assert decoder.decode('JH4KA7561PC008269')['make'] == 'Acura'
+
+@pytest.mark.parametrize('vin, year', [
+    ('1HGCM82633A004352', 2003),  # Digit in position 7: 1980-2009 cycle
+    ('JH4KA7561PC008269', 1993),  # Imports follow position 7 too
+    ('WBA3A5C51CF256651', 2012),  # Letter in position 7: 2010-2039 cycle
+])
+def test_model_year_cycle(decoder, vin, year):
+    assert decoder.decode(vin)['model_year'] == year
+
+def test_decode_batch_reads_the_caches(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'vin.db')
+    vins = pd.Series(['1HGCM82633A004352', 'JH4KA7561PC008269', 'bad', None])
+    expected = VINDecoder(db_path=db_path).decode_batch(vins)
+
+    # A new decoder starts with an empty LRU, so every non-empty VIN comes from SQLite
+    decoder = VINDecoder(db_path=db_path)
+    decoded = []
+    decode_unique = decoder._decode_unique
+    monkeypatch.setattr(decoder, '_decode_unique', lambda unique: decoded.extend(unique) or decode_unique(unique))
+    result = decoder.decode_batch(vins)
+    assert decoded == ['']
+    assert result['valid'].tolist() == expected['valid'].tolist()
+    assert result['model_year'].tolist() == expected['model_year'].tolist()
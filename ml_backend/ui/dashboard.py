@@ -446,13 +446,15 @@ class VehiclePricingDashboard:
                 
                 # Detailed metrics table
                 st.subheader("Detailed Metrics")
-                display_columns = ['created_at', 'mae', 'rmse', 'r2', 'mape', 'training_samples']
+                display_columns = ['created_at', 'mae', 'rmse', 'r2', 'mape', 'training_samples', 'training_time']
                 available_columns = [col for col in display_columns if col in df.columns]
                 st.dataframe(df[available_columns])
             
             else:
                 st.info("No training history available")
             
+            self.render_training_stages()
+            
             # Feature importance (if available)
             st.subheader("Feature Importance")
             try:
@@ -472,6 +474,41 @@ class VehiclePricingDashboard:
         except Exception as e:
             st.error(f"Error loading model performance: {str(e)}")
     
+    def render_training_stages(self):
+        """Render wall time, CPU time and peak memory per training stage"""
+        st.subheader("Training Stages")
+        stages = self.data_storage.get_training_stages(limit=10)
+        
+        if not stages:
+            st.info("No training stage profiles available")
+            return
+        
+        df = pd.DataFrame(stages)
+        df['trained_at'] = pd.to_datetime(df['trained_at'])
+        latest = df[df['training_id'] == df['training_id'].max()]
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            times = latest.melt(id_vars='stage', value_vars=['wall_time', 'cpu_time'],
+                                var_name='measure', value_name='seconds')
+            fig = px.bar(times, x='stage', y='seconds', color='measure', barmode='group',
+                        title='Latest Run: Time per Stage')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            fig = px.bar(latest, x='stage', y='peak_rss_mb',
+                        title='Latest Run: Peak Memory per Stage (MB)')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Nested stages lie within their parent's time, so only outermost stages are stacked
+        top_level = df[df['depth'] == 0]
+        fig = px.bar(top_level, x='trained_at', y='wall_time', color='stage',
+                    title='Wall Time per Stage Across Runs')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(latest[['stage', 'wall_time', 'cpu_time', 'peak_rss_mb', 'rows']])
+    
     def render_data_management(self):
         """Render data management interface"""
         st.header("🗄️ Data Management")
@@ -4,5 +4,7 @@ Utility modules for the vehicle pricing pipeline
 
 from .data_storage import DataStorage
 from .deduplication import VehicleDeduplicator
+from .vin_decoder import VINDecoder
+from .streaming_dedup import StreamingDeduplicator
 
-__all__ = ['DataStorage', 'VehicleDeduplicator']
\ No newline at end of file
+__all__ = ['DataStorage', 'VehicleDeduplicator', 'VINDecoder', 'StreamingDeduplicator']
\ No newline at end of file
@@ -3,6 +3,8 @@ Data storage and management utilities
 """
 
 import sqlite3
+import hashlib
+import numpy as np
 import pandas as pd
 import json
 import logging
@@ -10,6 +12,44 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+# Listing columns that make up its content; scraped_at only records when it was seen
+LISTING_CONTENT_COLUMNS = [
+    'vin', 'make', 'model', 'year', 'price', 'mileage', 'body_type',
+    'fuel_type', 'transmission', 'drivetrain', 'exterior_color',
+    'interior_color', 'engine', 'features', 'location', 'dealer_name',
+    'listing_url', 'image_urls', 'source'
+]
+
+def _clean_value(value: Any) -> Any:
+    """Convert numpy scalars and NaN to plain Python values SQLite stores faithfully"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+def listing_row(listing: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values of a cleaned listing as stored in vehicle_listings"""
+    row = {column: _clean_value(listing.get(column)) for column in LISTING_CONTENT_COLUMNS}
+    # Empty VINs are unknown, not a shared key
+    row['vin'] = row['vin'] or None
+    row['features'] = json.dumps(listing.get('features', []))
+    row['image_urls'] = json.dumps(listing.get('image_urls', []))
+    return row
+
+def listing_content_hash(row: Dict[str, Any]) -> str:
+    """Stable hash of a listing's normalized content columns"""
+    content = []
+    for column in LISTING_CONTENT_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, float) and value.is_integer():
+            # 2020 and 2020.0 are the same year once stored
+            value = int(value)
+        content.append(value)
+    return hashlib.sha1(json.dumps(content, default=str).encode('utf-8')).hexdigest()
+
 class DataStorage:
     """Manages data storage for the vehicle pricing pipeline"""
     
@@ -64,10 +104,17 @@ class DataStorage:
                     image_urls TEXT,
                     source TEXT,
                     scraped_at TIMESTAMP,
-                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    content_hash TEXT
                 )
             ''')
             
+            # Databases created before content hashing lack the column
+            cursor.execute('PRAGMA table_info(vehicle_listings)')
+            if 'content_hash' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE vehicle_listings ADD COLUMN content_hash TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicle_listings_content_hash ON vehicle_listings (content_hash)')
+            
             # Predictions table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS price_predictions (
@@ -98,6 +145,23 @@ class DataStorage:
                 )
             ''')
             
+            # Per-stage timings and peak memory of each training run
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS training_stage_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    training_id INTEGER,
+                    stage TEXT,
+                    stage_order INTEGER,
+                    depth INTEGER,
+                    wall_time REAL,
+                    cpu_time REAL,
+                    peak_rss_mb REAL,
+                    rows INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (training_id) REFERENCES training_metrics (id)
+                )
+            ''')
+            
             # Scraping logs table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS scraping_logs (
@@ -145,49 +209,113 @@ class DataStorage:
             conn.commit()
             return stored_count
     
-    def store_cleaned_listings(self, listings: List[Dict[str, Any]]) -> int:
-        """Store cleaned and deduplicated listings"""
+    def store_cleaned_listings(self, listings: List[Dict[str, Any]], refresh_after_hours: float = 24) -> int:
+        """Store cleaned and deduplicated listings, writing only what changed
+        
+        Listings are matched to stored rows by VIN, or by content hash when they have
+        no VIN. Identical rows are skipped (their scraped_at is refreshed at most every
+        refresh_after_hours so they stay in the training window), changed rows update
+        only the columns that differ and unknown listings are inserted.
+        Returns the number of rows inserted or updated.
+        """
+        rows = []
+        for listing in listings:
+            try:
+                row = listing_row(listing)
+                row['scraped_at'] = datetime.fromtimestamp(listing.get('scraped_at', datetime.now().timestamp()))
+                row['content_hash'] = listing_content_hash(row)
+                rows.append(row)
+            except Exception as e:
+                self.logger.error(f"Error preparing cleaned listing: {str(e)}")
+        
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            
-            stored_count = 0
-            for listing in listings:
+            existing_by_vin = self._fetch_existing_listings(
+                cursor, 'vin', [row['vin'] for row in rows if row['vin']]
+            )
+            existing_by_hash = self._fetch_existing_listings(
+                cursor, 'content_hash', [row['content_hash'] for row in rows if not row['vin']], 'vin IS NULL'
+            )
+            
+            refresh_before = datetime.now() - timedelta(hours=refresh_after_hours)
+            counts = {'inserted': 0, 'updated': 0, 'refreshed': 0, 'unchanged': 0}
+            for row in rows:
                 try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO vehicle_listings (
-                            vin, make, model, year, price, mileage, body_type,
-                            fuel_type, transmission, drivetrain, exterior_color,
-                            interior_color, engine, features, location, dealer_name,
-                            listing_url, image_urls, source, scraped_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        listing.get('vin'),
-                        listing.get('make'),
-                        listing.get('model'),
-                        listing.get('year'),
-                        listing.get('price'),
-                        listing.get('mileage'),
-                        listing.get('body_type'),
-                        listing.get('fuel_type'),
-                        listing.get('transmission'),
-                        listing.get('drivetrain'),
-                        listing.get('exterior_color'),
-                        listing.get('interior_color'),
-                        listing.get('engine'),
-                        json.dumps(listing.get('features', [])),
-                        listing.get('location'),
-                        listing.get('dealer_name'),
-                        listing.get('listing_url'),
-                        json.dumps(listing.get('image_urls', [])),
-                        listing.get('source'),
-                        datetime.fromtimestamp(listing.get('scraped_at', datetime.now().timestamp()))
-                    ))
-                    stored_count += 1
+                    if row['vin']:
+                        existing = existing_by_vin.get(row['vin'])
+                    else:
+                        existing = existing_by_hash.get(row['content_hash'])
+                    
+                    if existing is None:
+                        columns = LISTING_CONTENT_COLUMNS + ['scraped_at', 'content_hash']
+                        cursor.execute(f'''
+                            INSERT INTO vehicle_listings ({', '.join(columns)})
+                            VALUES ({', '.join('?' * len(columns))})
+                        ''', [row[column] for column in columns])
+                        counts['inserted'] += 1
+                        # Later copies in the same batch compare against this row
+                        stored = dict(row, id=cursor.lastrowid, scraped_at=str(row['scraped_at']))
+                        if row['vin']:
+                            existing_by_vin[row['vin']] = stored
+                        else:
+                            existing_by_hash[row['content_hash']] = stored
+                        
+                    elif existing['content_hash'] == row['content_hash']:
+                        if self._is_stale(existing['scraped_at'], refresh_before) and \
+                                str(row['scraped_at']) > str(existing['scraped_at']):
+                            cursor.execute('UPDATE vehicle_listings SET scraped_at = ? WHERE id = ?',
+                                           (row['scraped_at'], existing['id']))
+                            existing['scraped_at'] = str(row['scraped_at'])
+                            counts['refreshed'] += 1
+                        else:
+                            counts['unchanged'] += 1
+                        
+                    else:
+                        changed = [column for column in LISTING_CONTENT_COLUMNS if existing.get(column) != row[column]]
+                        changed += ['scraped_at', 'content_hash']
+                        assignments = ', '.join(f'{column} = ?' for column in changed)
+                        cursor.execute(f'''
+                            UPDATE vehicle_listings SET {assignments}, processed_at = CURRENT_TIMESTAMP
+                            WHERE id = ?
+                        ''', [row[column] for column in changed] + [existing['id']])
+                        existing.update(row, scraped_at=str(row['scraped_at']))
+                        counts['updated'] += 1
                 except Exception as e:
                     self.logger.error(f"Error storing cleaned listing: {str(e)}")
             
             conn.commit()
-            return stored_count
+        
+        self.logger.info(f"Stored cleaned listings: {counts}")
+        return counts['inserted'] + counts['updated']
+    
+    def _fetch_existing_listings(self, cursor: sqlite3.Cursor, key_column: str, keys: List[str],
+                                 condition: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Fetch stored listings keyed by a column, in chunks below SQLite's variable limit"""
+        existing = {}
+        unique_keys = list(dict.fromkeys(keys))
+        columns = ['id'] + LISTING_CONTENT_COLUMNS + ['scraped_at', 'content_hash']
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            query = f'''
+                SELECT {', '.join(columns)} FROM vehicle_listings
+                WHERE {key_column} IN ({', '.join('?' * len(chunk))})
+            '''
+            if condition:
+                query += f' AND {condition}'
+            cursor.execute(query, chunk)
+            for values in cursor.fetchall():
+                record = dict(zip(columns, values))
+                existing[record[key_column]] = record
+        return existing
+    
+    def _is_stale(self, scraped_at: Optional[str], refresh_before: datetime) -> bool:
+        """Whether a stored scraped_at is older than the refresh cutoff"""
+        if not scraped_at:
+            return True
+        try:
+            return datetime.fromisoformat(str(scraped_at)) < refresh_before
+        except ValueError:
+            return True
     
     def store_predictions(self, predictions: List[Dict[str, Any]]) -> int:
         """Store price predictions"""
@@ -217,8 +345,8 @@ class DataStorage:
             conn.commit()
             return stored_count
     
-    def store_training_metrics(self, metrics: Dict[str, Any]) -> None:
-        """Store training metrics"""
+    def store_training_metrics(self, metrics: Dict[str, Any], stages: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Store training metrics, and the run's stage profile when given; returns the training run id"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
@@ -237,6 +365,31 @@ class DataStorage:
             ))
             
             conn.commit()
+            training_id = cursor.lastrowid
+        
+        if stages:
+            self.store_training_stages(training_id, stages)
+        return training_id
+    
+    def store_training_stages(self, training_id: int, stages: List[Dict[str, Any]]) -> None:
+        """Store the stage profile of a training run"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('''
+                INSERT INTO training_stage_metrics (
+                    training_id, stage, stage_order, depth, wall_time, cpu_time, peak_rss_mb, rows
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                training_id,
+                stage['stage'],
+                order,
+                stage.get('depth', 0),
+                stage.get('wall_time'),
+                stage.get('cpu_time'),
+                stage.get('peak_rss_mb'),
+                stage.get('rows')
+            ) for order, stage in enumerate(stages)])
+            
+            conn.commit()
     
     def store_single_prediction(self, vehicle_data: Dict[str, Any], prediction: Dict[str, Any]) -> None:
         """Store a single prediction for tracking"""
@@ -248,7 +401,8 @@ class DataStorage:
         with sqlite3.connect(self.db_path) as conn:
             query = '''
                 SELECT vl.* FROM vehicle_listings vl
-                LEFT JOIN price_predictions pp ON vl.id = pp.listing_id
+                LEFT JOIN price_predictions pp
+                    ON vl.id = pp.listing_id AND pp.created_at >= vl.processed_at
                 WHERE pp.id IS NULL
                 ORDER BY vl.processed_at DESC
                 LIMIT ?
@@ -451,6 +605,19 @@ class DataStorage:
             df = pd.read_sql_query(query, conn, params=(limit,))
             return df.to_dict('records')
     
+    def get_training_stages(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get stage profiles of the most recent training runs"""
+        with sqlite3.connect(self.db_path) as conn:
+            query = '''
+                SELECT s.*, t.created_at AS trained_at FROM training_stage_metrics s
+                JOIN (SELECT id, created_at FROM training_metrics ORDER BY id DESC LIMIT ?) t
+                    ON s.training_id = t.id
+                ORDER BY s.training_id DESC, s.stage_order
+            '''
+            
+            df = pd.read_sql_query(query, conn, params=(limit,))
+            return df.to_dict('records')
+    
     def cleanup_old_data(self, days: int = 90) -> Dict[str, int]:
         """Clean up old data beyond specified days"""
         with sqlite3.connect(self.db_path) as conn:
@@ -2,21 +2,88 @@
 Vehicle listing deduplication utilities
 """
 
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Set, Tuple
+from typing import Dict, List, Any, Set, Tuple, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 import re
 import logging
 from datetime import datetime
+from .vin_decoder import VINDecoder
+
+class UnionFind:
+    """Disjoint-set forest over positional row indices
+
+    With labels, each set carries the label of its members (None for unlabelled rows)
+    and two sets holding different labels are never merged: a cannot-link constraint
+    that stops chains of near matches from joining distinct vehicles.
+    """
+    
+    def __init__(self, size: int, labels: Optional[List[Optional[str]]] = None):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+        self.labels = list(labels) if labels is not None else [None] * size  # Indexed by root
+    
+    def find(self, x: int) -> int:
+        """Find the root of x, compressing the path on the way"""
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        
+        return root
+    
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets containing a and b; False when their labels conflict"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return True
+        
+        label_a, label_b = self.labels[root_a], self.labels[root_b]
+        if label_a is not None and label_b is not None and label_a != label_b:
+            return False
+        
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        
+        self.parent[root_b] = root_a
+        self.labels[root_a] = label_a if label_a is not None else label_b
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return True
+    
+    def groups(self) -> List[List[int]]:
+        """Return every set with more than one member, ordered by first member"""
+        members = {}
+        for index in range(len(self.parent)):
+            members.setdefault(self.find(index), []).append(index)
+        
+        return [group for group in members.values() if len(group) > 1]
 
 class VehicleDeduplicator:
     """Handles deduplication of vehicle listings"""
     
-    def __init__(self):
+    # Columns needed to score a candidate pair
+    SIMILARITY_COLUMNS = ['vin_normalized', 'title_normalized', 'price', 'mileage',
+                          'dealer_normalized', 'location_normalized']
+    
+    def __init__(self, n_jobs: Optional[int] = None, window_size: int = 10,
+                 parallel_min_pairs: int = 20000, parallel_min_clusters: int = 20000):
         self.logger = logging.getLogger(__name__)
+        self.vin_decoder = VINDecoder(db_path=None)
+        
+        # Parallelism and blocking settings
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.window_size = window_size  # Sorted-neighbourhood window within a block
+        self.parallel_min_pairs = parallel_min_pairs  # Below this, scoring stays in-process
+        self.parallel_min_clusters = parallel_min_clusters  # Below this, merging stays in-process
         
         # Similarity thresholds
+        self.similarity_threshold = 0.7
         self.vin_threshold = 0.9
         self.title_threshold = 0.8
         self.price_threshold = 0.1  # 10% price difference
@@ -33,26 +100,46 @@ class VehicleDeduplicator:
         }
     
     def deduplicate_listings(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate listings from a list"""
+        """Remove duplicate listings from a list, merging each duplicate cluster"""
         if not listings:
             return []
         
         self.logger.info(f"Starting deduplication of {len(listings)} listings")
         
-        # Convert to DataFrame for easier processing
-        df = pd.DataFrame(listings)
+        # Cluster duplicates, then merge each cluster into a single listing
+        clusters = self.cluster_listings(listings)
+        unique_listings = self.merge_clusters(listings, clusters)
         
-        # Clean and normalize data
-        df = self._normalize_data(df)
-        
-        # Find duplicates
-        duplicates = self._find_duplicates(df)
+        self.logger.info(f"Deduplication complete: {len(unique_listings)} unique listings")
+        return unique_listings
+    
+    def cluster_listings(self, listings: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group listings into duplicate clusters of positional indices"""
+        if not listings:
+            return []
         
-        # Remove duplicates, keeping the best version
-        unique_listings = self._remove_duplicates(df, duplicates)
+        df = pd.DataFrame(listings)
+        df = self._normalize_data(df)
         
-        self.logger.info(f"Deduplication complete: {len(unique_listings)} unique listings")
-        return unique_listings.to_dict('records')
+        return self._find_duplicates(df)
+    
+    def merge_clusters(self, listings: List[Dict[str, Any]], 
+                       clusters: List[List[int]]) -> List[Dict[str, Any]]:
+        """Merge every cluster into one listing, keeping singletons as they are"""
+        cluster_listings = [[listings[index] for index in cluster] for cluster in clusters]
+        merged = self._parallel_map(self.merge_duplicate_listings, cluster_listings,
+                                    parallel=len(clusters) >= self.parallel_min_clusters)
+        
+        # Each cluster is emitted at the position of its first member
+        replacements = {}
+        skipped = set()
+        for cluster, merged_listing in zip(clusters, merged):
+            first = min(cluster)
+            replacements[first] = merged_listing
+            skipped.update(index for index in cluster if index != first)
+        
+        return [replacements.get(index, listing) for index, listing in enumerate(listings)
+                if index not in skipped]
     
     def _normalize_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Normalize data for better comparison"""
@@ -83,33 +170,138 @@ class VehicleDeduplicator:
         
         return df
     
-    def _find_duplicates(self, df: pd.DataFrame) -> List[List[int]]:
-        """Find groups of duplicate listings"""
-        duplicate_groups = []
-        processed_indices = set()
+    def _normalize_record(self, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize the fields of a single listing used for quality scoring"""
+        record = dict(listing)
+        record['vin_normalized'] = re.sub(r'[^A-Z0-9]', '', str(listing.get('vin') or '').upper())
         
-        for i, row in df.iterrows():
-            if i in processed_indices:
-                continue
-            
-            # Find similar listings
-            similar_indices = [i]
+        for field in ['price', 'mileage', 'year']:
+            record[field] = pd.to_numeric(listing.get(field), errors='coerce')
+        
+        return record
+    
+    def _find_duplicates(self, df: pd.DataFrame) -> List[List[int]]:
+        """Find groups of duplicate listings as connected components of matching pairs"""
+        df = df.reset_index(drop=True)
+        blocks = self._candidate_blocks(df)
+        
+        # Score blocks in batches, across a process pool for large inputs
+        records = df[self.SIMILARITY_COLUMNS].to_dict('records')
+        batches = self._batch_blocks(blocks, records)
+        total_pairs = sum(self._block_pair_count(len(positions), window) for positions, window in blocks)
+        
+        edge_lists = self._parallel_map(self._score_blocks, batches,
+                                        parallel=total_pairs >= self.parallel_min_pairs)
+        
+        # Transitive closure over all matching pairs, never joining two different valid VINs
+        union_find = UnionFind(len(df), labels=self._valid_vins(df))
+        edge_count = 0
+        rejected = 0
+        for edges in edge_lists:
+            for i, j in edges:
+                if not union_find.union(i, j):
+                    rejected += 1
+            edge_count += len(edges)
+        
+        duplicate_groups = union_find.groups()
+        self.logger.debug(f"Scored {total_pairs} candidate pairs in {len(blocks)} blocks, "
+                          f"{edge_count} matches ({rejected} rejected for conflicting VINs), "
+                          f"{len(duplicate_groups)} clusters")
+        return duplicate_groups
+    
+    def _valid_vins(self, df: pd.DataFrame) -> List[Optional[str]]:
+        """Each row's VIN when it is a valid 17-character VIN, otherwise None"""
+        decoded = self.vin_decoder.decode_batch(df['vin_normalized'], use_cache=False)
+        return [vin if valid else None for vin, valid in zip(decoded['vin'], decoded['valid'])]
+    
+    def _candidate_blocks(self, df: pd.DataFrame) -> List[Tuple[List[int], Optional[int]]]:
+        """Build candidate blocks as (positions, window); a window of None means all pairs"""
+        has_vin = df['vin_normalized'] != ''
+        eligible = df[has_vin] if self.requires_vin_match() else df
+        
+        blocks = []
+        
+        # Exact VIN blocks: every pair is scored
+        vin_rows = eligible[eligible['vin_normalized'] != '']
+        for _, group in vin_rows.groupby('vin_normalized', sort=False):
+            if len(group) > 1:
+                blocks.append((group.index.tolist(), None))
+        
+        # Sorted neighbourhood within year/make/model catches VIN typos and missing VINs
+        ordered = eligible.sort_values('mileage', kind='stable', na_position='last')
+        keys = ['year', 'make_normalized', 'model_normalized']
+        for _, group in ordered.groupby(keys, sort=False, dropna=False):
+            if len(group) > 1:
+                blocks.append((group.index.tolist(), self.window_size))
+        
+        return blocks
+    
+    def requires_vin_match(self) -> bool:
+        """Whether a pair needs VINs on both sides to clear the similarity threshold"""
+        total_weight = sum(self.similarity_weights.values())
+        max_score_without_vin = (total_weight - self.similarity_weights['vin']) / total_weight
+        return max_score_without_vin <= self.similarity_threshold
+    
+    def _block_pair_count(self, size: int, window: Optional[int]) -> int:
+        """Number of pairs a block contributes"""
+        if window is None or window >= size:
+            return size * (size - 1) // 2
+        return (size - window) * window + window * (window - 1) // 2
+    
+    def _batch_blocks(self, blocks: List[Tuple[List[int], Optional[int]]], 
+                      records: List[Dict[str, Any]], 
+                      pairs_per_batch: int = 5000) -> List[List[Tuple[List[int], List[Dict[str, Any]], Optional[int]]]]:
+        """Pack blocks, with their records, into roughly equal units of work"""
+        batches = []
+        current = []
+        current_pairs = 0
+        
+        for positions, window in blocks:
+            current.append((positions, [records[p] for p in positions], window))
+            current_pairs += self._block_pair_count(len(positions), window)
             
-            for j, other_row in df.iterrows():
-                if i >= j or j in processed_indices:
-                    continue
-                
-                similarity = self._calculate_similarity(row, other_row)
-                if similarity > 0.7:  # Similarity threshold
-                    similar_indices.append(j)
+            if current_pairs >= pairs_per_batch:
+                batches.append(current)
+                current = []
+                current_pairs = 0
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def _score_blocks(self, batch: List[Tuple[List[int], List[Dict[str, Any]], Optional[int]]]) -> List[Tuple[int, int]]:
+        """Score candidate pairs inside each block and return the matching edges"""
+        edges = []
+        
+        for positions, records, window in batch:
+            size = len(positions)
+            span = size if window is None else window
             
-            if len(similar_indices) > 1:
-                duplicate_groups.append(similar_indices)
-                processed_indices.update(similar_indices)
+            for a in range(size):
+                vin_a = records[a]['vin_normalized']
+                for b in range(a + 1, min(a + 1 + span, size)):
+                    # Identical VINs are already scored in their own block
+                    if window is not None and vin_a and vin_a == records[b]['vin_normalized']:
+                        continue
+                    
+                    if self._calculate_similarity(records[a], records[b]) > self.similarity_threshold:
+                        edges.append((positions[a], positions[b]))
+        
+        return edges
+    
+    def _parallel_map(self, func: Callable, items: List[Any], parallel: bool = True) -> List[Any]:
+        """Map func over items, fanning out across processes when worthwhile"""
+        if not parallel or self.n_jobs <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
         
-        return duplicate_groups
+        workers = min(self.n_jobs, len(items))
+        chunksize = max(1, len(items) // (workers * 4))
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
     
-    def _calculate_similarity(self, row1: pd.Series, row2: pd.Series) -> float:
+    def _calculate_similarity(self, row1: Dict[str, Any], row2: Dict[str, Any]) -> float:
         """Calculate similarity score between two listings"""
         scores = {}
         
@@ -179,36 +371,6 @@ class VehicleDeduplicator:
         diff = abs(n1 - n2) / max(n1, n2)
         return max(0, 1 - (diff / threshold))
     
-    def _remove_duplicates(self, df: pd.DataFrame, duplicate_groups: List[List[int]]) -> pd.DataFrame:
-        """Remove duplicates, keeping the best version from each group"""
-        indices_to_keep = set(range(len(df)))
-        
-        for group in duplicate_groups:
-            # Find the best listing in the group
-            best_index = self._find_best_listing(df, group)
-            
-            # Remove all others from the group
-            for index in group:
-                if index != best_index:
-                    indices_to_keep.discard(index)
-        
-        return df.iloc[list(indices_to_keep)]
-    
-    def _find_best_listing(self, df: pd.DataFrame, group: List[int]) -> int:
-        """Find the best listing from a group of duplicates"""
-        best_index = group[0]
-        best_score = 0
-        
-        for index in group:
-            row = df.iloc[index]
-            score = self._calculate_listing_quality_score(row)
-            
-            if score > best_score:
-                best_score = score
-                best_index = index
-        
-        return best_index
-    
     def _calculate_listing_quality_score(self, row: pd.Series) -> float:
         """Calculate quality score for a listing"""
         score = 0
@@ -280,7 +442,7 @@ class VehicleDeduplicator:
             for j, existing_row in existing_df.iterrows():
                 similarity = self._calculate_similarity(new_row, existing_row)
                 
-                if similarity > 0.7:
+                if similarity > self.similarity_threshold:
                     potential_duplicates.append({
                         'new_listing_index': i,
                         'existing_listing_index': j,
@@ -323,60 +485,21 @@ class VehicleDeduplicator:
         }
     
     def validate_vin(self, vin: str) -> Dict[str, Any]:
-        """Validate VIN format and extract information"""
-        if not vin:
-            return {'valid': False, 'error': 'Empty VIN'}
-        
-        # Remove spaces and convert to uppercase
-        vin = vin.replace(' ', '').upper()
-        
-        # Check length
-        if len(vin) != 17:
-            return {'valid': False, 'error': f'Invalid VIN length: {len(vin)} (should be 17)'}
-        
-        # Check for invalid characters
-        invalid_chars = set(vin) - set('ABCDEFGHJKLMNPRSTUVWXYZ0123456789')
-        if invalid_chars:
-            return {'valid': False, 'error': f'Invalid characters: {invalid_chars}'}
-        
-        # Basic VIN structure validation
-        try:
-            # Extract basic information
-            country = vin[0]
-            manufacturer = vin[0:3]
-            year_code = vin[9]
-            
-            # Year mapping (simplified)
-            year_map = {
-                'A': 2010, 'B': 2011, 'C': 2012, 'D': 2013, 'E': 2014,
-                'F': 2015, 'G': 2016, 'H': 2017, 'J': 2018, 'K': 2019,
-                'L': 2020, 'M': 2021, 'N': 2022, 'P': 2023, 'R': 2024
-            }
-            
-            year = year_map.get(year_code, None)
-            
-            return {
-                'valid': True,
-                'vin': vin,
-                'country_code': country,
-                'manufacturer_code': manufacturer,
-                'year': year,
-                'year_code': year_code
-            }
-            
-        except Exception as e:
-            return {'valid': False, 'error': f'VIN validation error: {str(e)}'}
+        """Validate VIN format and check digit, and decode make, year and country"""
+        return self.vin_decoder.validate(vin)
     
     def merge_duplicate_listings(self, listings: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Merge information from duplicate listings"""
         if len(listings) <= 1:
             return listings[0] if listings else {}
         
-        # Start with the best quality listing
-        df = pd.DataFrame(listings)
-        df = self._normalize_data(df)
-        
-        best_index = self._find_best_listing(df, list(range(len(listings))))
+        # Start with the best quality listing; clusters are small, so score plain dicts
+        scores = [self._calculate_listing_quality_score(self._normalize_record(listing))
+                  for listing in listings]
+        best_index = 0
+        for index, score in enumerate(scores):
+            if score > scores[best_index]:
+                best_index = index
         merged = listings[best_index].copy()
         
         # Merge additional information from other listings
@@ -0,0 +1,250 @@
+"""
+Streaming deduplication for continuous listing ingestion
+"""
+
+import sqlite3
+import logging
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+from .deduplication import VehicleDeduplicator
+
+def _is_missing(value: Any) -> bool:
+    """Whether a listing field carries no value"""
+    return value is None or (isinstance(value, float) and pd.isna(value))
+
+class StreamingDeduplicator:
+    """Deduplicates batches of listings against a bounded window of recent records
+
+    Memory is bounded by window_size records plus their indexes. VINs that have
+    left the window are still recognised through a persistent VIN index in SQLite.
+    """
+
+    RECORD_COLUMNS = VehicleDeduplicator.SIMILARITY_COLUMNS + ['year', 'make_normalized', 'model_normalized']
+    # Fields a re-scrape updates; a merge takes them from the arriving listing
+    VOLATILE_FIELDS = ['price', 'mileage', 'scraped_at']
+
+    def __init__(self, window_size: int = 50000, db_path: Optional[str] = None,
+                 max_block_candidates: int = 50, deduplicator: Optional[VehicleDeduplicator] = None):
+        self.window_size = window_size
+        self.db_path = db_path
+        self.max_block_candidates = max_block_candidates  # Most recent records compared per year/make/model
+        self.deduplicator = deduplicator or VehicleDeduplicator(n_jobs=1)
+        self.logger = logging.getLogger(__name__)
+
+        # Window of recent records, oldest first, with lookup indexes over it
+        self._window = OrderedDict()
+        self._similarity_records = {}
+        self._vin_index = {}
+        self._block_index = {}
+
+        self.stats = {'processed': 0, 'new': 0, 'merged': 0, 'index_hits': 0, 'evicted': 0}
+
+        self._next_key = 0
+        if self.db_path:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._create_tables()
+            self._next_key = self._load_next_key()
+
+    def _create_tables(self):
+        """Create the persistent VIN index table"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS stream_dedup_index (
+                    vin TEXT PRIMARY KEY,
+                    listing_key INTEGER NOT NULL,
+                    last_seen TIMESTAMP
+                )
+            ''')
+            conn.commit()
+
+    def _load_next_key(self) -> int:
+        """Continue key numbering from a previous run"""
+        with sqlite3.connect(self.db_path) as conn:
+            result = conn.execute('SELECT MAX(listing_key) FROM stream_dedup_index').fetchone()[0]
+        return (result + 1) if result is not None else 0
+
+    def process_batch(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Deduplicate a batch and return one event per listing
+
+        Events are dicts with 'type' ('new' or 'merged'), the stable 'key' of the
+        vehicle, the resulting 'listing' and the 'similarity' of the match.
+        """
+        if not listings:
+            return []
+
+        records = self._records(self.deduplicator._normalize_data(pd.DataFrame(listings)))
+        persisted = self._lookup_persisted([r['vin_normalized'] for r in records if r['vin_normalized']])
+
+        events = []
+        for listing, record in zip(listings, records):
+            events.append(self._process_listing(listing, record, persisted))
+            self._evict()
+
+        self._persist(events)
+
+        self.logger.debug(f"Stream batch: {len(listings)} listings, window {len(self._window)}, stats {self.stats}")
+        return events
+
+    def process_stream(self, batches: Iterable[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+        """Deduplicate an iterable of batches, yielding events as they are produced"""
+        for batch in batches:
+            yield from self.process_batch(batch)
+
+    def _process_listing(self, listing: Dict[str, Any], record: Dict[str, Any],
+                         persisted: Dict[str, int]) -> Dict[str, Any]:
+        """Match one listing against the window and update it"""
+        self.stats['processed'] += 1
+        vin = record['vin_normalized']
+        block_key = self._block_key(record)
+
+        key, similarity = self._best_match(record, block_key)
+
+        if key is not None:
+            existing = self._window[key]
+            merged = self.deduplicator.merge_duplicate_listings([existing, listing])
+            # The arriving listing is the later scrape, whichever record won on quality
+            for field in self.VOLATILE_FIELDS:
+                if not _is_missing(listing.get(field)):
+                    merged[field] = listing[field]
+            merged['merged_from'] = existing.get('merged_from', 1) + 1
+            self._remove(key)
+            self._add(key, merged, self._similarity_record(merged))
+            self.stats['merged'] += 1
+            return {'type': 'merged', 'key': key, 'listing': merged, 'similarity': similarity}
+
+        # Seen before but already evicted from the window: an update to a known vehicle
+        if vin and vin in persisted:
+            key = persisted[vin]
+            # The key may still be in the window under an older record that scored below the threshold
+            if key in self._window:
+                self._remove(key)
+            self._add(key, listing, record)
+            self.stats['index_hits'] += 1
+            self.stats['merged'] += 1
+            return {'type': 'merged', 'key': key, 'listing': listing, 'similarity': None}
+
+        key = self._next_key
+        self._next_key += 1
+        self._add(key, listing, record)
+        if vin:
+            persisted[vin] = key
+        self.stats['new'] += 1
+        return {'type': 'new', 'key': key, 'listing': listing, 'similarity': None}
+
+    def _best_match(self, record: Dict[str, Any], block_key: Tuple) -> Tuple[Optional[int], Optional[float]]:
+        """Find the most similar window record above the similarity threshold"""
+        vin = record['vin_normalized']
+        if not vin and self.deduplicator.requires_vin_match():
+            return None, None
+
+        candidates = []
+        if vin and vin in self._vin_index:
+            candidates.append(self._vin_index[vin])
+        block = self._block_index.get(block_key)
+        if block:
+            candidates.extend(list(block)[-self.max_block_candidates:])
+
+        best_key, best_score = None, self.deduplicator.similarity_threshold
+        for key in dict.fromkeys(candidates):
+            # Different valid VINs are different vehicles, as in batch clustering
+            other_vin = self._similarity_records[key]['valid_vin']
+            if record['valid_vin'] and other_vin and record['valid_vin'] != other_vin:
+                continue
+            score = self.deduplicator._calculate_similarity(record, self._similarity_records[key])
+            if score > best_score:
+                best_key, best_score = key, score
+
+        return (best_key, best_score) if best_key is not None else (None, None)
+
+    def _block_key(self, record: Dict[str, Any]) -> Tuple:
+        """Year/make/model block key, with missing years collapsed to None"""
+        year = record['year']
+        return (None if pd.isna(year) else int(year), record['make_normalized'], record['model_normalized'])
+
+    def _similarity_record(self, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized similarity fields for a single (merged) listing"""
+        return self._records(self.deduplicator._normalize_data(pd.DataFrame([listing])))[0]
+
+    def _records(self, normalized: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Similarity records of normalized listings, each with its valid VIN or None"""
+        records = normalized[self.RECORD_COLUMNS].to_dict('records')
+        for record, vin in zip(records, self.deduplicator._valid_vins(normalized)):
+            record['valid_vin'] = vin
+        return records
+
+    def _add(self, key: int, listing: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """Insert a record into the window and its indexes"""
+        self._window[key] = listing
+        self._similarity_records[key] = record
+
+        if record['vin_normalized']:
+            self._vin_index[record['vin_normalized']] = key
+        self._block_index.setdefault(self._block_key(record), OrderedDict())[key] = None
+
+    def _remove(self, key: int) -> None:
+        """Remove a record from the window and its indexes"""
+        self._window.pop(key)
+        record = self._similarity_records.pop(key)
+
+        vin = record['vin_normalized']
+        if vin and self._vin_index.get(vin) == key:
+            del self._vin_index[vin]
+
+        block_key = self._block_key(record)
+        block = self._block_index.get(block_key)
+        if block is not None:
+            block.pop(key, None)
+            if not block:
+                del self._block_index[block_key]
+
+    def _evict(self) -> None:
+        """Drop the oldest records until the window fits its size"""
+        while len(self._window) > self.window_size:
+            oldest = next(iter(self._window))
+            self._remove(oldest)
+            self.stats['evicted'] += 1
+
+    def _lookup_persisted(self, vins: List[str]) -> Dict[str, int]:
+        """Look up VINs in the persistent index"""
+        if not self.db_path or not vins:
+            return {}
+
+        found = {}
+        unique_vins = list(dict.fromkeys(vins))
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(unique_vins), 500):
+                chunk = unique_vins[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = conn.execute(
+                    f'SELECT vin, listing_key FROM stream_dedup_index WHERE vin IN ({placeholders})', chunk
+                )
+                found.update(dict(cursor.fetchall()))
+        return found
+
+    def _persist(self, events: List[Dict[str, Any]]) -> None:
+        """Record the VIN -> key mapping of every event in the persistent index"""
+        if not self.db_path:
+            return
+
+        now = datetime.now()
+        rows = []
+        for event in events:
+            vin = self.deduplicator._normalize_record(event['listing'])['vin_normalized']
+            if vin:
+                rows.append((vin, event['key'], now))
+
+        if rows:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('''
+                    INSERT INTO stream_dedup_index (vin, listing_key, last_seen) VALUES (?, ?, ?)
+                    ON CONFLICT(vin) DO UPDATE SET last_seen = excluded.last_seen
+                ''', rows)
+                conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current counters and window occupancy"""
+        return dict(self.stats, window_records=len(self._window), window_size=self.window_size)
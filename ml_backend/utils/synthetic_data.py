@@ -0,0 +1,184 @@
+"""
+Synthetic vehicle listing generator for benchmarks and load tests
+"""
+
+import numpy as np
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Tuple, Optional
+from .vin_decoder import VINDecoder, YEAR_CODES
+
+# Make -> (WMI, models with a base price for a new vehicle)
+VEHICLE_CATALOG = {
+    'Toyota': ('4T1', {'Camry': 27000, 'Corolla': 22000, 'RAV4': 29000, 'Tacoma': 32000, 'Highlander': 38000}),
+    'Honda': ('1HG', {'Civic': 24000, 'Accord': 28000, 'CR-V': 30000, 'Pilot': 38000, 'Odyssey': 37000}),
+    'Ford': ('1FA', {'F-150': 38000, 'Escape': 28000, 'Explorer': 36000, 'Mustang': 30000, 'Edge': 35000}),
+    'Chevrolet': ('1G1', {'Silverado': 37000, 'Equinox': 27000, 'Malibu': 25000, 'Tahoe': 55000, 'Traverse': 35000}),
+    'Nissan': ('1N4', {'Altima': 26000, 'Rogue': 28000, 'Sentra': 20000, 'Pathfinder': 35000}),
+    'Hyundai': ('5NP', {'Elantra': 21000, 'Sonata': 25000, 'Tucson': 27000, 'Santa Fe': 30000}),
+    'Kia': ('KNA', {'Forte': 20000, 'Sportage': 27000, 'Sorento': 31000, 'Telluride': 37000}),
+    'Subaru': ('4S3', {'Outback': 29000, 'Forester': 28000, 'Crosstrek': 25000, 'Impreza': 21000}),
+    'Jeep': ('1C4', {'Wrangler': 34000, 'Grand Cherokee': 40000, 'Cherokee': 30000, 'Compass': 27000}),
+    'BMW': ('WBA', {'3 Series': 44000, '5 Series': 56000, 'X3': 47000, 'X5': 62000}),
+    'Mercedes-Benz': ('WDD', {'C-Class': 45000, 'E-Class': 57000, 'GLC': 48000, 'GLE': 60000}),
+    'Audi': ('WAU', {'A4': 41000, 'A6': 56000, 'Q5': 45000, 'Q7': 58000}),
+    'Lexus': ('JTH', {'ES': 42000, 'RX': 49000, 'NX': 41000, 'IS': 40000}),
+    'Tesla': ('5YJ', {'Model 3': 42000, 'Model Y': 50000, 'Model S': 80000}),
+    'Mazda': ('JM1', {'Mazda3': 23000, 'CX-5': 28000, 'CX-9': 37000}),
+}
+
+BODY_TYPES = {
+    'sedan': ['Camry', 'Corolla', 'Civic', 'Accord', 'Malibu', 'Altima', 'Sentra', 'Elantra',
+              'Sonata', 'Forte', 'Impreza', '3 Series', '5 Series', 'C-Class', 'E-Class',
+              'A4', 'A6', 'ES', 'IS', 'Model 3', 'Model S', 'Mazda3'],
+    'truck': ['Tacoma', 'F-150', 'Silverado'],
+    'coupe': ['Mustang'],
+    'van': ['Odyssey'],
+}
+
+FUEL_TYPES = ['gasoline', 'gasoline', 'gasoline', 'gasoline', 'hybrid', 'diesel', 'electric']
+TRANSMISSIONS = ['automatic', 'automatic', 'automatic', 'cvt', 'manual']
+DRIVETRAINS = ['fwd', 'awd', 'rwd', '4wd']
+COLORS = ['white', 'black', 'silver', 'gray', 'blue', 'red', 'green', 'brown']
+FEATURES = ['Bluetooth', 'Backup Camera', 'Navigation', 'Sunroof', 'Leather Seats',
+            'Heated Seats', 'Apple CarPlay', 'Android Auto', 'Blind Spot Monitor',
+            'Adaptive Cruise Control', 'Third Row Seating', 'Remote Start', 'Keyless Entry']
+LOCATIONS = ['Los Angeles, CA', 'San Diego, CA', 'Irvine, CA', 'Pasadena, CA', 'Riverside, CA',
+             'Dallas, TX', 'Houston, TX', 'Austin, TX', 'Phoenix, AZ', 'Denver, CO',
+             'Seattle, WA', 'Chicago, IL', 'Orange County, CA', 'Bakersfield, CA', 'Fresno, CA']
+DEALER_SUFFIXES = ['Motors', 'Auto Group', 'Auto Sales', 'Cars', 'Automotive']
+SOURCES = ['CarGurusScraper', 'AutoTraderScraper', 'CarsComScraper']
+
+VIN_CHARACTERS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+VIN_LETTERS = 'ABCDEFGHJKLMNPRSTUVWXYZ'
+
+class SyntheticListingGenerator:
+    """Generates realistic listings with known duplicate structure"""
+
+    def __init__(self, seed: int = 42):
+        self.rng = np.random.default_rng(seed)
+        self.logger = logging.getLogger(__name__)
+        self.current_year = datetime.now().year
+
+        self.makes = list(VEHICLE_CATALOG.keys())
+        self.body_type_by_model = {model: body for body, models in BODY_TYPES.items() for model in models}
+
+    def generate(self, n_rows: int, duplicate_rate: float = 0.2, vin_missing_rate: float = 0.15,
+                 price_drift: float = 0.03, title_variant_rate: float = 0.3,
+                 sources: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Generate listings and the true vehicle id of each one
+
+        duplicate_rate is the share of rows that re-list a vehicle already in the set,
+        typically on another source. Duplicates may lose their VIN, drift in price,
+        gain a few miles and carry a variant of the model name.
+        """
+        sources = sources or SOURCES
+        n_entities = max(1, int(round(n_rows * (1 - duplicate_rate))))
+
+        vehicles = [self._generate_vehicle(entity_id) for entity_id in range(n_entities)]
+
+        # Every vehicle is listed once; the remaining rows re-list random vehicles
+        entity_ids = np.concatenate([
+            np.arange(n_entities),
+            self.rng.integers(0, n_entities, size=n_rows - n_entities)
+        ])
+        self.rng.shuffle(entity_ids)
+
+        listings = []
+        seen = set()
+        for entity_id in entity_ids.tolist():
+            vehicle = vehicles[entity_id]
+            if entity_id in seen:
+                listing = self._duplicate_listing(vehicle, sources, vin_missing_rate,
+                                                  price_drift, title_variant_rate)
+            else:
+                listing = dict(vehicle, source=sources[int(self.rng.integers(len(sources)))])
+                seen.add(entity_id)
+            listings.append(listing)
+
+        self.logger.info(f"Generated {len(listings)} listings for {n_entities} vehicles")
+        return listings, entity_ids.tolist()
+
+    def _generate_vehicle(self, entity_id: int) -> Dict[str, Any]:
+        """Generate the canonical listing for one physical vehicle"""
+        rng = self.rng
+        make = self.makes[int(rng.integers(len(self.makes)))]
+        wmi, models = VEHICLE_CATALOG[make]
+        model = list(models.keys())[int(rng.integers(len(models)))]
+
+        year = int(rng.integers(self.current_year - 12, self.current_year + 1))
+        age = self.current_year - year
+        mileage = int(max(0, rng.normal(12000, 4000) * max(age, 0.3)))
+
+        # Depreciate from the base price by age and mileage, with market noise
+        price = models[model] * (0.85 ** age) * max(0.5, 1 - mileage / 400000)
+        price = round(max(2500, price * rng.normal(1.0, 0.08)), -1)
+
+        city = LOCATIONS[int(rng.integers(len(LOCATIONS)))]
+        if rng.random() < 0.5:
+            dealer_name = f"{city.split(',')[0]} {make}"
+        else:
+            dealer_name = f"{city.split(',')[0]} {DEALER_SUFFIXES[int(rng.integers(len(DEALER_SUFFIXES)))]}"
+
+        features = rng.choice(FEATURES, size=int(rng.integers(2, 9)), replace=False).tolist()
+        fuel_type = 'electric' if make == 'Tesla' else FUEL_TYPES[int(rng.integers(len(FUEL_TYPES)))]
+
+        return {
+            'make': make,
+            'model': model,
+            'year': year,
+            'mileage': mileage,
+            'price': float(price),
+            'location': city,
+            'vin': self._generate_vin(wmi, year, entity_id),
+            'transmission': TRANSMISSIONS[int(rng.integers(len(TRANSMISSIONS)))],
+            'fuel_type': fuel_type,
+            'body_type': self.body_type_by_model.get(model, 'suv'),
+            'exterior_color': COLORS[int(rng.integers(len(COLORS)))],
+            'interior_color': COLORS[int(rng.integers(3))],
+            'engine': f"{rng.choice([1.5, 2.0, 2.5, 3.5, 5.0])}L",
+            'drivetrain': DRIVETRAINS[int(rng.integers(len(DRIVETRAINS)))],
+            'features': features,
+            'dealer_name': dealer_name,
+            'listing_url': f"https://example.com/listing/{entity_id}",
+            'image_urls': [f"https://example.com/img/{entity_id}/{i}.jpg" for i in range(int(rng.integers(0, 6)))],
+            'scraped_at': datetime.now().timestamp() - float(rng.integers(0, 30 * 86400)),
+        }
+
+    def _generate_vin(self, wmi: str, year: int, entity_id: int) -> str:
+        """Build a valid 17-character VIN with the right WMI, model-year code and check digit"""
+        rng = self.rng
+        descriptor = [VIN_CHARACTERS[i] for i in rng.integers(len(VIN_CHARACTERS), size=5)]
+        # Position 7 is alphabetic for 2010+ model years
+        descriptor[3] = VIN_LETTERS[int(rng.integers(len(VIN_LETTERS)))]
+        year_code = YEAR_CODES[(year - 1980) % 30]
+        plant = VIN_CHARACTERS[int(rng.integers(len(VIN_CHARACTERS)))]
+        serial = f"{entity_id % 1000000:06d}"
+        vin = f"{wmi}{''.join(descriptor)}0{year_code}{plant}{serial}"
+        return vin[:8] + VINDecoder.compute_check_digit(vin) + vin[9:]
+
+    def _duplicate_listing(self, vehicle: Dict[str, Any], sources: List[str], vin_missing_rate: float,
+                           price_drift: float, title_variant_rate: float) -> Dict[str, Any]:
+        """Re-list a vehicle the way another source or a later scrape would"""
+        rng = self.rng
+        listing = dict(vehicle)
+        listing['source'] = sources[int(rng.integers(len(sources)))]
+        listing['price'] = float(round(vehicle['price'] * (1 + rng.normal(0, price_drift)), -1))
+        listing['mileage'] = vehicle['mileage'] + int(rng.integers(0, 300))
+        listing['scraped_at'] = vehicle['scraped_at'] + float(rng.integers(0, 7 * 86400))
+        listing['features'] = list(vehicle['features'])
+        listing['image_urls'] = list(vehicle['image_urls'])
+
+        if rng.random() < vin_missing_rate:
+            listing['vin'] = ''
+
+        if rng.random() < title_variant_rate:
+            variant = int(rng.integers(3))
+            if variant == 0:
+                listing['model'] = vehicle['model'].upper()
+            elif variant == 1:
+                listing['model'] = f"{vehicle['model']} {rng.choice(['LE', 'SE', 'XLE', 'Sport', 'Limited'])}"
+            else:
+                listing['model'] = f" {vehicle['model'].lower()} "
+
+        return listing
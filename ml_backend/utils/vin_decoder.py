@@ -0,0 +1,345 @@
+"""
+Offline VIN decoding with check-digit validation and caching
+"""
+
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Character values used by the check-digit calculation (49 CFR 565)
+TRANSLITERATION = {
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+    **{str(digit): digit for digit in range(10)}
+}
+POSITION_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+
+# Model-year codes repeat every 30 years: A=1980/2010 ... Y=2000/2030, 1=2001/2031 ... 9=2009/2039
+YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'
+
+# World manufacturer identifiers that map to a single make
+WMI_MAKES = {
+    '1FA': 'Ford', '1FB': 'Ford', '1FC': 'Ford', '1FD': 'Ford', '1FM': 'Ford', '1FT': 'Ford',
+    '1ZV': 'Ford', '2FA': 'Ford', '2FM': 'Ford', '2FT': 'Ford', '3FA': 'Ford', '3FT': 'Ford',
+    '1G1': 'Chevrolet', '1GC': 'Chevrolet', '1GN': 'Chevrolet', '2G1': 'Chevrolet', '2GN': 'Chevrolet',
+    '3G1': 'Chevrolet', '3GC': 'Chevrolet', '3GN': 'Chevrolet', 'KL7': 'Chevrolet',
+    '1G4': 'Buick', '1G6': 'Cadillac', '1GY': 'Cadillac', '1GK': 'GMC', '1GT': 'GMC', '3GT': 'GMC',
+    '1HG': 'Honda', '2HG': 'Honda', '2HK': 'Honda', '2HJ': 'Honda', '3HG': 'Honda', '5FN': 'Honda',
+    '5J6': 'Honda', '19X': 'Honda', 'JHM': 'Honda', 'JHL': 'Honda',
+    '19U': 'Acura', '5J8': 'Acura', 'JH4': 'Acura',
+    '4T1': 'Toyota', '4T3': 'Toyota', '4T4': 'Toyota', '5TD': 'Toyota', '5TF': 'Toyota',
+    '2T1': 'Toyota', '2T3': 'Toyota', 'JT2': 'Toyota', 'JT3': 'Toyota', 'JTD': 'Toyota',
+    'JTE': 'Toyota', 'JTM': 'Toyota', 'JTN': 'Toyota', '1NX': 'Toyota',
+    '2T2': 'Lexus', 'JTH': 'Lexus', 'JTJ': 'Lexus', '58A': 'Lexus',
+    '1N4': 'Nissan', '1N6': 'Nissan', '3N1': 'Nissan', '5N1': 'Nissan', 'JN1': 'Nissan', 'JN8': 'Nissan',
+    '5NP': 'Hyundai', '5NM': 'Hyundai', 'KMH': 'Hyundai', 'KM8': 'Hyundai', '2HM': 'Hyundai',
+    '5XY': 'Kia', 'KNA': 'Kia', 'KND': 'Kia', '3KP': 'Kia',
+    '4S3': 'Subaru', '4S4': 'Subaru', 'JF1': 'Subaru', 'JF2': 'Subaru',
+    'JM1': 'Mazda', 'JM3': 'Mazda', '3MZ': 'Mazda', '1YV': 'Mazda',
+    '1J4': 'Jeep', '1J8': 'Jeep', '1C4': 'Jeep', '1C6': 'Ram', '3C6': 'Ram', '1B3': 'Dodge', '1D3': 'Dodge', '1D7': 'Dodge',
+    '1VW': 'Volkswagen', '3VW': 'Volkswagen', 'WVW': 'Volkswagen', 'WVG': 'Volkswagen', 'WV2': 'Volkswagen',
+    'WBA': 'BMW', 'WBS': 'BMW', 'WBX': 'BMW', '4US': 'BMW', '5UX': 'BMW', 'WMW': 'MINI',
+    'WDB': 'Mercedes-Benz', 'WDC': 'Mercedes-Benz', 'WDD': 'Mercedes-Benz', 'W1K': 'Mercedes-Benz',
+    'W1N': 'Mercedes-Benz', '4JG': 'Mercedes-Benz',
+    'WAU': 'Audi', 'WA1': 'Audi', 'WP0': 'Porsche', 'WP1': 'Porsche',
+    '5YJ': 'Tesla', '7SA': 'Tesla', 'LRW': 'Tesla',
+    '1LN': 'Lincoln', '5LM': 'Lincoln', '1ME': 'Mercury', '1G2': 'Pontiac', '1G8': 'Saturn',
+    'JA3': 'Mitsubishi', 'JA4': 'Mitsubishi', 'YV1': 'Volvo', 'YV4': 'Volvo',
+    'SAJ': 'Jaguar', 'SAL': 'Land Rover', 'SCA': 'Rolls-Royce', 'SCB': 'Bentley', 'SCF': 'Aston Martin',
+    'ZAM': 'Maserati', 'ZFF': 'Ferrari', 'ZHW': 'Lamborghini', 'ZFA': 'Fiat', 'ZAR': 'Alfa Romeo',
+    '1HD': 'Harley-Davidson',
+}
+
+# Country of manufacture by the first VIN character, refined by the second where needed
+COUNTRY_BY_PREFIX = {
+    '1': 'United States', '4': 'United States', '5': 'United States', '2': 'Canada', '3': 'Mexico',
+    '6': 'Australia', '7': 'United States', '9': 'Brazil', 'J': 'Japan', 'K': 'South Korea',
+    'L': 'China', 'M': 'India', 'S': 'United Kingdom', 'T': 'Switzerland', 'V': 'France',
+    'W': 'Germany', 'Y': 'Sweden', 'Z': 'Italy',
+}
+COUNTRY_BY_TWO_CHAR_PREFIX = {
+    **{f"V{c}": 'Spain' for c in 'STUVW'},
+    **{f"Y{c}": 'Finland' for c in 'ABCDE'},
+    **{f"7{c}": 'New Zealand' for c in 'ABCDE'},
+    **{f"T{c}": 'Czech Republic' for c in 'JKLMNP'},
+}
+
+# The check digit is mandatory for vehicles built for North America
+CHECK_DIGIT_REGIONS = set('12345')
+
+VIN_PATTERN = r'^[A-HJ-NPR-Z0-9]{17}$'
+
+class VINDecoder:
+    """Decodes VINs offline into make, model year and country"""
+
+    LOOKUP_BATCH = 900  # VINs per SQLite cache query
+
+    def __init__(self, db_path: Optional[str] = 'data/vehicle_listings.db', cache_size: int = 100000,
+                 strict_check_digit: bool = False):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.strict_check_digit = strict_check_digit  # Enforce the check digit outside North America too
+        self.logger = logging.getLogger(__name__)
+        self._cache = OrderedDict()
+
+        # Lookup table from ASCII code to transliterated value for vectorized check digits
+        self._char_values = np.zeros(256, dtype=np.int64)
+        for char, value in TRANSLITERATION.items():
+            self._char_values[ord(char)] = value
+        self._weights = np.array(POSITION_WEIGHTS, dtype=np.int64)
+
+        if self.db_path:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._create_tables()
+
+    def _create_tables(self):
+        """Create the decode cache table"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS vin_decode_cache (
+                    vin TEXT PRIMARY KEY,
+                    valid BOOLEAN,
+                    error TEXT,
+                    make TEXT,
+                    country TEXT,
+                    model_year INTEGER,
+                    check_digit_valid BOOLEAN,
+                    decoded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+
+    @staticmethod
+    def normalize(vin: Any) -> str:
+        """Strip whitespace and upper-case a raw VIN"""
+        if vin is None or (isinstance(vin, float) and np.isnan(vin)):
+            return ''
+        return ''.join(str(vin).split()).upper()
+
+    @staticmethod
+    def compute_check_digit(vin: str) -> str:
+        """Compute the check digit (position 9) for a 17-character VIN"""
+        total = sum(TRANSLITERATION[char] * weight for char, weight in zip(vin, POSITION_WEIGHTS))
+        remainder = total % 11
+        return 'X' if remainder == 10 else str(remainder)
+
+    def decode(self, vin: Any) -> Dict[str, Any]:
+        """Decode a single VIN, consulting the LRU and SQLite caches first"""
+        vin = self.normalize(vin)
+
+        if vin in self._cache:
+            self._cache.move_to_end(vin)
+            return dict(self._cache[vin])
+
+        decoded = self._load_cached([vin]).get(vin) if vin else None
+        if decoded is None:
+            decoded = self._clean_record(self.decode_batch(pd.Series([vin]), use_cache=False).iloc[0].to_dict())
+            if vin:
+                self._store_cached([decoded])
+
+        self._remember(decoded)
+        return dict(decoded)
+
+    def validate(self, vin: Any) -> Dict[str, Any]:
+        """Validate a VIN and describe it, in the shape returned by VehicleDeduplicator.validate_vin"""
+        decoded = self.decode(vin)
+        if not decoded['valid']:
+            return {'valid': False, 'error': decoded['error']}
+
+        vin = decoded['vin']
+        return {
+            'valid': True,
+            'vin': vin,
+            'country_code': vin[0],
+            'manufacturer_code': vin[0:3],
+            'year': decoded['model_year'],
+            'year_code': vin[9],
+            'make': decoded['make'],
+            'country': decoded['country'],
+            'check_digit_valid': decoded['check_digit_valid']
+        }
+
+    def decode_batch(self, vins: pd.Series, use_cache: bool = True) -> pd.DataFrame:
+        """Decode a whole column of VINs with vectorized string and array operations"""
+        normalized = vins.fillna('').astype(str).str.replace(r'\s+', '', regex=True).str.upper()
+
+        # Decode each distinct VIN once and broadcast back to the input rows
+        unique_vins = pd.Series(normalized.unique())
+
+        # Serve VINs from the LRU, then the SQLite cache, and decode only the misses
+        cached = {}
+        if use_cache:
+            for vin in unique_vins:
+                if vin in self._cache:
+                    self._cache.move_to_end(vin)
+                    cached[vin] = self._cache[vin]
+            stored = self._load_cached([vin for vin in unique_vins if vin and vin not in cached])
+            for record in stored.values():
+                self._remember(record)
+            cached.update(stored)
+
+        decoded = self._decode_unique(unique_vins[~unique_vins.isin(list(cached))].reset_index(drop=True))
+
+        if use_cache and len(decoded):
+            records = [self._clean_record(record) for record in decoded.to_dict('records')]
+            for record in records:
+                if record['vin']:
+                    self._remember(record)
+            if self.db_path:
+                self._store_cached([record for record in records if record['vin']])
+
+        if cached:
+            hits = pd.DataFrame(list(cached.values()), columns=decoded.columns).astype({'model_year': 'Int64'})
+            decoded = pd.concat([decoded, hits], ignore_index=True) if len(decoded) else hits
+
+        result = decoded.set_index('vin').reindex(normalized.values)
+        result.insert(0, 'vin', normalized.values)
+        result.index = vins.index
+        return result
+
+    def _decode_unique(self, vins: pd.Series) -> pd.DataFrame:
+        """Vectorized decode of distinct, normalized VINs"""
+        well_formed = vins.str.match(VIN_PATTERN)
+        lengths = vins.str.len()
+
+        # Check digit: transliterate all 17 positions at once and take the weighted sum
+        check_digit_valid = pd.Series(False, index=vins.index)
+        if well_formed.any():
+            codes = np.frombuffer(''.join(vins[well_formed]).encode('ascii'), dtype=np.uint8).reshape(-1, 17)
+            remainder = (self._char_values[codes] @ self._weights) % 11
+            expected = np.where(remainder == 10, ord('X'), remainder + ord('0'))
+            check_digit_valid[well_formed] = codes[:, 8] == expected
+
+        north_american = vins.str.slice(0, 1).isin(CHECK_DIGIT_REGIONS)
+        requires_check = north_american | self.strict_check_digit
+        valid = well_formed & (check_digit_valid | ~requires_check)
+
+        error = np.select(
+            [vins == '', lengths != 17, ~well_formed, ~valid],
+            ['Empty VIN', 'Invalid VIN length: ' + lengths.astype(str) + ' (should be 17)',
+             'Invalid characters', 'Check digit mismatch'],
+            default=None
+        )
+
+        # Manufacturer and country from the WMI
+        make = vins.str[:3].map(WMI_MAKES)
+        country = vins.str[:2].map(COUNTRY_BY_TWO_CHAR_PREFIX)
+        country = country.where(country.notna(), vins.str[:1].map(COUNTRY_BY_PREFIX))
+
+        # Model year: position 7 disambiguates the 30-year cycle (a letter from 2010 on) for every
+        # vehicle built for the US market, imports included
+        year_index = vins.str.slice(9, 10).map({code: index for index, code in enumerate(YEAR_CODES)})
+        position_7_alpha = vins.str.slice(6, 7).str.isalpha()
+        model_year = np.where(position_7_alpha, 2010 + year_index, 1980 + year_index)
+        model_year = pd.Series(model_year, index=vins.index).where(valid & year_index.notna())
+
+        return pd.DataFrame({
+            'vin': vins,
+            'valid': valid,
+            'error': error,
+            'make': make.where(valid),
+            'country': country.where(valid),
+            'model_year': model_year.astype('Int64'),
+            'check_digit_valid': check_digit_valid
+        })
+
+    def enrich_listings(self, listings: List[Dict[str, Any]], drop_invalid: bool = False) -> List[Dict[str, Any]]:
+        """Fill make, year and country from VINs and reject malformed VINs
+
+        A malformed VIN is cleared so it cannot collide in dedup or storage; with
+        drop_invalid the whole listing is discarded instead.
+        """
+        if not listings:
+            return []
+
+        vins = pd.Series([listing.get('vin') for listing in listings], dtype=object)
+        decoded = self.decode_batch(vins)
+
+        enriched = []
+        rejected = 0
+        filled = 0
+        for listing, row in zip(listings, decoded.to_dict('records')):
+            listing = dict(listing)
+
+            if row['vin'] and not row['valid']:
+                rejected += 1
+                if drop_invalid:
+                    continue
+                listing['vin'] = None
+            elif row['valid']:
+                listing['vin'] = row['vin']
+                if not listing.get('make') and pd.notna(row['make']):
+                    listing['make'] = row['make']
+                    filled += 1
+                if not listing.get('year') and pd.notna(row['model_year']):
+                    listing['year'] = int(row['model_year'])
+                    filled += 1
+                if not listing.get('country') and pd.notna(row['country']):
+                    listing['country'] = row['country']
+
+            enriched.append(listing)
+
+        self.logger.info(f"VIN decode: {len(listings)} listings, {rejected} malformed VINs rejected, "
+                         f"{filled} attributes filled")
+        return enriched
+
+    def _clean_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a decoded row into plain Python values"""
+        return {
+            'vin': record['vin'],
+            'valid': bool(record['valid']),
+            'error': record['error'] if isinstance(record['error'], str) else None,
+            'make': record['make'] if isinstance(record['make'], str) else None,
+            'country': record['country'] if isinstance(record['country'], str) else None,
+            'model_year': int(record['model_year']) if pd.notna(record['model_year']) else None,
+            'check_digit_valid': bool(record['check_digit_valid'])
+        }
+
+    def _remember(self, record: Dict[str, Any]) -> None:
+        """Put a decoded record into the in-memory LRU"""
+        self._cache[record['vin']] = record
+        self._cache.move_to_end(record['vin'])
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load_cached(self, vins: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load decoded records from the SQLite cache"""
+        if not self.db_path or not vins:
+            return {}
+
+        records = []
+        with sqlite3.connect(self.db_path) as conn:
+            # Batched to stay under SQLite's limit on bound parameters
+            for offset in range(0, len(vins), self.LOOKUP_BATCH):
+                batch = vins[offset:offset + self.LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(f'''
+                    SELECT vin, valid, error, make, country, model_year, check_digit_valid
+                    FROM vin_decode_cache WHERE vin IN ({placeholders})
+                ''', batch)
+                columns = [desc[0] for desc in cursor.description]
+                records.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+
+        for record in records:
+            record['valid'] = bool(record['valid'])
+            record['check_digit_valid'] = bool(record['check_digit_valid'])
+        return {record['vin']: record for record in records}
+
+    def _store_cached(self, records: List[Dict[str, Any]]) -> None:
+        """Persist decoded records to the SQLite cache"""
+        if not self.db_path or not records:
+            return
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO vin_decode_cache (
+                    vin, valid, error, make, country, model_year, check_digit_valid
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(r['vin'], r['valid'], r['error'], r['make'], r['country'],
+                   r['model_year'], r['check_digit_valid']) for r in records])
+            conn.commit()